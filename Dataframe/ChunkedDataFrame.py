@@ -0,0 +1,123 @@
+# automatically generated by the FlatBuffers compiler, do not modify
+
+# namespace: Dataframe
+
+import flatbuffers
+from flatbuffers.compat import import_numpy
+np = import_numpy()
+
+class ChunkedDataFrame(object):
+    __slots__ = ['_tab']
+
+    @classmethod
+    def GetRootAs(cls, buf, offset=0):
+        n = flatbuffers.encode.Get(flatbuffers.packer.uoffset, buf, offset)
+        x = ChunkedDataFrame()
+        x.Init(buf, n + offset)
+        return x
+
+    @classmethod
+    def GetRootAsChunkedDataFrame(cls, buf, offset=0):
+        """This method is deprecated. Please switch to GetRootAs."""
+        return cls.GetRootAs(buf, offset)
+    # ChunkedDataFrame
+    def Init(self, buf, pos):
+        self._tab = flatbuffers.table.Table(buf, pos)
+
+    # ChunkedDataFrame
+    def Columns(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            x = self._tab.Vector(o)
+            x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 4
+            x = self._tab.Indirect(x)
+            from Dataframe.ColMetaData import ColMetaData
+            obj = ColMetaData()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # ChunkedDataFrame
+    def ColumnsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ChunkedDataFrame
+    def ColumnsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        return o == 0
+
+    # ChunkedDataFrame
+    def RowGroups(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            x = self._tab.Vector(o)
+            x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 24
+            from Dataframe.RowGroup import RowGroup
+            obj = RowGroup()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # ChunkedDataFrame
+    def RowGroupsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ChunkedDataFrame
+    def RowGroupsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        return o == 0
+
+    # ChunkedDataFrame
+    def NumRows(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+def ChunkedDataFrameStart(builder):
+    builder.StartObject(3)
+
+def Start(builder):
+    ChunkedDataFrameStart(builder)
+
+def ChunkedDataFrameAddColumns(builder, columns):
+    builder.PrependUOffsetTRelativeSlot(0, flatbuffers.number_types.UOffsetTFlags.py_type(columns), 0)
+
+def AddColumns(builder, columns):
+    ChunkedDataFrameAddColumns(builder, columns)
+
+def ChunkedDataFrameStartColumnsVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartColumnsVector(builder, numElems):
+    return ChunkedDataFrameStartColumnsVector(builder, numElems)
+
+def ChunkedDataFrameAddRowGroups(builder, rowGroups):
+    builder.PrependUOffsetTRelativeSlot(1, flatbuffers.number_types.UOffsetTFlags.py_type(rowGroups), 0)
+
+def AddRowGroups(builder, rowGroups):
+    ChunkedDataFrameAddRowGroups(builder, rowGroups)
+
+def ChunkedDataFrameStartRowGroupsVector(builder, numElems):
+    return builder.StartVector(24, numElems, 8)
+
+def StartRowGroupsVector(builder, numElems):
+    return ChunkedDataFrameStartRowGroupsVector(builder, numElems)
+
+def ChunkedDataFrameAddNumRows(builder, numRows):
+    builder.PrependUint64Slot(2, numRows, 0)
+
+def AddNumRows(builder, numRows):
+    ChunkedDataFrameAddNumRows(builder, numRows)
+
+def ChunkedDataFrameEnd(builder):
+    return builder.EndObject()
+
+def End(builder):
+    return ChunkedDataFrameEnd(builder)
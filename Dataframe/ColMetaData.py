@@ -38,8 +38,15 @@ class ColMetaData(object):
             return self._tab.Get(flatbuffers.number_types.Int8Flags, o + self._tab.Pos)
         return 0
 
+    # ColMetaData
+    def Dtype(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.String(o + self._tab.Pos)
+        return None
+
 def ColMetaDataStart(builder):
-    builder.StartObject(2)
+    builder.StartObject(3)
 
 def Start(builder):
     ColMetaDataStart(builder)
@@ -56,6 +63,12 @@ def ColMetaDataAddType(builder, type):
 def AddType(builder, type):
     ColMetaDataAddType(builder, type)
 
+def ColMetaDataAddDtype(builder, dtype):
+    builder.PrependUOffsetTRelativeSlot(2, flatbuffers.number_types.UOffsetTFlags.py_type(dtype), 0)
+
+def AddDtype(builder, dtype):
+    ColMetaDataAddDtype(builder, dtype)
+
 def ColMetaDataEnd(builder):
     return builder.EndObject()
 
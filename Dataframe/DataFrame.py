@@ -56,8 +56,35 @@ class DataFrame(object):
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
         return o == 0
 
+    # DataFrame
+    def ColumnIndex(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Uint32Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 4))
+        return 0
+
+    # DataFrame
+    def ColumnIndexAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Uint32Flags, o)
+        return 0
+
+    # DataFrame
+    def ColumnIndexLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # DataFrame
+    def ColumnIndexIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        return o == 0
+
 def DataFrameStart(builder):
-    builder.StartObject(2)
+    builder.StartObject(3)
 
 def Start(builder):
     DataFrameStart(builder)
@@ -80,6 +107,18 @@ def DataFrameStartColumnsVector(builder, numElems):
 def StartColumnsVector(builder, numElems):
     return DataFrameStartColumnsVector(builder, numElems)
 
+def DataFrameAddColumnIndex(builder, columnIndex):
+    builder.PrependUOffsetTRelativeSlot(2, flatbuffers.number_types.UOffsetTFlags.py_type(columnIndex), 0)
+
+def AddColumnIndex(builder, columnIndex):
+    DataFrameAddColumnIndex(builder, columnIndex)
+
+def DataFrameStartColumnIndexVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartColumnIndexVector(builder, numElems):
+    return DataFrameStartColumnIndexVector(builder, numElems)
+
 def DataFrameEnd(builder):
     return builder.EndObject()
 
@@ -6,3 +6,12 @@ class DataType(object):
     INT64 = 0
     FLOAT64 = 1
     STRING = 2
+    DICT_STRING = 3
+    INT8 = 4
+    INT16 = 5
+    INT32 = 6
+    UINT8 = 7
+    UINT16 = 8
+    UINT32 = 9
+    UINT64 = 10
+    FLOAT32 = 11
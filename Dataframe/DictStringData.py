@@ -0,0 +1,108 @@
+# automatically generated by the FlatBuffers compiler, do not modify
+
+# namespace: Dataframe
+
+import flatbuffers
+from flatbuffers.compat import import_numpy
+np = import_numpy()
+
+class DictStringData(object):
+    __slots__ = ['_tab']
+
+    @classmethod
+    def GetRootAs(cls, buf, offset=0):
+        n = flatbuffers.encode.Get(flatbuffers.packer.uoffset, buf, offset)
+        x = DictStringData()
+        x.Init(buf, n + offset)
+        return x
+
+    @classmethod
+    def GetRootAsDictStringData(cls, buf, offset=0):
+        """This method is deprecated. Please switch to GetRootAs."""
+        return cls.GetRootAs(buf, offset)
+    # DictStringData
+    def Init(self, buf, pos):
+        self._tab = flatbuffers.table.Table(buf, pos)
+
+    # DictStringData
+    def Dictionary(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.String(a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 4))
+        return ""
+
+    # DictStringData
+    def DictionaryLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # DictStringData
+    def DictionaryIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        return o == 0
+
+    # DictStringData
+    def Codes(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Int32Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 4))
+        return 0
+
+    # DictStringData
+    def CodesAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Int32Flags, o)
+        return 0
+
+    # DictStringData
+    def CodesLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # DictStringData
+    def CodesIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        return o == 0
+
+def DictStringDataStart(builder):
+    builder.StartObject(2)
+
+def Start(builder):
+    DictStringDataStart(builder)
+
+def DictStringDataAddDictionary(builder, dictionary):
+    builder.PrependUOffsetTRelativeSlot(0, flatbuffers.number_types.UOffsetTFlags.py_type(dictionary), 0)
+
+def AddDictionary(builder, dictionary):
+    DictStringDataAddDictionary(builder, dictionary)
+
+def DictStringDataStartDictionaryVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartDictionaryVector(builder, numElems):
+    return DictStringDataStartDictionaryVector(builder, numElems)
+
+def DictStringDataAddCodes(builder, codes):
+    builder.PrependUOffsetTRelativeSlot(1, flatbuffers.number_types.UOffsetTFlags.py_type(codes), 0)
+
+def AddCodes(builder, codes):
+    DictStringDataAddCodes(builder, codes)
+
+def DictStringDataStartCodesVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartCodesVector(builder, numElems):
+    return DictStringDataStartCodesVector(builder, numElems)
+
+def DictStringDataEnd(builder):
+    return builder.EndObject()
+
+def End(builder):
+    return DictStringDataEnd(builder)
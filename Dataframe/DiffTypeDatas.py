@@ -7,3 +7,12 @@ class DiffTypeDatas(object):
     IntData = 1
     FloatData = 2
     StringData = 3
+    DictStringData = 4
+    Int8Data = 5
+    Int16Data = 6
+    Int32Data = 7
+    UInt8Data = 8
+    UInt16Data = 9
+    UInt32Data = 10
+    UInt64Data = 11
+    Float32Data = 12
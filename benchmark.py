@@ -0,0 +1,437 @@
+import argparse
+import dill
+import math
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import time
+import tracemalloc
+
+from Dataframe import DataFrame, IntData
+from fb_dataframe import to_flatbuffer, fb_column_view, fb_dataframe_head, fb_dataframe_slice, fb_dataframe_group_by, fb_dataframe_map_numeric_column, FbFrameDirectory, _NUMERIC_TABLES, _column_array, _find_column
+from fb_expression import col, column, where, log1p
+from fb_query import fb_dataframe_query
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+from test_fb_dataframe_encoding import to_flatbuffer_per_element
+
+"""
+    Micro-benchmarks for the flatbuffer dataframe functions.
+
+    Usage: python benchmark.py <benchmark> [--rows N] [--cols N] [--repeat N] [--workers N] [--max-mb N]
+"""
+
+
+def _best_time(func, repeat: int) -> float:
+    """
+        Returns the fastest wall-clock time of 'repeat' calls to func.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_encode(args: argparse.Namespace) -> None:
+    """
+        Compares to_flatbuffer's bulk numeric encoding against the per-element loop.
+    """
+    rows, repeat = args.rows, args.repeat
+    df = generate_random_df(rows, args.cols)
+    assert to_flatbuffer(df) == to_flatbuffer_per_element(df)
+
+    per_element_time = _best_time(lambda: to_flatbuffer_per_element(df), repeat)
+    bulk_time = _best_time(lambda: to_flatbuffer(df), repeat)
+
+    print(f"encode {rows} rows x {len(df.columns)} cols")
+    print(f"  per-element: {per_element_time:8.3f}s  {rows / per_element_time:14,.0f} rows/s")
+    print(f"  bulk:        {bulk_time:8.3f}s  {rows / bulk_time:14,.0f} rows/s")
+    print(f"  speedup:     {per_element_time / bulk_time:8.1f}x")
+
+
+def _peak_memory(func) -> int:
+    """
+        Returns the peak number of bytes allocated through Python while running func.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """
+        Compares peak memory of serializing a frame for add_dataframe: the growing builder followed
+        by Output() and bytes(), against the size-planned builder.
+    """
+    rows = args.rows
+    df = generate_random_df(rows, args.cols)
+    fb_size = len(to_flatbuffer(df))
+
+    growing_peak = _peak_memory(lambda: bytes(to_flatbuffer_per_element(df)))
+    planned_peak = _peak_memory(lambda: to_flatbuffer(df))
+
+    print(f"serialize {rows} rows x {len(df.columns)} cols, flatbuffer is {fb_size / 1e6:.1f} MB")
+    print(f"  growing builder: peak {growing_peak / 1e6:8.1f} MB  ({growing_peak / fb_size:.2f}x)")
+    print(f"  planned builder: peak {planned_peak / 1e6:8.1f} MB  ({planned_peak / fb_size:.2f}x)")
+
+
+def bench_parallel_encode(args: argparse.Namespace) -> None:
+    """
+        Reports to_flatbuffer's speedup from encoding columns in 1 to --workers processes, for the
+        mostly numeric random frame and for a frame of --cols // 10 plain string columns (only
+        string columns are encoded by workers).
+    """
+    rng = np.random.default_rng(0)
+    string_df = pd.DataFrame({f"string_col_{i}": np.char.add("value_", rng.integers(0, 1 << 40, args.rows).astype(str)).astype(object)
+                              for i in range(max(1, args.cols // 10))})
+
+    for df in (generate_random_df(args.rows, args.cols), string_df):
+        sequential_time = _best_time(lambda: to_flatbuffer(df), args.repeat)
+        print(f"encode {args.rows} rows x {len(df.columns)} cols")
+        print(f"  sequential: {sequential_time:8.3f}s")
+        workers = 1
+        while workers <= args.workers:
+            parallel_time = _best_time(lambda: to_flatbuffer(df, workers=workers), args.repeat)
+            print(f"  {workers:3d} workers: {parallel_time:8.3f}s  speedup {sequential_time / parallel_time:5.2f}x")
+            workers *= 2
+
+
+def _scan_numeric_columns(fb_bytes: bytes) -> int:
+    """
+        Sums every numeric column of a flatbuffer in its storage type, i.e. reads every numeric byte once.
+    """
+    total = 0
+    for fb_column in FbFrameDirectory(fb_bytes).column_list(fb_bytes, 0):
+        if fb_column.datatype in _NUMERIC_TABLES:
+            total += _column_array(fb_bytes, fb_column).sum()
+    return total
+
+
+def bench_narrow(args: argparse.Namespace) -> None:
+    """
+        Compares buffer size and numeric scan time of the default int64/float64 encoding against
+        to_flatbuffer(downcast=True).
+    """
+    df = generate_random_df(args.rows, args.cols)
+    wide_fb_df = to_flatbuffer(df)
+    narrow_fb_df = to_flatbuffer(df, downcast=True)
+
+    wide_time = _best_time(lambda: _scan_numeric_columns(wide_fb_df), args.repeat)
+    narrow_time = _best_time(lambda: _scan_numeric_columns(narrow_fb_df), args.repeat)
+
+    print(f"{args.rows} rows x {len(df.columns)} cols")
+    print(f"  int64/float64: {len(wide_fb_df) / 1e6:8.1f} MB  scan {wide_time:8.3f}s")
+    print(f"  downcast:      {len(narrow_fb_df) / 1e6:8.1f} MB  scan {narrow_time:8.3f}s")
+    print(f"  size reduction: {len(wide_fb_df) / len(narrow_fb_df):5.2f}x  scan speedup: {wide_time / narrow_time:5.2f}x")
+
+
+def group_by_sum_per_element(fb_bytes: bytes, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
+    """
+        Reference group-by that reads both int64 columns into Python lists one value at a time and
+        hands them to pandas. Used as the baseline for fb_dataframe_group_by.
+    """
+    fb_df = DataFrame.DataFrame.GetRootAs(fb_bytes, 0)
+    col_data = dict()
+    for c_name in (grouping_col_name, sum_col_name):
+        col = _find_column(fb_df, c_name)
+        int_data = IntData.IntData()
+        int_data.Init(col.Data().Bytes, col.Data().Pos)
+        col_data[c_name] = [int_data.Data(j) for j in range(int_data.DataLength())]
+    return pd.DataFrame(col_data).groupby(grouping_col_name).agg({sum_col_name: "sum"})
+
+
+def _generate_group_by_df(rows: int) -> pd.DataFrame:
+    """
+        Generates a group-by benchmark frame with an int key, a low-cardinality string key and two value columns.
+    """
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "int_col": rng.integers(0, 11, rows),
+        "country": rng.choice(["US", "CA", "MX", "FR"], rows),
+        "additional_col_0": rng.integers(0, 1001, rows),
+        "float_col": rng.uniform(0, 10000, rows),
+    })
+
+
+def bench_group_by(args: argparse.Namespace) -> None:
+    """
+        Compares fb_dataframe_group_by against the per-element list-building group-by, for a
+        single sum and for all aggregations over an integer and a string key.
+    """
+    df = _generate_group_by_df(args.rows)
+    fb_df = to_flatbuffer(df)
+    all_aggs = {"additional_col_0": ["sum", "count", "mean", "min", "max", "var"], "float_col": ["sum", "mean"]}
+
+    per_element_time = _best_time(lambda: group_by_sum_per_element(fb_df, "int_col", "additional_col_0"), 1)
+    sum_time = _best_time(lambda: fb_dataframe_group_by(fb_df, "int_col", {"additional_col_0": "sum"}), args.repeat)
+    int_key_time = _best_time(lambda: fb_dataframe_group_by(fb_df, "int_col", all_aggs), args.repeat)
+    string_key_time = _best_time(lambda: fb_dataframe_group_by(fb_df, "country", all_aggs), args.repeat)
+    multi_key_time = _best_time(lambda: fb_dataframe_group_by(fb_df, ["country", "int_col"], all_aggs), args.repeat)
+
+    print(f"group by over {args.rows} rows")
+    print(f"  per-element lists, sum:     {per_element_time:8.3f}s")
+    print(f"  vectorized, sum:            {sum_time:8.3f}s  speedup {per_element_time / sum_time:6.1f}x")
+    print(f"  vectorized, 8 aggregates:   {int_key_time:8.3f}s  (int key)")
+    print(f"  vectorized, 8 aggregates:   {string_key_time:8.3f}s  (dictionary string key)")
+    print(f"  vectorized, 8 aggregates:   {multi_key_time:8.3f}s  (string + int keys)")
+
+
+def bench_parallel_group_by(args: argparse.Namespace) -> None:
+    """
+        Reports the scaling of FbSharedMemory.dataframe_group_by from 1 to --workers processes. The
+        frame takes about 28 bytes per row of the 200 MB segment.
+    """
+    df = _generate_group_by_df(args.rows)
+    aggs = {"additional_col_0": ["sum", "mean", "var"], "float_col": ["sum", "max"]}
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("bench_group_by", df)
+
+    sequential_time = _best_time(lambda: fb_shm.dataframe_group_by("bench_group_by", ["country", "int_col"], aggs), args.repeat)
+    print(f"group by over {args.rows} rows in shared memory")
+    print(f"  sequential: {sequential_time:8.3f}s")
+    workers = 1
+    while workers <= args.workers:
+        parallel_time = _best_time(lambda: fb_shm.dataframe_group_by("bench_group_by", ["country", "int_col"], aggs, parallel=workers), args.repeat)
+        print(f"  {workers:3d} workers: {parallel_time:8.3f}s  speedup {sequential_time / parallel_time:5.2f}x")
+        workers *= 2
+    fb_shm.close()
+
+
+def map_per_element(fb_buf: memoryview, col_name: str, map_func) -> None:
+    """
+        Reference in-place map that decodes, maps and re-encodes an int64 column one value at a time
+        with int.from_bytes and to_bytes. Used as the baseline for fb_dataframe_map_numeric_column.
+    """
+    view = fb_column_view(fb_buf, col_name)
+    offset = view.ctypes.data - np.frombuffer(fb_buf, dtype=np.uint8).ctypes.data
+    for _ in range(len(view)):
+        num = int.from_bytes(fb_buf[offset:offset + 8], "little", signed=True)
+        fb_buf[offset:offset + 8] = map_func(num).to_bytes(8, "little", signed=True)
+        offset += 8
+
+
+def bench_map(args: argparse.Namespace) -> None:
+    """
+        Compares the in-place map modes of fb_dataframe_map_numeric_column on one int64 column.
+    """
+    df = pd.DataFrame({"int_col": np.random.default_rng(0).integers(0, 11, args.rows)})
+    fb_df = to_flatbuffer(df)
+
+    per_element_time = _best_time(lambda: map_per_element(fb_df, "int_col", lambda x: x + 2), 1)
+    batched_time = _best_time(lambda: fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x + 2), 1)
+    vectorized_time = _best_time(lambda: fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x + 2, vectorized=True), args.repeat)
+    ufunc_time = _best_time(lambda: fb_dataframe_map_numeric_column(fb_df, "int_col", np.negative), args.repeat)
+
+    print(f"map over {args.rows} rows")
+    print(f"  per-element bytes:    {per_element_time * 1e3:10.1f} ms")
+    print(f"  batched python calls: {batched_time * 1e3:10.1f} ms  speedup {per_element_time / batched_time:7.1f}x")
+    print(f"  vectorized:           {vectorized_time * 1e3:10.1f} ms  speedup {per_element_time / vectorized_time:7.1f}x")
+    print(f"  in-place ufunc:       {ufunc_time * 1e3:10.1f} ms  speedup {per_element_time / ufunc_time:7.1f}x")
+
+
+def bench_expression(args: argparse.Namespace) -> None:
+    """
+        Compares a blocked expression map against a per-value lambda and the same computation as
+        whole-column NumPy calls.
+    """
+    df = pd.DataFrame({"float_col": np.random.default_rng(0).uniform(0, 100, args.rows)})
+    fb_df = to_flatbuffer(df)
+
+    expr = where(col > 50, log1p(col) * 2 + 1, col)
+    per_value_time = _best_time(lambda: fb_dataframe_map_numeric_column(
+        fb_df, "float_col", lambda x: np.log1p(x) * 2 + 1 if x > 50 else x), 1)
+    numpy_time = _best_time(lambda: fb_dataframe_map_numeric_column(
+        fb_df, "float_col", lambda x: np.where(x > 50, np.log1p(x) * 2 + 1, x), vectorized=True), args.repeat)
+    expr_time = _best_time(lambda: fb_dataframe_map_numeric_column(fb_df, "float_col", expr), args.repeat)
+
+    print(f"expression map over {args.rows} rows: {expr}")
+    print(f"  per-value lambda:     {per_value_time * 1e3:10.1f} ms")
+    print(f"  whole-column numpy:   {numpy_time * 1e3:10.1f} ms  speedup {per_value_time / numpy_time:7.1f}x")
+    print(f"  blocked expression:   {expr_time * 1e3:10.1f} ms  speedup {per_value_time / expr_time:7.1f}x")
+
+
+def bench_parallel_map(args: argparse.Namespace) -> None:
+    """
+        Reports the scaling of FbSharedMemory.dataframe_map_numeric_column from 1 to --workers
+        processes with a per-value Python map_func.
+    """
+    df = pd.DataFrame({"float_col": np.random.default_rng(0).uniform(0, 100, args.rows)})
+    map_func = lambda x: math.log1p(x) if x > 50 else x / 2
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("bench_map", df)
+
+    sequential_time = _best_time(lambda: fb_shm.dataframe_map_numeric_column("bench_map", "float_col", map_func), args.repeat)
+    print(f"per-value map over {args.rows} rows in shared memory")
+    print(f"  sequential: {sequential_time:8.3f}s")
+    workers = 1
+    while workers <= args.workers:
+        parallel_time = _best_time(lambda: fb_shm.dataframe_map_numeric_column("bench_map", "float_col", map_func, workers=workers), args.repeat)
+        print(f"  {workers:3d} workers: {parallel_time:8.3f}s  speedup {sequential_time / parallel_time:5.2f}x")
+        workers *= 2
+    fb_shm.close()
+
+
+def bench_catalog(args: argparse.Namespace) -> None:
+    """
+        Compares looking a dataframe up in the binary catalog with the previous dill-pickled dict,
+        which was unpickled from the whole 20 MB hash segment on every lookup.
+    """
+    fb_shm = FbSharedMemory()
+    names = [f"bench_catalog_{i}" for i in range(args.cols)]
+    for name in names:
+        fb_shm.add_dataframe(name, pd.DataFrame({"int_col": [1, 2, 3]}))
+    hashmap = {name: [fb_shm.catalog.lookup(name).offset, fb_shm.catalog.lookup(name).length] for name in names}
+    hashmap_segment = bytearray(20000000)
+    hashmap_bytes = dill.dumps(hashmap)
+    hashmap_segment[:len(hashmap_bytes)] = hashmap_bytes
+
+    dill_time = _best_time(lambda: [dill.loads(hashmap_segment)[name] for name in names], args.repeat) / len(names)
+    catalog_time = _best_time(lambda: [fb_shm.catalog.lookup(name) for name in names], args.repeat) / len(names)
+    print(f"catalog lookup with {len(names)} dataframes")
+    print(f"  dill dict: {dill_time * 1e6:10.1f} us")
+    print(f"  catalog:   {catalog_time * 1e6:10.1f} us  speedup {dill_time / catalog_time:7.1f}x")
+    fb_shm.close()
+
+
+def bench_head(args: argparse.Namespace) -> None:
+    """
+        Reports FbSharedMemory.dataframe_head latency for frames from 1 MB to --max-mb MB, against
+        the previous path that copied the whole flatbuffer out of shared memory first.
+    """
+    fb_shm = FbSharedMemory("CS598_bench_head", segment_size=(args.max_mb + 1) << 20)
+    print("dataframe_head(5) by frame size")
+    size_mb = 1
+    while size_mb <= args.max_mb:
+        rows = (size_mb << 20) // (8 * args.cols)
+        df = pd.DataFrame({f"col_{i}": np.arange(rows, dtype=np.int64) for i in range(args.cols)})
+        fb_shm.replace_dataframe("bench_head", df)
+        del df
+
+        view_time = _best_time(lambda: fb_shm.dataframe_head("bench_head"), args.repeat)
+        copy_time = _best_time(lambda: fb_dataframe_head(bytes(fb_shm._get_fb_buf("bench_head"))), args.repeat)
+        print(f"  {size_mb:5d} MB: {view_time * 1e3:8.2f} ms  (copying: {copy_time * 1e3:8.2f} ms)")
+        size_mb *= 4
+    fb_shm.delete_dataframe("bench_head")
+    fb_shm.close()
+
+
+def bench_directory(args: argparse.Namespace) -> None:
+    """
+        Compares repeated FbSharedMemory queries with the column directory kept per dataframe
+        version against parsing the flatbuffer's metadata on every call.
+    """
+    fb_shm = FbSharedMemory()
+    df = generate_random_df(1000, args.cols)
+    fb_shm.replace_dataframe("bench_directory", df)
+    entry = fb_shm.catalog.lookup("bench_directory")
+    fb_buf = fb_shm._get_fb_buf("bench_directory")
+
+    head_time = _best_time(lambda: [fb_dataframe_head(fb_buf) for _ in range(100)], args.repeat) / 100
+    cached_head_time = _best_time(lambda: [fb_shm.dataframe_head("bench_directory") for _ in range(100)], args.repeat) / 100
+    group_by_time = _best_time(lambda: [fb_dataframe_group_by(fb_buf, "int_col", {"float_col": "sum"}) for _ in range(100)], args.repeat) / 100
+    cached_group_by_time = _best_time(lambda: [fb_shm.dataframe_group_by("bench_directory", "int_col", {"float_col": "sum"}) for _ in range(100)], args.repeat) / 100
+    print(f"repeated queries on a 1000-row frame with {len(df.columns)} columns (generation {entry.generation})")
+    print(f"  head:     {head_time * 1e3:8.3f} ms  cached: {cached_head_time * 1e3:8.3f} ms  speedup {head_time / cached_head_time:5.2f}x")
+    print(f"  group by: {group_by_time * 1e3:8.3f} ms  cached: {cached_group_by_time * 1e3:8.3f} ms  speedup {group_by_time / cached_group_by_time:5.2f}x")
+    fb_buf.release()
+    fb_shm.delete_dataframe("bench_directory")
+    fb_shm.close()
+
+
+def bench_slice(args: argparse.Namespace) -> None:
+    """
+        Compares reading 100 rows from the middle of a frame with fb_dataframe_slice against
+        decoding the whole frame with fb_dataframe_head and slicing it.
+    """
+    df = generate_random_df(args.rows, args.cols)
+    fb_df = to_flatbuffer(df)
+    middle = args.rows // 2
+
+    head_time = _best_time(lambda: fb_dataframe_head(fb_df, len(df)).iloc[middle:middle + 100], args.repeat)
+    slice_time = _best_time(lambda: fb_dataframe_slice(fb_df, middle, middle + 100), args.repeat)
+    print(f"rows [{middle}, {middle + 100}) of {args.rows} rows x {len(df.columns)} columns")
+    print(f"  head + iloc: {head_time * 1e3:10.2f} ms")
+    print(f"  slice:       {slice_time * 1e3:10.2f} ms  speedup {head_time / slice_time:7.1f}x")
+
+
+def bench_query(args: argparse.Namespace) -> None:
+    """
+        Compares a selective query (a few rows in ten thousand, two columns) with fb_dataframe_query
+        against decoding the whole frame with fb_dataframe_head and filtering it with pandas.
+    """
+    df = generate_random_df(args.rows, args.cols)
+    fb_df = to_flatbuffer(df)
+    select = ["string_col", "float_col"]
+    where = (column("int_col") == 3) & (column("additional_col_0") < 100) & column("string_col").startswith("A")
+
+    def pandas_query():
+        decoded = fb_dataframe_head(fb_df, len(df))
+        mask = (decoded["int_col"] == 3) & (decoded["additional_col_0"] < 100) & decoded["string_col"].str.startswith("A")
+        return decoded.loc[mask, select]
+
+    head_time = _best_time(pandas_query, args.repeat)
+    query_time = _best_time(lambda: fb_dataframe_query(fb_df, select, where), args.repeat)
+    print(f"{len(fb_dataframe_query(fb_df, select, where))} of {args.rows} rows x {len(df.columns)} columns")
+    print(f"  head + filter: {head_time * 1e3:10.2f} ms")
+    print(f"  query:         {query_time * 1e3:10.2f} ms  speedup {head_time / query_time:7.1f}x")
+
+
+def bench_reopen(args: argparse.Namespace) -> None:
+    """
+        Reports how long a new FbSharedMemory takes to open a store kept in files with a frame of
+        --max-mb MB and serve dataframe_head, against re-encoding the frame from pandas.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        rows = (args.max_mb << 20) // (8 * args.cols)
+        df = pd.DataFrame({f"col_{i}": np.arange(rows, dtype=np.int64) for i in range(args.cols)})
+        fb_shm = FbSharedMemory("CS598_bench_reopen", segment_size=(args.max_mb + 1) << 20, path=path)
+        encode_time = _best_time(lambda: fb_shm.replace_dataframe("bench_reopen", df), 1)
+        fb_shm.flush()
+        fb_shm.close()
+
+        def reopen():
+            fb_shm = FbSharedMemory("CS598_bench_reopen", path=path)
+            fb_shm.dataframe_head("bench_reopen")
+            fb_shm.close()
+        reopen_time = _best_time(reopen, args.repeat)
+        print(f"open and dataframe_head(5) of a {args.max_mb} MB frame")
+        print(f"  re-encoding: {encode_time * 1e3:10.2f} ms")
+        print(f"  reopening:   {reopen_time * 1e3:10.2f} ms")
+
+
+BENCHMARKS = {
+    "catalog": bench_catalog,
+    "directory": bench_directory,
+    "encode": bench_encode,
+    "expression": bench_expression,
+    "group_by": bench_group_by,
+    "head": bench_head,
+    "map": bench_map,
+    "memory": bench_memory,
+    "narrow": bench_narrow,
+    "parallel_encode": bench_parallel_encode,
+    "parallel_group_by": bench_parallel_group_by,
+    "parallel_map": bench_parallel_map,
+    "query": bench_query,
+    "reopen": bench_reopen,
+    "slice": bench_slice,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatbuffer dataframe benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-mb", type=int, default=1024)
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args)
@@ -0,0 +1,369 @@
+"""
+    Binary catalog of the flatbuffer dataframes in shared memory, and the allocator of the
+    dataframe segments.
+
+    The catalog is an open-addressed hash table of fixed-size entries with linear probing, laid
+    out directly in a buffer (the CS598_hash segment), so any process attached to the buffer can
+    look a dataframe up by reading one or a few entries; nothing is deserialized. The free space of
+    the dataframe segments is kept next to it, as the used end of the last segment plus a list of
+    free extents, sorted by address and coalesced. An address is a segment number and an offset
+    in that segment packed into one integer (see _address). Layout:
+
+        header      _HEADER at offset 0, padded to _HEADER_SIZE bytes
+        entries     capacity entries of _ENTRY.size bytes each
+        free list   capacity (address, size) pairs of uint64
+
+    Names are hashed with blake2b, which (unlike hash()) is the same in every process. The
+    catalog does no locking: writers must be serialized by the caller.
+"""
+
+import hashlib
+import numpy as np
+import os
+import struct
+import typing
+
+CATALOG_MAGIC = b"FBC1"
+
+# Magic, capacity (a power of two), number of used entries, catalog generation, the end of the used
+# part of the last dataframe segment, the number of free extents, the number of segments, the
+# random store id and the number of tombstones.
+_HEADER = struct.Struct("<4sIQQQQQQQ")
+_HEADER_SIZE = 64
+
+# State, name length, dtype summary, name hash, offset, length, generation, rows, columns, segment
+# and name.
+_ENTRY = struct.Struct("<BBxxIQQQQQII128s")
+MAX_NAME_LENGTH = 128
+_NAME_OFFSET = _ENTRY.size - MAX_NAME_LENGTH
+
+# Entry states; deleted entries stay as tombstones so that probe sequences are not cut short.
+_EMPTY, _USED, _DELETED = 0, 1, 2
+# Offset of the name hash in an entry.
+_HASH_OFFSET = 8
+
+# Allocations are multiples of this many bytes, so every frame can be aligned to it.
+ALLOCATION_ALIGNMENT = 8
+
+# Segments are at most 1 << _SEGMENT_SHIFT bytes, so addresses in different segments never touch.
+_SEGMENT_SHIFT = 40
+
+# Entries are never filled beyond this fraction of the capacity, to keep probe sequences short.
+_MAX_LOAD = 0.75
+# The table is rehashed, dropping its tombstones, before used entries and tombstones together
+# fill more than this fraction of it: lookups of missing names stop only at empty slots.
+_MAX_FILL = 0.875
+
+
+class FbCatalogEntry(typing.NamedTuple):
+    """
+        A catalog entry: where the dataframe called name is in the dataframe segments and a
+        summary of its contents.
+    """
+    name: str
+    offset: int
+    length: int
+    # Catalog generation at which the entry was last written.
+    generation: int
+    num_rows: int
+    num_columns: int
+    # Bit t is set if a column is stored with DataType t.
+    dtypes: int
+    segment: int = 0
+
+
+class FbCatalog:
+    """
+        A catalog stored in buf, see the module docstring.
+    """
+    def __init__(self, buf: memoryview):
+        magic, capacity = _HEADER.unpack_from(buf, 0)[:2]
+        if magic != CATALOG_MAGIC:
+            raise ValueError("buffer does not hold a flatbuffer dataframe catalog")
+        self.buf = buf
+        self.capacity = capacity
+
+    @staticmethod
+    def create(buf: memoryview) -> "FbCatalog":
+        """
+            Initializes an empty catalog with as many entries as fit in buf (rounded down to a power
+            of two) and returns it.
+        """
+        capacity = 1 << (((len(buf) - _HEADER_SIZE) // (_ENTRY.size + 16)).bit_length() - 1)
+        np.frombuffer(buf, dtype=np.uint8, count=_HEADER_SIZE + capacity * _ENTRY.size)[:] = 0
+        _HEADER.pack_into(buf, 0, CATALOG_MAGIC, capacity, 0, 0, 0, 0, 1, int.from_bytes(os.urandom(8), "little"), 0)
+        return FbCatalog(buf)
+
+    def __len__(self) -> int:
+        return _HEADER.unpack_from(self.buf, 0)[2]
+
+    @property
+    def generation(self) -> int:
+        """
+            The catalog generation, incremented by every change to an entry.
+        """
+        return _HEADER.unpack_from(self.buf, 0)[3]
+
+    @property
+    def store_id(self) -> int:
+        """
+            A random number chosen when the catalog was created. Generations start at 1 in every
+            store, so (store_id, generation) identifies a dataframe version across stores.
+        """
+        return _HEADER.unpack_from(self.buf, 0)[7]
+
+    @property
+    def segments(self) -> int:
+        """
+            The number of dataframe segments.
+        """
+        return _HEADER.unpack_from(self.buf, 0)[6]
+
+    @property
+    def data_end(self) -> int:
+        """
+            The end of the used part of the last dataframe segment.
+        """
+        return _HEADER.unpack_from(self.buf, 0)[4]
+
+    @data_end.setter
+    def data_end(self, data_end: int) -> None:
+        struct.pack_into("<Q", self.buf, 24, data_end)
+
+    def allocate(self, size: int, limit: int) -> tuple:
+        """
+            Allocates size bytes (rounded up to ALLOCATION_ALIGNMENT) and returns their (segment,
+            offset): the first free extent that is large enough, or else the used end of the last
+            segment. Raises MemoryError if the allocation would end beyond limit; add_segment then
+            starts a new segment.
+
+            @param size: number of bytes.
+            @param limit: size of the last dataframe segment.
+        """
+        size = _align(size)
+        extents = self._free_extents()
+        fits = np.flatnonzero(extents[:, 1] >= size)
+        if len(fits):
+            i = fits[0]
+            address = int(extents[i, 0])
+            if extents[i, 1] == size:
+                self._remove_free_extent(extents, i)
+            else:
+                extents[i, 0] += size
+                extents[i, 1] -= size
+            return address >> _SEGMENT_SHIFT, address & ((1 << _SEGMENT_SHIFT) - 1)
+
+        offset = self.data_end
+        if offset + size > limit:
+            raise MemoryError(f"cannot allocate {size} bytes, {limit - offset} are left at the end of the segment")
+        self.data_end = offset + size
+        return self.segments - 1, offset
+
+    def add_segment(self, limit: int) -> int:
+        """
+            Starts allocating from the end of a new, empty segment, and returns its number. The
+            unused end of the last segment becomes a free extent.
+
+            @param limit: size of the last dataframe segment.
+        """
+        segment = self.segments - 1
+        data_end = self.data_end
+        struct.pack_into("<Q", self.buf, 40, segment + 2)
+        self.data_end = 0
+        if data_end < limit:
+            self.free(segment, data_end, (limit - data_end) & ~(ALLOCATION_ALIGNMENT - 1))
+        return segment + 1
+
+    def free(self, segment: int, offset: int, size: int) -> None:
+        """
+            Frees the size bytes at offset in segment, which must have been allocated, merging them
+            with the free extents next to them. Space freed at the used end of the last segment
+            shrinks it.
+        """
+        start = _address(segment, offset & ~(ALLOCATION_ALIGNMENT - 1))
+        end = _align(_address(segment, offset + size))
+        extents = self._free_extents()
+        i = int(np.searchsorted(extents[:, 0], start))
+        if i > 0 and extents[i - 1].sum() == start:
+            i -= 1
+            start = int(extents[i, 0])
+            self._remove_free_extent(extents, i)
+            extents = self._free_extents()
+        if i < len(extents) and extents[i, 0] == end:
+            end = int(extents[i].sum())
+            self._remove_free_extent(extents, i)
+            extents = self._free_extents()
+
+        if segment == self.segments - 1 and end == _address(segment, self.data_end):
+            self.data_end = start - _address(segment, 0)
+            return
+        count = len(extents)
+        extents = self._free_extents(count + 1)
+        extents[i + 1:] = extents[i:count].copy()
+        extents[i] = (start, end - start)
+        struct.pack_into("<Q", self.buf, 32, count + 1)
+
+    def free_space(self) -> tuple:
+        """
+            Returns (free bytes below the used end of the last segment, largest free extent).
+        """
+        sizes = self._free_extents()[:, 1]
+        return int(sizes.sum()), int(sizes.max(initial=0))
+
+    def _free_extents(self, count: int = None) -> np.ndarray:
+        """
+            Returns a view of the first count (default: all used) free extents as (address, size)
+            rows.
+        """
+        if count is None:
+            count = _HEADER.unpack_from(self.buf, 0)[5]
+        position = _HEADER_SIZE + self.capacity * _ENTRY.size
+        return np.frombuffer(self.buf, dtype=np.uint64, count=2 * count, offset=position).reshape(-1, 2)
+
+    def _remove_free_extent(self, extents: np.ndarray, i: int) -> None:
+        extents[i:-1] = extents[i + 1:].copy()
+        struct.pack_into("<Q", self.buf, 32, len(extents) - 1)
+
+    def lookup(self, name: str) -> FbCatalogEntry:
+        """
+            Returns the entry of the dataframe called name. Raises KeyError if there is none.
+        """
+        slot, found = self._probe(_encode_name(name))
+        if not found:
+            raise KeyError(name)
+        return self._entry(slot)
+
+    def put(self, name: str, offset: int, length: int, num_rows: int = 0, num_columns: int = 0, dtypes: int = 0, segment: int = 0) -> FbCatalogEntry:
+        """
+            Adds or replaces the entry of the dataframe called name, writing only that entry and the
+            header, and returns it with its new generation.
+        """
+        name_bytes = _encode_name(name)
+        slot, found = self._probe(name_bytes)
+        _, capacity, count, generation = _HEADER.unpack_from(self.buf, 0)[:4]
+        tombstones = _HEADER.unpack_from(self.buf, 0)[8]
+        if not found:
+            if count + 1 > capacity * _MAX_LOAD:
+                raise MemoryError(f"the catalog is full ({count} dataframes)")
+            if self.buf[_HEADER_SIZE + slot * _ENTRY.size] == _DELETED:
+                tombstones -= 1
+            elif count + tombstones + 1 > capacity * _MAX_FILL:
+                self._rehash()
+                slot, tombstones = self._probe(name_bytes)[0], 0
+            count += 1
+        generation += 1
+
+        _ENTRY.pack_into(self.buf, _HEADER_SIZE + slot * _ENTRY.size, _USED, len(name_bytes), dtypes,
+                         _hash_name(name_bytes), offset, length, generation, num_rows, num_columns, segment,
+                         name_bytes)
+        struct.pack_into("<QQ", self.buf, 8, count, generation)
+        struct.pack_into("<Q", self.buf, 56, tombstones)
+        return self._entry(slot)
+
+    def delete(self, name: str) -> FbCatalogEntry:
+        """
+            Removes the entry of the dataframe called name and returns it. Raises KeyError if there
+            is none. The dataframe's space is not freed.
+        """
+        slot, found = self._probe(_encode_name(name))
+        if not found:
+            raise KeyError(name)
+        entry = self._entry(slot)
+        count, generation = _HEADER.unpack_from(self.buf, 0)[2:4]
+        self.buf[_HEADER_SIZE + slot * _ENTRY.size] = _DELETED
+        struct.pack_into("<QQ", self.buf, 8, count - 1, generation + 1)
+        struct.pack_into("<Q", self.buf, 56, _HEADER.unpack_from(self.buf, 0)[8] + 1)
+        return entry
+
+    def rebuild(self, entries: typing.Iterable[FbCatalogEntry], data_end: int) -> None:
+        """
+            Replaces all entries with the given ones, dropping tombstones and the free list, and
+            sets the used end of the last segment. Used after the dataframe segments were
+            compacted.
+        """
+        entries = list(entries)
+        np.frombuffer(self.buf, dtype=np.uint8, count=self.capacity * _ENTRY.size, offset=_HEADER_SIZE)[:] = 0
+        struct.pack_into("<Q", self.buf, 8, 0)
+        struct.pack_into("<QQ", self.buf, 24, data_end, 0)
+        struct.pack_into("<Q", self.buf, 56, 0)
+        for entry in entries:
+            self.put(entry.name, entry.offset, entry.length, entry.num_rows, entry.num_columns, entry.dtypes, entry.segment)
+
+    def entries(self) -> typing.Iterator[FbCatalogEntry]:
+        """
+            Yields all entries, in slot order. Reads the whole table.
+        """
+        for slot in range(self.capacity):
+            if self.buf[_HEADER_SIZE + slot * _ENTRY.size] == _USED:
+                yield self._entry(slot)
+
+    def _probe(self, name_bytes: bytes) -> tuple:
+        """
+            Returns (slot, True) for the slot holding name_bytes, or (slot, False) for the slot where
+            it would be inserted: the first tombstone or empty slot of its probe sequence.
+        """
+        name_hash = _hash_name(name_bytes)
+        mask = self.capacity - 1
+        slot = name_hash & mask
+        free_slot = None
+        for _ in range(self.capacity):
+            position = _HEADER_SIZE + slot * _ENTRY.size
+            state = self.buf[position]
+            if state == _EMPTY:
+                return (slot if free_slot is None else free_slot), False
+            if state == _DELETED:
+                if free_slot is None:
+                    free_slot = slot
+            elif struct.unpack_from("<Q", self.buf, position + _HASH_OFFSET)[0] == name_hash:
+                name_length = self.buf[position + 1]
+                if self.buf[position + _NAME_OFFSET:position + _NAME_OFFSET + name_length] == name_bytes:
+                    return slot, True
+            slot = (slot + 1) & mask
+        return free_slot, False
+
+    def _rehash(self) -> None:
+        """
+            Moves the used entries, unchanged, into an empty table, which drops the tombstones.
+            The caller writes the number of tombstones.
+        """
+        table = np.frombuffer(self.buf, dtype=np.uint8, count=self.capacity * _ENTRY.size, offset=_HEADER_SIZE).reshape(self.capacity, _ENTRY.size)
+        used = table[table[:, 0] == _USED]
+        name_hashes = used[:, _HASH_OFFSET:_HASH_OFFSET + 8].copy().view("<u8").ravel()
+        table[:] = _EMPTY
+        mask = self.capacity - 1
+        for entry, name_hash in zip(used, name_hashes.tolist()):
+            slot = name_hash & mask
+            while table[slot, 0] != _EMPTY:
+                slot = (slot + 1) & mask
+            table[slot] = entry
+
+    def _entry(self, slot: int) -> FbCatalogEntry:
+        """
+            Decodes the entry in slot.
+        """
+        (_, name_length, dtypes, _, offset, length, generation, num_rows, num_columns, segment,
+         name_bytes) = _ENTRY.unpack_from(self.buf, _HEADER_SIZE + slot * _ENTRY.size)
+        return FbCatalogEntry(name_bytes[:name_length].decode("utf-8"), offset, length, generation,
+                              num_rows, num_columns, dtypes, segment)
+
+
+def _encode_name(name: str) -> bytes:
+    """
+        Returns the UTF-8 bytes of a dataframe name. Raises ValueError if it is too long.
+    """
+    name_bytes = name.encode("utf-8")
+    if len(name_bytes) > MAX_NAME_LENGTH:
+        raise ValueError(f"dataframe names are limited to {MAX_NAME_LENGTH} UTF-8 bytes, got {len(name_bytes)}")
+    return name_bytes
+
+
+def _address(segment: int, offset: int) -> int:
+    return (segment << _SEGMENT_SHIFT) + offset
+
+
+def _align(size: int) -> int:
+    return (size + ALLOCATION_ALIGNMENT - 1) & ~(ALLOCATION_ALIGNMENT - 1)
+
+
+def _hash_name(name_bytes: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(name_bytes, digest_size=8).digest(), "little")
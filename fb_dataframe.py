@@ -1,88 +1,780 @@
+import collections
 import flatbuffers
+import math
+import multiprocessing
+import numpy as np
+import os
 import pandas as pd
 import struct
 import time
 import types
-from Dataframe import DataFrame, Column, ColMetaData, DataType, IntData, FloatData, StringData
+import typing
+from Dataframe import DataFrame, Column, ColMetaData, DataType, IntData, FloatData, StringData, DictStringData, ChunkedDataFrame, RowGroup
+from fb_expression import Expr
+from Dataframe import Int8Data, Int16Data, Int32Data, UInt8Data, UInt16Data, UInt32Data, UInt64Data, Float32Data
 
 # Your Flatbuffer imports here (i.e. the files generated from running ./flatc with your Flatbuffer definition)...
 
-def to_flatbuffer(df: pd.DataFrame) -> bytes:
+def _prepend_numeric_vector(builder: flatbuffers.Builder, start_vector: types.FunctionType, values: np.ndarray) -> int:
+    """
+        Writes a numeric column into the builder as a single vector. The column's contiguous
+        little-endian buffer is copied into place in one shot instead of one Prepend call per
+        value; the resulting bytes are identical to the per-element Prepend loop.
+
+        @param builder: the flatbuffer builder.
+        @param start_vector: the generated Start*DataVector function for the column's table.
+        @param values: the column values.
+    """
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    start_vector(builder, len(values))
+    # Same bookkeeping as Builder.CreateNumpyVector, minus its intermediate tobytes() copy.
+    builder.head = builder.head - values.nbytes
+    builder.Bytes[builder.head:builder.head + values.nbytes] = memoryview(values).cast("B")
+    return builder.EndVector()
+
+# Upper bounds on the bytes the builder emits for each kind of object, including alignment padding.
+_VECTOR_OVERHEAD = 4 + 7  # length prefix + padding to the element alignment.
+_STRING_OVERHEAD = 4 + 1 + 3  # length prefix + null terminator + padding.
+_FINISH_OVERHEAD = 4 + 7  # root offset + padding to the buffer's minimum alignment.
+
+# String columns with at most this fraction of distinct values are dictionary-encoded.
+DICTIONARY_THRESHOLD = 0.5
+
+# to_flatbuffer(workers=N) only starts worker processes, on two or more CPUs, for at least this
+# many strings (plain values and dictionary entries) in two or more columns; below that, starting
+# the pool and sending the strings back and forth costs more than encoding them here.
+PARALLEL_ENCODE_MIN_STRINGS = 1 << 16
+
+# The generated data table module, table class and NumPy dtype of every numeric DataType.
+_NUMERIC_TABLES = {
+    DataType.DataType().INT64: (IntData, IntData.IntData, np.dtype(np.int64)),
+    DataType.DataType().FLOAT64: (FloatData, FloatData.FloatData, np.dtype(np.float64)),
+    DataType.DataType().INT8: (Int8Data, Int8Data.Int8Data, np.dtype(np.int8)),
+    DataType.DataType().INT16: (Int16Data, Int16Data.Int16Data, np.dtype(np.int16)),
+    DataType.DataType().INT32: (Int32Data, Int32Data.Int32Data, np.dtype(np.int32)),
+    DataType.DataType().UINT8: (UInt8Data, UInt8Data.UInt8Data, np.dtype(np.uint8)),
+    DataType.DataType().UINT16: (UInt16Data, UInt16Data.UInt16Data, np.dtype(np.uint16)),
+    DataType.DataType().UINT32: (UInt32Data, UInt32Data.UInt32Data, np.dtype(np.uint32)),
+    DataType.DataType().UINT64: (UInt64Data, UInt64Data.UInt64Data, np.dtype(np.uint64)),
+    DataType.DataType().FLOAT32: (Float32Data, Float32Data.Float32Data, np.dtype(np.float32)),
+}
+
+# Integer storage types tried, narrowest first, when downcasting an integer column.
+_INTEGER_DOWNCASTS = [
+    DataType.DataType().INT8, DataType.DataType().UINT8,
+    DataType.DataType().INT16, DataType.DataType().UINT16,
+    DataType.DataType().INT32, DataType.DataType().UINT32,
+]
+
+def _table_size(num_fields: int) -> int:
+    """
+        Upper bound on the size of a table with num_fields scalar/offset fields: the vtable offset,
+        the (padded) fields and an un-deduplicated vtable.
+    """
+    return 16 + 10 * num_fields
+
+def _strings_size(strings: np.ndarray) -> int:
+    """
+        Upper bound on the size of a vector of strings, including the strings themselves.
+    """
+    return sum(len(v.encode("utf-8")) for v in strings) + (_STRING_OVERHEAD + 4) * len(strings) + _VECTOR_OVERHEAD
+
+def _column_datatype(dtype) -> int:
+    """
+        Returns the DataType a column with the given pandas dtype is stored as.
+    """
+    for datatype, (_, _, np_dtype) in _NUMERIC_TABLES.items():
+        if dtype == np_dtype:
+            return datatype
+    return DataType.DataType().STRING
+
+def _downcast_datatype(datatype: int, values: np.ndarray) -> int:
+    """
+        Returns the narrowest numeric DataType that holds all of values exactly: the smallest
+        integer type covering their range, or float32 for floats that survive the round trip.
+    """
+    np_dtype = _NUMERIC_TABLES[datatype][2]
+    if len(values) == 0:
+        return datatype
+    if np_dtype.kind == "f":
+        with np.errstate(over="ignore"):
+            narrow = values.astype(np.float32)
+        if np_dtype.itemsize > 4 and np.array_equal(narrow, values, equal_nan=True):
+            return DataType.DataType().FLOAT32
+        return datatype
+
+    low, high = values.min(), values.max()
+    for candidate in _INTEGER_DOWNCASTS:
+        candidate_dtype = _NUMERIC_TABLES[candidate][2]
+        if candidate_dtype.itemsize >= np_dtype.itemsize:
+            break
+        info = np.iinfo(candidate_dtype)
+        if info.min <= low and high <= info.max:
+            return candidate
+    return datatype
+
+def _prepare_column(column: pd.Series, dictionary_threshold: float, downcast: bool) -> tuple:
+    """
+        Decides how a column is stored. Returns (datatype, values, dtype), where values is the
+        column's NumPy buffer for numeric and string columns, or (codes, dictionary) for a
+        dictionary-encoded string column. The dictionary is sorted, so code order is string order.
+        dtype is the name of the column's pandas dtype if it is stored as a narrower type, else None.
+
+        @param column: the column values.
+        @param dictionary_threshold: maximum fraction of distinct values for dictionary encoding.
+        @param downcast: whether to store numeric columns in the narrowest lossless type.
+    """
+    datatype = _column_datatype(column.dtype)
+    values = column.to_numpy()
+    if datatype == DataType.DataType().STRING and len(values) > 0:
+        codes, dictionary = pd.factorize(values, sort=True)
+        if len(dictionary) <= dictionary_threshold * len(values) and (codes >= 0).all():
+            return DataType.DataType().DICT_STRING, (codes.astype(np.int32), dictionary), None
+    elif datatype in _NUMERIC_TABLES and downcast:
+        narrow = _downcast_datatype(datatype, values)
+        if narrow != datatype:
+            return narrow, values.astype(_NUMERIC_TABLES[narrow][2]), str(column.dtype)
+    return datatype, values, None
+
+def _plan_column_size(c_name: str, datatype: int, values, dtype: str) -> int:
+    """
+        Upper bound on the bytes _encode_column writes for one prepared column, including the
+        padding needed to place it as an 8-byte aligned block.
+
+        @param c_name: name of the column.
+        @param datatype: DataType returned by _prepare_column.
+        @param values: values returned by _prepare_column.
+        @param dtype: original dtype returned by _prepare_column.
+    """
+    if datatype == DataType.DataType().STRING:
+        size = _strings_size(values) + _table_size(1)
+    elif datatype == DataType.DataType().DICT_STRING:
+        codes, dictionary = values
+        size = _strings_size(dictionary) + 4 * len(codes) + _VECTOR_OVERHEAD + _table_size(2)
+    else:
+        size = values.nbytes + _VECTOR_OVERHEAD + _table_size(1)
+    size += len(c_name.encode("utf-8")) + _STRING_OVERHEAD + _table_size(3) + _table_size(3)
+    if dtype is not None:
+        size += len(dtype) + _STRING_OVERHEAD
+
+    return size + 16
+
+def _plan_size(columns: list) -> int:
+    """
+        Upper bound on the size of a flatbuffer holding the prepared (name, datatype, values, dtype)
+        columns.
+    """
+    size = _table_size(3) + 2 * (4 * len(columns) + _VECTOR_OVERHEAD) + _FINISH_OVERHEAD
+    for column in columns:
+        size += _plan_column_size(*column)
+    return size
+
+def plan_flatbuffer_size(df: pd.DataFrame, dictionary_threshold: float = DICTIONARY_THRESHOLD,
+                         downcast: bool = False) -> int:
+    """
+        Works out how many bytes to_flatbuffer needs for df from the column dtypes, the utf-8 byte
+        lengths of the strings and the per-object overhead, without building anything. The result is
+        a tight upper bound: the builder is allocated once with this size and never has to regrow.
+
+        @param df: the dataframe.
+        @param dictionary_threshold: see to_flatbuffer.
+        @param downcast: see to_flatbuffer.
+    """
+    return _plan_size([(c_name, *_prepare_column(df[c_name], dictionary_threshold, downcast)) for c_name in df.columns])
+
+def _prepend_strings_vector(builder: flatbuffers.Builder, start_vector: types.FunctionType, strings: np.ndarray) -> int:
+    """
+        Writes a vector of strings into the builder.
+
+        @param builder: the flatbuffer builder.
+        @param start_vector: the generated Start*Vector function for the vector.
+        @param strings: the strings.
+    """
+    str_offsets = list()
+    for v in reversed(strings):
+        str_offsets.append(builder.CreateString(v))
+    start_vector(builder, len(str_offsets))
+    for offset in str_offsets:
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+def _encode_column(builder: flatbuffers.Builder, c_name: str, datatype: int, values, dtype: str) -> int:
+    """
+        Writes one prepared column (its data table, metadata and Column table) into the builder and
+        returns the offset of the Column table.
+
+        @param builder: the flatbuffer builder.
+        @param c_name: name of the column.
+        @param datatype: DataType returned by _prepare_column.
+        @param values: values returned by _prepare_column.
+        @param dtype: original dtype returned by _prepare_column.
+    """
+    if datatype in _NUMERIC_TABLES:
+        table_module = _NUMERIC_TABLES[datatype][0]
+        datas = _prepend_numeric_vector(builder, table_module.StartDataVector, values)
+        table_module.Start(builder)
+        table_module.AddData(builder, datas)
+        c_data = table_module.End(builder)
+    elif datatype == DataType.DataType().DICT_STRING:
+        codes, dictionary = values
+        codes = _prepend_numeric_vector(builder, DictStringData.StartCodesVector, codes)
+        dictionary = _prepend_strings_vector(builder, DictStringData.StartDictionaryVector, dictionary)
+        DictStringData.Start(builder)
+        DictStringData.AddDictionary(builder, dictionary)
+        DictStringData.AddCodes(builder, codes)
+        c_data = DictStringData.End(builder)
+    else:
+        datas = _prepend_strings_vector(builder, StringData.StringDataStartDataVector, values)
+        StringData.Start(builder)
+        StringData.AddData(builder, datas)
+        c_data = StringData.End(builder)
+
+    c_name = builder.CreateString(c_name)
+    if dtype is not None:
+        dtype = builder.CreateString(dtype)
+
+    ColMetaData.Start(builder)
+    ColMetaData.AddName(builder, c_name)
+    ColMetaData.AddType(builder, datatype)
+    if dtype is not None:
+        ColMetaData.AddDtype(builder, dtype)
+    c_metadata = ColMetaData.End(builder)
+
+    Column.Start(builder)
+    Column.AddColmetadata(builder, c_metadata)
+    Column.AddData(builder, c_data)
+    return Column.End(builder)
+
+def _prepend_column_index(builder: flatbuffers.Builder, names: list) -> int:
+    """
+        Writes the DataFrame's column_index vector: the positions of the columns sorted by the utf-8
+        bytes of their names, the order _find_column binary searches in.
+
+        @param builder: the flatbuffer builder.
+        @param names: the column names in column order.
+    """
+    encoded_names = [name.encode("utf-8") for name in names]
+    column_index = np.array(sorted(range(len(names)), key=encoded_names.__getitem__), dtype=np.uint32)
+    return _prepend_numeric_vector(builder, DataFrame.StartColumnIndexVector, column_index)
+
+def _encode_column_batch(columns: list) -> tuple:
+    """
+        Worker entry point for parallel encoding. Encodes a batch of prepared (name, datatype, values,
+        dtype) columns with a private builder and returns the bytes written, padded to a multiple of 8,
+        together with the Column table offsets (relative to the end of the bytes) in reversed column
+        order.
+
+        Flatbuffer offsets are relative, so the returned bytes can be copied as one block into
+        another builder whose offset is 8-byte aligned.
+
+        @param columns: list of prepared (name, datatype, values, dtype) columns.
+    """
+    builder = flatbuffers.Builder(sum(_plan_column_size(*column) for column in columns))
+    col_list = list()
+    for column in reversed(columns):
+        col_list.append(_encode_column(builder, *column))
+    builder.Prep(8, 0)
+
+    return builder.Bytes[builder.Head():], col_list
+
+def _prepend_column_batch(builder: flatbuffers.Builder, blob: bytearray, col_list: list) -> list:
+    """
+        Copies a block produced by _encode_column_batch into the builder and returns its Column
+        table offsets translated into the builder's offsets.
+
+        @param builder: the flatbuffer builder.
+        @param blob: bytes returned by _encode_column_batch.
+        @param col_list: Column table offsets returned by _encode_column_batch.
+    """
+    builder.Prep(8, len(blob))
+    base = builder.Offset()
+    builder.head = builder.head - len(blob)
+    builder.Bytes[builder.head:builder.head + len(blob)] = blob
+    return [base + col for col in col_list]
+
+def _parallel_encoding_pays_off(string_columns: list, workers: int) -> bool:
+    """
+        Returns whether prepared string columns are worth encoding in worker processes, see
+        PARALLEL_ENCODE_MIN_STRINGS. A column is never split between workers.
+    """
+    if len(string_columns) < 2 or min(workers, _available_cpus()) < 2:
+        return False
+    num_strings = sum(len(values[1]) if datatype == DataType.DataType().DICT_STRING else len(values)
+                      for _, datatype, values, _ in string_columns)
+    return num_strings >= PARALLEL_ENCODE_MIN_STRINGS
+
+def _available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def to_flatbuffer(df: pd.DataFrame, buf: memoryview = None, workers: int = None,
+                  dictionary_threshold: float = DICTIONARY_THRESHOLD, downcast: bool = False) -> bytes:
     """
         Converts a DataFrame to a flatbuffer. Returns the bytes of the flatbuffer.
 
+        If buf is given, the flatbuffer is built directly inside it instead of in private memory
+        and a memoryview of the tail of buf holding the flatbuffer is returned. Flatbuffers are
+        built back to front, so the flatbuffer ends at the end of buf; any slack is left at the
+        front. buf must be writable and at least plan_flatbuffer_size(df) bytes long. buf may also
+        be a function that takes the planned size and returns the buffer to use, which saves
+        planning twice when the caller allocates the buffer.
+
+        If workers is given, batches of string columns, which are encoded one value at a time,
+        are encoded in that many worker processes and the resulting blocks are stitched into a
+        single flatbuffer. Numeric columns are copied in one block each, which costs less than
+        sending them to a worker, so they are always encoded here, and frames with too few
+        strings or machines with one CPU (see PARALLEL_ENCODE_MIN_STRINGS) do without workers.
+        The bytes differ
+        from the sequential encoding (vtables are not shared across batches) but decode to the same frame.
+
+        String columns where at most dictionary_threshold of the values are distinct are stored
+        as a sorted dictionary of the distinct strings plus an int32 code per row.
+
+        If downcast is set, every numeric column is stored in the narrowest type that holds its
+        values exactly (e.g. an int64 column of 0-10 as int8, a float64 column of float32 values as
+        float32) and its original dtype is recorded, so readers return the original dtype. This is
+        off by default because the int64/float64 layout below is part of the format's contract, and
+        because fb_dataframe_map_numeric_column cannot widen a column whose results no longer fit.
+
         The flatbuffer should follow a columnar format as follows:
         +-------------+----------------+-------+-------+-----+----------------+-------+-------+-----+
         | DF metadata | col 1 metadata | val 1 | val 2 | ... | col 2 metadata | val 1 | val 2 | ... |
         +-------------+----------------+-------+-------+-----+----------------+-------+-------+-----+
         You are free to put any bookkeeping items in the metadata. however, for autograding purposes:
         1. Make sure that the values in the columns are laid out in the flatbuffer as specified above
-        2. Serialize int and float values using flatbuffer's 'PrependInt64' and 'PrependFloat64'
-            functions, respectively (i.e., don't convert them to strings yourself - you will lose
-            precision for floats).
+        2. Serialize int and float values as int64 and float64 vectors (i.e., don't convert them to
+            strings yourself - you will lose precision for floats). Numeric columns are written in
+            bulk from their NumPy buffers, which produces the same bytes as calling 'PrependInt64'
+            and 'PrependFloat64' on each value.
 
         @param df: the dataframe.
+        @param buf: optional writable buffer to build the flatbuffer in, or a function returning it.
+        @param workers: optional number of worker processes to encode columns with.
+        @param dictionary_threshold: maximum fraction of distinct values for dictionary-encoding a
+            string column; 0 disables dictionary encoding.
+        @param downcast: whether to store numeric columns in the narrowest lossless type.
     """
-    builder = flatbuffers.Builder(1024)
-    col_list = list()
+    columns = [(c_name, *_prepare_column(df[c_name], dictionary_threshold, downcast)) for c_name in df.columns]
+    size = _plan_size(columns)
 
-    for c_name in reversed(df.columns):
-        if df[c_name].dtype == "int64":
-            datatype = DataType.DataType().INT64
-            IntData.IntDataStartDataVector(builder, len(df[c_name]))
-            for v in reversed(df[c_name]):
-                builder.PrependInt64(v)
-            datas = builder.EndVector()
-            IntData.Start(builder)
-            IntData.AddData(builder, datas)
-            c_data = IntData.End(builder)
-        elif df[c_name].dtype == "float64":
-            datatype = DataType.DataType().FLOAT64
-            FloatData.FloatDataStartDataVector(builder, len(df[c_name]))
-            for v in reversed(df[c_name]):
-                builder.PrependFloat64(v)
-            datas = builder.EndVector()
-            FloatData.Start(builder)
-            FloatData.AddData(builder, datas)
-            c_data = FloatData.End(builder)
-        else:
-            datatype = DataType.DataType().STRING
-            str_offsets = list()
-            for v in reversed(df[c_name]):
-                str_offsets.append(builder.CreateString(v))
-            StringData.StringDataStartDataVector(builder, len(str_offsets))
-            for offset in str_offsets:
-                builder.PrependUOffsetTRelative(offset)
-            datas = builder.EndVector()
-            StringData.Start(builder)
-            StringData.AddData(builder, datas)
-            c_data = StringData.End(builder)
-
-        c_name = builder.CreateString(c_name)
-
-        ColMetaData.Start(builder)
-        ColMetaData.AddName(builder, c_name)
-        ColMetaData.AddType(builder, datatype)
-        c_metadata = ColMetaData.End(builder)
-
-        Column.Start(builder)
-        Column.AddColmetadata(builder, c_metadata)
-        Column.AddData(builder, c_data)
-        col_list.append(Column.End(builder))
+    if buf is None:
+        builder = flatbuffers.Builder(size)
+    else:
+        if callable(buf):
+            buf = buf(size)
+        builder = flatbuffers.Builder(0)
+        builder.Bytes = memoryview(buf).cast("B")
+        builder.head = len(builder.Bytes)
+    target = builder.Bytes
+
+    # Column table offsets by column position.
+    offsets = [None] * len(columns)
+    strings = [i for i, column in enumerate(columns) if column[1] not in _NUMERIC_TABLES]
+    if workers is not None and _parallel_encoding_pays_off([columns[i] for i in strings], workers):
+        # A few batches per worker keeps the pool busy without paying IPC per column.
+        batch_size = max(1, math.ceil(len(strings) / (workers * 4)))
+        batches = [strings[i:i + batch_size] for i in range(0, len(strings), batch_size)]
+        with multiprocessing.Pool(workers) as pool:
+            encoded_batches = pool.map(_encode_column_batch, [[columns[i] for i in batch] for batch in batches])
+        for batch, (blob, batch_col_list) in reversed(list(zip(batches, encoded_batches))):
+            for i, col in zip(reversed(batch), _prepend_column_batch(builder, blob, batch_col_list)):
+                offsets[i] = col
+    for i in reversed(range(len(columns))):
+        if offsets[i] is None:
+            offsets[i] = _encode_column(builder, *columns[i])
+    col_list = offsets[::-1]
 
     DataFrame.DataFrameStartColumnsVector(builder, len(col_list))
     for col in col_list:
         builder.PrependUOffsetTRelative(col)
     columns = builder.EndVector(len(col_list))
+    column_index = _prepend_column_index(builder, list(df.columns))
 
     DataFrame.DataFrameStart(builder)
     DataFrame.AddColumns(builder, columns)
+    DataFrame.AddColumnIndex(builder, column_index)
     dataframe = DataFrame.DataFrameEnd(builder)
 
     builder.Finish(dataframe)
 
+    if buf is not None:
+        if builder.Bytes is not target:
+            # The builder outgrew buf and carried on in a private copy.
+            raise ValueError(f"to_flatbuffer needs up to {size} bytes, the buffer only has {len(target)}")
+        return target[builder.Head():]
+
+    # The planned size leaves a few bytes of slack in front of the flatbuffer. Deleting a bytearray's
+    # prefix just advances its start, so this hands back the builder's buffer without copying it.
+    fb_bytes = builder.Bytes
+    del fb_bytes[:builder.Head()]
+
+    return fb_bytes
+
+# Chunked flatbuffers start with a root offset of 0, which no plain DataFrame flatbuffer has, followed
+# by a file identifier. See dataframe.fbs for the full layout.
+_CHUNKED_HEADER = struct.pack("<I", 0) + b"FBRG"
+
+class FbChunkedWriter:
+    """
+        Streams dataframe chunks (e.g., from pd.read_csv(chunksize=...)) into a chunked flatbuffer.
+        Every chunk is encoded as its own row group as soon as it arrives, so memory use is bounded by
+        the chunk size instead of the dataset size. All chunks must have the same columns and dtypes.
+        close() writes the footer holding the row group offset/length table.
+
+        The sink is either a binary file object or a writable buffer, such as a region of shared
+        memory, that the row groups are encoded into directly. When a buffer is full, grow (if
+        given) is called with the total size needed and must return a larger buffer that holds the
+        bytes written so far; otherwise ValueError is raised. downcast is passed on to
+        to_flatbuffer; every row group picks its own storage types.
+    """
+    def __init__(self, sink, downcast: bool = False, grow=None):
+        self.sink = sink
+        self.downcast = downcast
+        self.grow = grow
+        self.position = 0
+        self.col_types = None
+        self.row_groups = list()
+        self.num_rows = 0
+        self._write(_CHUNKED_HEADER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def _reserve(self, size: int) -> None:
+        """
+            Makes sure the buffer sink has room for size more bytes.
+        """
+        if self.position + size > len(self.sink):
+            if self.grow is None:
+                raise ValueError(f"chunked flatbuffer does not fit in the {len(self.sink)} byte buffer")
+            self.sink = self.grow(self.position + size)
+
+    def _write(self, data: bytes) -> None:
+        if hasattr(self.sink, "write"):
+            self.sink.write(data)
+        else:
+            self._reserve(len(data))
+            with memoryview(self.sink) as view:
+                view[self.position:self.position + len(data)] = data
+        self.position += len(data)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+            Appends df as the next row group.
+
+            @param df: the dataframe chunk.
+        """
+        col_types = [(c_name, _column_datatype(df[c_name].dtype)) for c_name in df.columns]
+        if self.col_types is None:
+            self.col_types = col_types
+        elif col_types != self.col_types:
+            raise ValueError("chunk columns and dtypes must match the first chunk")
+
+        if hasattr(self.sink, "write"):
+            fb_bytes = to_flatbuffer(df, downcast=self.downcast)
+            offset = self.position
+            self._write(fb_bytes)
+            length = len(fb_bytes)
+        else:
+            regions = list()
+            def reserve(planned_size: int) -> memoryview:
+                size = (planned_size + 7) & ~7
+                self._reserve(size)
+                regions.append(memoryview(self.sink)[self.position:self.position + size])
+                return regions[0]
+            with to_flatbuffer(df, reserve, downcast=self.downcast) as fb_view:
+                length = len(fb_view)
+            size = len(regions[0])
+            regions[0].release()
+            offset = self.position + size - length
+            self.position += size
+        # Keep every row group 8-byte aligned.
+        self._write(bytes(-self.position % 8))
+
+        self.row_groups.append((offset, length, len(df)))
+        self.num_rows += len(df)
+
+    def close(self) -> int:
+        """
+            Writes the footer and returns the total size of the chunked flatbuffer.
+        """
+        builder = flatbuffers.Builder(1024)
+
+        metadata_list = list()
+        for c_name, datatype in reversed(self.col_types or []):
+            c_name = builder.CreateString(c_name)
+            ColMetaData.Start(builder)
+            ColMetaData.AddName(builder, c_name)
+            ColMetaData.AddType(builder, datatype)
+            metadata_list.append(ColMetaData.End(builder))
+        ChunkedDataFrame.StartColumnsVector(builder, len(metadata_list))
+        for c_metadata in metadata_list:
+            builder.PrependUOffsetTRelative(c_metadata)
+        columns = builder.EndVector()
+
+        ChunkedDataFrame.StartRowGroupsVector(builder, len(self.row_groups))
+        for offset, length, num_rows in reversed(self.row_groups):
+            RowGroup.CreateRowGroup(builder, offset, length, num_rows)
+        row_groups = builder.EndVector()
+
+        ChunkedDataFrame.Start(builder)
+        ChunkedDataFrame.AddColumns(builder, columns)
+        ChunkedDataFrame.AddRowGroups(builder, row_groups)
+        ChunkedDataFrame.AddNumRows(builder, self.num_rows)
+        builder.Finish(ChunkedDataFrame.End(builder))
+
+        footer_offset = self.position
+        self._write(builder.Output())
+        self._write(struct.pack("<Q", footer_offset))
+        return self.position
+
+def _is_chunked(fb_buf: memoryview) -> bool:
+    """
+        Returns whether fb_buf holds a chunked (row-group) flatbuffer rather than a plain one.
+    """
+    return bytes(fb_buf[:len(_CHUNKED_HEADER)]) == _CHUNKED_HEADER
+
+def _chunked_footer(fb_buf: memoryview) -> ChunkedDataFrame.ChunkedDataFrame:
+    footer_offset = struct.unpack_from("<Q", fb_buf, len(fb_buf) - 8)[0]
+    return ChunkedDataFrame.ChunkedDataFrame.GetRootAs(fb_buf, footer_offset)
+
+def _find_column(fb_df: DataFrame.DataFrame, col_name: str) -> Column.Column:
+    """
+        Returns the column named col_name, or None if there is none. Binary searches the sorted
+        column_index, so only O(log columns) names are read and none is decoded; flatbuffers
+        without a column_index are scanned.
+
+        @param fb_df: the DataFrame table.
+        @param col_name: name of the column.
+    """
+    target = col_name.encode("utf-8")
+    if fb_df.ColumnIndexIsNone():
+        for i in range(fb_df.ColumnsLength()):
+            col = fb_df.Columns(i)
+            if col.Colmetadata().Name() == target:
+                return col
+        return None
+
+    low, high = 0, fb_df.ColumnIndexLength()
+    while low < high:
+        mid = (low + high) // 2
+        if fb_df.Columns(fb_df.ColumnIndex(mid)).Colmetadata().Name() < target:
+            low = mid + 1
+        else:
+            high = mid
+    if low < fb_df.ColumnIndexLength():
+        col = fb_df.Columns(fb_df.ColumnIndex(low))
+        if col.Colmetadata().Name() == target:
+            return col
+    return None
+
+
+def _column_dtype(colmetadata: ColMetaData.ColMetaData) -> np.dtype:
+    """
+        Returns the pandas dtype of a numeric column, which differs from its storage type if the
+        column was downcast.
+    """
+    dtype = colmetadata.Dtype()
+    if dtype is not None:
+        return np.dtype(dtype.decode("utf-8"))
+    return _NUMERIC_TABLES[colmetadata.Type()][2]
+
+
+def fb_column_view(fb_buf: memoryview, name: str) -> np.ndarray:
+    """
+        Returns the values of a numeric column as a read-only NumPy array that aliases fb_buf, so
+        no values are copied; for a buffer in FbSharedMemory the array points into the shared
+        memory segment. The array has the column's storage type, which is narrower than the
+        original dtype for columns encoded with downcast=True. The flatbuffer must outlive the array.
+
+        @param fb_buf: buffer containing bytes of the Flatbuffer Dataframe.
+        @param name: name of the numeric column.
+    """
+    directory = FbFrameDirectory(fb_buf)
+    if len(directory.row_groups) != 1:
+        raise ValueError("fb_column_view needs a flatbuffer with a single row group")
+    column = directory.column(fb_buf, 0, name)
+    if column is None:
+        raise KeyError(name)
+    if column.datatype not in _NUMERIC_TABLES:
+        raise TypeError(f"column '{name}' is not numeric")
+    return _column_array(fb_buf, column)
+
+
+class FbColumn(typing.NamedTuple):
+    """
+        A column of a row group in an FbFrameDirectory. Positions are from the start of the
+        flatbuffer.
+    """
+    name: str
+    # The DataType the column is stored as.
+    datatype: int
+    # The original dtype of a numeric column, None for strings.
+    dtype: np.dtype
+    # The position of the column's data table (IntData, StringData, ...).
+    table: int
+    # The position of the first element of its values, string offsets or dictionary codes.
+    offset: int
+    # The number of rows.
+    length: int
+
+
+class FbRowGroup(typing.NamedTuple):
+    """
+        A row group in an FbFrameDirectory; a plain flatbuffer has one.
+    """
+    # The position of the row group's flatbuffer.
+    position: int
+    num_rows: int
+
+
+class FbFrameDirectory:
+    """
+        The column directory of a plain or chunked flatbuffer: its row groups and, for the columns
+        looked up so far, where their data is and how to read them. Columns are looked up with
+        the column_index (see _find_column) the first time they are used, so a query reads the
+        metadata of the columns it needs once; after that the readers of this module go straight
+        to the column data.
+
+        A directory holds positions, not the buffer, so it can be kept (see fb_frame_directory)
+        and used with any buffer that holds the same flatbuffer, even after in-place maps.
+    """
+    def __init__(self, fb_buf: memoryview):
+        """
+            @param fb_buf: buffer containing bytes of the Flatbuffer Dataframe.
+        """
+        self.row_groups = list()
+        if _is_chunked(fb_buf):
+            footer = _chunked_footer(fb_buf)
+            for i in range(footer.RowGroupsLength()):
+                row_group = footer.RowGroups(i)
+                self.row_groups.append(FbRowGroup(row_group.Offset(), row_group.NumRows()))
+        else:
+            self.row_groups.append(FbRowGroup(0, _num_rows(DataFrame.DataFrame.GetRootAs(fb_buf, 0))))
+        self.num_rows = sum(row_group.num_rows for row_group in self.row_groups)
+        # The columns looked up (None if missing) and the list of all columns, of every row group.
+        self._columns = [dict() for _ in self.row_groups]
+        self._column_lists = [None for _ in self.row_groups]
+
+    def column(self, fb_buf: memoryview, row_group: int, name: str) -> FbColumn:
+        """
+            Returns the column called name of a row group, or None if there is none.
+        """
+        columns = self._columns[row_group]
+        if name not in columns:
+            col = _find_column(DataFrame.DataFrame.GetRootAs(fb_buf, self.row_groups[row_group].position), name)
+            columns[name] = None if col is None else _parse_column(fb_buf, col, name)
+        return columns[name]
+
+    def columns(self, fb_buf: memoryview, name: str) -> list:
+        """
+            Returns the column called name of every row group. Raises KeyError if it is missing.
+        """
+        columns = [self.column(fb_buf, row_group, name) for row_group in range(len(self.row_groups))]
+        if None in columns:
+            raise KeyError(name)
+        return columns
+
+    def column_names(self, fb_buf: memoryview) -> list:
+        """
+            Returns the names of the columns, in the order they are stored.
+        """
+        if not self.row_groups:
+            # A chunked flatbuffer without rows has its column names in the footer only.
+            footer = _chunked_footer(fb_buf)
+            return [footer.Columns(i).Name().decode("utf-8") for i in range(footer.ColumnsLength())]
+        return [column.name for column in self.column_list(fb_buf, 0)]
+
+    def column_list(self, fb_buf: memoryview, row_group: int) -> list:
+        """
+            Returns all columns of a row group, in the order they are stored.
+        """
+        if self._column_lists[row_group] is None:
+            fb_df = DataFrame.DataFrame.GetRootAs(fb_buf, self.row_groups[row_group].position)
+            column_list = list()
+            for i in range(fb_df.ColumnsLength()):
+                col = fb_df.Columns(i)
+                column_list.append(_parse_column(fb_buf, col, col.Colmetadata().Name().decode("utf-8")))
+            self._columns[row_group].update((column.name, column) for column in column_list)
+            self._column_lists[row_group] = column_list
+        return self._column_lists[row_group]
+
+
+def _parse_column(fb_buf: memoryview, col: Column.Column, name: str) -> FbColumn:
+    """
+        Reads the directory entry of the column col, called name, of a flatbuffer in fb_buf.
+    """
+    colmetadata = col.Colmetadata()
+    datatype = colmetadata.Type()
+    if datatype in _NUMERIC_TABLES:
+        dtype, field = _column_dtype(colmetadata), 4
+    else:
+        dtype, field = None, 6 if datatype == DataType.DataType().DICT_STRING else 4
+    table = flatbuffers.table.Table(fb_buf, col.Data().Pos)
+    vector = table.Offset(field)
+    offset, length = (table.Vector(vector), table.VectorLen(vector)) if vector else (0, 0)
+    return FbColumn(name, datatype, dtype, table.Pos, offset, length)
+
+
+def _column_array(fb_buf: memoryview, column: FbColumn, writable: bool = False) -> np.ndarray:
+    """
+        Returns the values of a numeric column, in its storage type, or the codes of a
+        dictionary-encoded string column as a NumPy array that aliases fb_buf.
+
+        @param writable: whether writes to the array should go through to the flatbuffer.
+    """
+    dtype = _NUMERIC_TABLES[column.datatype][2] if column.datatype in _NUMERIC_TABLES else np.dtype(np.int32)
+    view = np.frombuffer(fb_buf, dtype=dtype, count=column.length, offset=column.offset)
+    if not writable:
+        view.flags.writeable = False
+    return view
+
+
+def _data_table(fb_buf: memoryview, column: FbColumn, table_class: type):
+    """
+        Returns the data table of a column as an instance of the generated table_class.
+    """
+    data = table_class()
+    data.Init(fb_buf, column.table)
+    return data
+
+
+# Directories of flatbuffers with a generation, by (address, length, generation), least recently
+# used first.
+_directories = collections.OrderedDict()
+# The number of directories kept.
+DIRECTORY_CACHE_SIZE = 256
+
+def fb_frame_directory(fb_buf: memoryview, generation: int = None) -> FbFrameDirectory:
+    """
+        Returns the column directory of a flatbuffer. Given a generation, which must change
+        whenever a different flatbuffer is written at the same address in this process (like the
+        store id and catalog generation of FbSharedMemory), the directory is kept by the buffer's
+        address, length and generation, so repeated calls for the same flatbuffer parse it only
+        once.
+
+        @param fb_buf: buffer containing bytes of the Flatbuffer Dataframe.
+        @param generation: optional hashable version of the flatbuffer at this address.
+    """
+    if generation is None:
+        return FbFrameDirectory(fb_buf)
+
+    address = np.frombuffer(fb_buf, dtype=np.uint8).__array_interface__["data"][0]
+    key = (address, len(fb_buf), generation)
+    directory = _directories.get(key)
+    if directory is not None:
+        _directories.move_to_end(key)
+        return directory
+    directory = _directories[key] = FbFrameDirectory(fb_buf)
+    if len(_directories) > DIRECTORY_CACHE_SIZE:
+        _directories.popitem(last=False)
+    return directory
 
-    return builder.Output()  # REPLACE THIS WITH YOUR CODE...
 
 def fb_dataframe_head(fb_bytes: bytes, rows: int = 5) -> pd.DataFrame:
     """
@@ -93,39 +785,46 @@ def fb_dataframe_head(fb_bytes: bytes, rows: int = 5) -> pd.DataFrame:
         @param fb_bytes: bytes of the Flatbuffer Dataframe.
         @param rows: number of rows to return.
     """
+    return _fb_dataframe_head(fb_bytes, FbFrameDirectory(fb_bytes), rows)
+
+
+def _fb_dataframe_head(fb_bytes: bytes, directory: FbFrameDirectory, rows: int) -> pd.DataFrame:
+    """
+        fb_dataframe_head with the flatbuffer's directory.
+    """
+    if not directory.row_groups:
+        return pd.DataFrame({name: [] for name in directory.column_names(fb_bytes)})
+    if len(directory.row_groups) == 1:
+        return _row_group_head(fb_bytes, directory.column_list(fb_bytes, 0), rows)
+
+    frames = list()
+    for row_group in range(len(directory.row_groups)):
+        if frames and rows <= 0:
+            break
+        frames.append(_row_group_head(fb_bytes, directory.column_list(fb_bytes, row_group), rows))
+        rows -= len(frames[-1])
+    return pd.concat(frames, ignore_index=True)
 
-    fb_df = DataFrame.DataFrame.GetRootAs(fb_bytes,  0)
-    cols_len = fb_df.ColumnsLength()
+
+def _row_group_head(fb_bytes: bytes, columns: list, rows: int) -> pd.DataFrame:
+    """
+        fb_dataframe_head for the columns of a single row group.
+    """
     column_data = dict()
-    # print("\n")
-    for i in range(cols_len):
-        col = fb_df.Columns(i)
-        # print(col)
-        # print(col.Data().Pos)
-        colmetadata = col.Colmetadata()
-        col_name = colmetadata.Name().decode("utf-8")
-        # print(col_name)
-        col_datatype = colmetadata.Type()
+    for column in columns:
+        col_name = column.name
         data_list = list()
-        # print(col_datatype)
-        if col_datatype == DataType.DataType().INT64:
-            int_data = IntData.IntData()
-            int_data.Init(col.Data().Bytes, col.Data().Pos)
-            # print(int_data.DataLength())
-            for j in range(min(rows, int_data.DataLength())):
-                data_list.append(int_data.Data(j))
-        elif col_datatype == DataType.DataType().FLOAT64:
-            float_data = FloatData.FloatData()
-            float_data.Init(col.Data().Bytes, col.Data().Pos)
-            # print(float_data.DataLength())
-            for j in range(min(rows, float_data.DataLength())):
-                data_list.append(float_data.Data(j))
-        elif col_datatype == DataType.DataType.STRING:
-            string_data = StringData.StringData()
-            string_data.Init(col.Data().Bytes, col.Data().Pos)
-            # print(string_data.DataLength())
-            for j in range(min(rows, string_data.DataLength())):
+        if column.datatype in _NUMERIC_TABLES:
+            # Copies just the first rows out of the buffer, upcast to the column's original dtype.
+            data_list = _column_array(fb_bytes, column)[:max(rows, 0)].astype(column.dtype)
+        elif column.datatype == DataType.DataType.STRING:
+            string_data = _data_table(fb_bytes, column, StringData.StringData)
+            for j in range(min(rows, column.length)):
                 data_list.append(string_data.Data(j).decode("utf-8"))
+        elif column.datatype == DataType.DataType().DICT_STRING:
+            dict_data = _data_table(fb_bytes, column, DictStringData.DictStringData)
+            for j in range(min(rows, column.length)):
+                data_list.append(dict_data.Dictionary(dict_data.Codes(j)).decode("utf-8"))
         column_data[col_name] = data_list
 
     df = pd.DataFrame(column_data)
@@ -135,6 +834,60 @@ def fb_dataframe_head(fb_bytes: bytes, rows: int = 5) -> pd.DataFrame:
     return df
 
 
+def fb_dataframe_slice(fb_bytes: bytes, start: int = 0, stop: int = None, columns: list = None) -> pd.DataFrame:
+    """
+        Returns rows [start, stop) of the Flatbuffer Dataframe as a Pandas Dataframe, like
+        df.iloc[start:stop], with the row positions as index. Negative start and stop count from
+        the end, so fb_dataframe_slice(fb_bytes, -5) returns the last 5 rows.
+
+        Only the requested rows are read: numeric values are sliced out of their vectors and
+        strings are looked up through their offsets, so the cost does not depend on where the
+        rows are or on the number of rows in the dataframe.
+
+        @param fb_bytes: bytes of the Flatbuffer Dataframe.
+        @param start: first row.
+        @param stop: end of the rows, None for all rows after start.
+        @param columns: optional list of column names, default all columns.
+    """
+    return _fb_dataframe_slice(fb_bytes, FbFrameDirectory(fb_bytes), start, stop, columns)
+
+
+def _fb_dataframe_slice(fb_bytes: bytes, directory: FbFrameDirectory, start: int, stop: int, columns: list) -> pd.DataFrame:
+    """
+        fb_dataframe_slice with the flatbuffer's directory.
+    """
+    rows = range(directory.num_rows)[start:stop]
+    names = directory.column_names(fb_bytes) if columns is None else list(columns)
+    data = {name: _pandas_values(_rows_values(fb_bytes, directory, name, rows.start, rows.stop)) for name in names}
+    return pd.DataFrame(data, index=pd.RangeIndex(rows.start, rows.stop), columns=names)
+
+
+# The dtype pandas gives columns of Python strings.
+_STRING_DTYPE = pd.Series([""]).dtype
+
+def _pandas_values(values: np.ndarray):
+    """
+        Returns column values for a pd.DataFrame: strings get the dtype pandas would infer for
+        them, also when there are none.
+    """
+    return pd.array(values, dtype=_STRING_DTYPE) if values.dtype == object else values
+
+
+def _rows_values(fb_bytes: bytes, directory: FbFrameDirectory, name: str, start: int, stop: int) -> np.ndarray:
+    """
+        Returns the values of rows [start, stop) of the column called name, across row groups, as
+        an array of its original dtype (see _column_values). Raises KeyError if it is missing.
+    """
+    parts = list()
+    position = 0
+    for row_group, column in zip(directory.row_groups, directory.columns(fb_bytes, name)):
+        low, high = max(start - position, 0), min(stop - position, row_group.num_rows)
+        if low < high or not parts:
+            parts.append(_column_values(fb_bytes, column, low, max(low, high)))
+        position += row_group.num_rows
+    return _concat_values(parts) if parts else np.array([], dtype=object)
+
+
 def fb_dataframe_group_by_sum(fb_bytes: bytes, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
     """
         Applies GROUP BY SUM operation on the flatbuffer dataframe grouping by grouping_col_name
@@ -144,125 +897,536 @@ def fb_dataframe_group_by_sum(fb_bytes: bytes, grouping_col_name: str, sum_col_n
         @param grouping_col_name: column to group by.
         @param sum_col_name: column to sum.
     """
-    fb_df = DataFrame.DataFrame.GetRootAs(fb_bytes,  0)
-    cols_len = fb_df.ColumnsLength()
-    group_col_data = list()
-    sum_col_data = list()
-    # print("\n")
-    for i in range(cols_len):
-        col = fb_df.Columns(i)
-        # print(col)
-        # print(col.Data().Pos)
-        colmetadata = col.Colmetadata()
-        col_name = colmetadata.Name().decode("utf-8")
-        # print(col_name)
-        col_datatype = colmetadata.Type()
-        # print(col_datatype)
-        if col_name == grouping_col_name:
-            if col_datatype == DataType.DataType().INT64:
-                int_data = IntData.IntData()
-                int_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(int_data.DataLength())
-                for j in range(int_data.DataLength()):
-                    group_col_data.append(int_data.Data(j))
-            elif col_datatype == DataType.DataType().FLOAT64:
-                float_data = FloatData.FloatData()
-                float_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(float_data.DataLength())
-                for j in range(float_data.DataLength()):
-                    group_col_data.append(float_data.Data(j))
-            elif col_datatype == DataType.DataType.STRING:
-                string_data = StringData.StringData()
-                string_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(string_data.DataLength())
-                for j in range(string_data.DataLength()):
-                    group_col_data.append(string_data.Data(j).decode("utf-8"))
-        elif col_name == sum_col_name:
-            if col_datatype == DataType.DataType().INT64:
-                int_data = IntData.IntData()
-                int_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(int_data.DataLength())
-                for j in range(int_data.DataLength()):
-                    sum_col_data.append(int_data.Data(j))
-            elif col_datatype == DataType.DataType().FLOAT64:
-                float_data = FloatData.FloatData()
-                float_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(float_data.DataLength())
-                for j in range(float_data.DataLength()):
-                    sum_col_data.append(float_data.Data(j))
-            elif col_datatype == DataType.DataType.STRING:
-                string_data = StringData.StringData()
-                string_data.Init(col.Data().Bytes, col.Data().Pos)
-                # print(string_data.DataLength())
-                for j in range(string_data.DataLength()):
-                    sum_col_data.append(string_data.Data(j).decode("utf-8"))
-        if len(sum_col_data) != 0 and len(group_col_data) != 0:
-            break
-    df = pd.DataFrame(
-        {
-            grouping_col_name: group_col_data,
-            sum_col_name: sum_col_data
-        }
-    )
-    df = df.groupby(grouping_col_name).agg({sum_col_name: 'sum'})
-    # print(df)
+    return fb_dataframe_group_by(fb_bytes, grouping_col_name, {sum_col_name: "sum"})
+
+
+# Aggregations supported by fb_dataframe_group_by.
+GROUP_BY_AGGREGATIONS = ("sum", "count", "mean", "min", "max", "var")
+
+# The per-group partial results ("moments") every aggregation is computed from. Moments of disjoint
+# sets of rows can be merged, which is how a group-by is split across processes.
+_AGGREGATION_MOMENTS = {
+    "sum": ("sum",),
+    "count": ("count",),
+    "mean": ("count", "sum"),
+    "min": ("min",),
+    "max": ("max",),
+    "var": ("count", "sum", "m2"),
+}
 
-    return df  # REPLACE THIS WITH YOUR CODE...
+def fb_dataframe_group_by(fb_bytes: bytes, by, aggs: dict) -> pd.DataFrame:
+    """
+        Groups the flatbuffer dataframe by one or more key columns and aggregates value columns,
+        like df.groupby(by).agg(aggs). aggs maps each value column to an aggregation, or a list of
+        them, out of GROUP_BY_AGGREGATIONS. Groups are sorted by key and rows with a NaN key are
+        dropped, as in pandas; integer results and counts match pandas exactly and floating point
+        results up to rounding (pandas uses compensated summation).
+
+        Keys are turned into dense group ids without going through pandas: integer keys by
+        offsetting them into a bincount table (or by sorting, if their range is too wide for one),
+        float keys by sorting, dictionary-encoded strings from their codes and other strings by
+        hashing. Rows are then sorted by group id once and every aggregate of every value column is
+        a reduction over the sorted groups.
+
+        FbSharedMemory.dataframe_group_by can split the rows across several processes.
+
+        @param fb_bytes: bytes of the Flatbuffer Dataframe.
+        @param by: name of the column to group by, or a list of names.
+        @param aggs: maps value column names to an aggregation or a list of aggregations.
+    """
+    keys = _group_by_keys(by, aggs)
+    return _group_by_result(keys, aggs, *_group_by_partial(fb_bytes, keys, aggs))
+
+
+def _group_by_keys(by, aggs: dict) -> list:
+    """
+        Validates the arguments of fb_dataframe_group_by and returns the list of key columns.
+    """
+    for hows in aggs.values():
+        for how in _aggregations(hows):
+            if how not in GROUP_BY_AGGREGATIONS:
+                raise ValueError(f"unsupported aggregation '{how}', expected one of {GROUP_BY_AGGREGATIONS}")
+    return [by] if isinstance(by, str) else list(by)
+
+
+def _aggregations(hows) -> list:
+    return [hows] if isinstance(hows, str) else list(hows)
+
+
+def _group_by_partial(fb_bytes: bytes, keys: list, aggs: dict, start: int = 0, stop: int = None, directory: FbFrameDirectory = None) -> tuple:
+    """
+        Groups rows [start, stop) of the flatbuffer dataframe. Returns (key_values, moments):
+        key_values holds, for every key, its value in each group, and moments maps every value
+        column to its dtype and the moments (see _AGGREGATION_MOMENTS) of each group that its
+        aggregations need.
+
+        @param fb_bytes: bytes of the Flatbuffer Dataframe.
+        @param keys: the key columns.
+        @param aggs: see fb_dataframe_group_by.
+        @param start: first row.
+        @param stop: end of the rows, None for all rows.
+        @param directory: the flatbuffer's directory, if parsed already.
+    """
+    directory = directory or FbFrameDirectory(fb_bytes)
+    # The row groups overlapping the rows, with the range of their own rows to read.
+    parts = list()
+    position = 0
+    for row_group_number, row_group in enumerate(directory.row_groups):
+        low = max(start - position, 0)
+        high = row_group.num_rows if stop is None else min(stop - position, row_group.num_rows)
+        if low < high or not parts:
+            parts.append((row_group_number, low, max(low, high)))
+        position += row_group.num_rows
+
+    levels = [_group_key_codes(fb_bytes, _find_columns(fb_bytes, directory, parts, key)) for key in keys]
+    valid = None
+    for codes, _ in levels:
+        if (codes < 0).any():
+            valid = (codes >= 0) if valid is None else valid & (codes >= 0)
+    if valid is not None:
+        levels = [(codes[valid], uniques) for codes, uniques in levels]
+
+    group_ids, group_codes = _combine_group_codes(levels)
+    key_values = [uniques[codes] for (_, uniques), codes in zip(levels, group_codes)]
+    order, starts, sizes = _sort_groups(group_ids, len(group_codes[0]))
+
+    moments = dict()
+    for name, hows in aggs.items():
+        values = _concat_values([_column_values(fb_bytes, column, low, high) for column, low, high in _find_columns(fb_bytes, directory, parts, name)])
+        if valid is not None:
+            values = values[valid]
+        needed = {moment for how in _aggregations(hows) for moment in _AGGREGATION_MOMENTS[how]}
+        moments[name] = (values.dtype, _moments(values[order], starts, sizes, needed))
+
+    return key_values, moments
+
+
+def _merge_group_by_partials(partials: list) -> tuple:
+    """
+        Merges the (key_values, moments) results of _group_by_partial for disjoint sets of rows into
+        the result for all of them.
+    """
+    levels = [_factorize_values(_concat_values([key_values[level] for key_values, _ in partials]))
+              for level in range(len(partials[0][0]))]
+    group_ids, group_codes = _combine_group_codes(levels)
+    key_values = [uniques[codes] for (_, uniques), codes in zip(levels, group_codes)]
+    order, starts, sizes = _sort_groups(group_ids, len(group_codes[0]))
+
+    moments = dict()
+    for name, (dtype, column_moments) in partials[0][1].items():
+        concatenated = {moment: _concat_values([partial_moments[name][1][moment] for _, partial_moments in partials])[order]
+                        for moment in column_moments}
+        moments[name] = (dtype, _merge_moments(concatenated, starts, sizes))
+
+    return key_values, moments
+
+
+def _group_by_result(keys: list, aggs: dict, key_values: list, moments: dict) -> pd.DataFrame:
+    """
+        Builds the result frame of fb_dataframe_group_by from the groups' key values and moments.
+    """
+    if len(keys) == 1:
+        index = pd.Index(key_values[0], name=keys[0])
+    else:
+        index = pd.MultiIndex.from_arrays(key_values, names=keys)
+
+    multi_column = any(not isinstance(hows, str) for hows in aggs.values())
+    columns = dict()
+    for name, hows in aggs.items():
+        dtype, column_moments = moments[name]
+        for how in _aggregations(hows):
+            columns[(name, how) if multi_column else name] = _finalize_aggregation(dtype, column_moments, how)
+
+    return pd.DataFrame(columns, index=index)
+
+
+def _num_rows(fb_df: DataFrame.DataFrame) -> int:
+    """
+        Returns the number of rows of a (plain) DataFrame table.
+    """
+    if fb_df.ColumnsLength() == 0:
+        return 0
+    col = fb_df.Columns(0)
+    col_datatype = col.Colmetadata().Type()
+    if col_datatype in _NUMERIC_TABLES:
+        col_data = _NUMERIC_TABLES[col_datatype][1]()
+    elif col_datatype == DataType.DataType().DICT_STRING:
+        col_data = DictStringData.DictStringData()
+        col_data.Init(col.Data().Bytes, col.Data().Pos)
+        return col_data.CodesLength()
+    else:
+        col_data = StringData.StringData()
+    col_data.Init(col.Data().Bytes, col.Data().Pos)
+    return col_data.DataLength()
+
+
+def _frame_summary(fb_bytes: bytes) -> tuple:
+    """
+        Returns (rows, columns, dtypes) of a plain or chunked flatbuffer, where bit t of dtypes is
+        set if a column is stored with DataType t.
+    """
+    directory = FbFrameDirectory(fb_bytes)
+    if not directory.row_groups:
+        return 0, 0, 0
+    columns = directory.column_list(fb_bytes, 0)
+    dtypes = 0
+    for column in columns:
+        dtypes |= 1 << column.datatype
+    return directory.num_rows, len(columns), dtypes
+
+
+def _find_columns(fb_bytes: bytes, directory: FbFrameDirectory, parts: list, col_name: str) -> list:
+    """
+        Returns (column, start, stop) for the column named col_name in every (row group number,
+        start, stop) part. Raises KeyError if it is missing.
+    """
+    columns = directory.columns(fb_bytes, col_name)
+    return [(columns[row_group], start, stop) for row_group, start, stop in parts]
+
+
+def _concat_values(parts: list) -> np.ndarray:
+    """
+        Concatenates the per-row-group values of a column; a single row group is not copied.
+    """
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
 
 
-def fb_dataframe_map_numeric_column(fb_buf: memoryview, col_name: str, map_func: types.FunctionType) -> None:
+def _group_key_codes(fb_bytes: bytes, cols: list) -> tuple:
+    """
+        Factorizes a key column. Returns (codes, uniques) where uniques holds the distinct keys in
+        sorted order and codes the position of every row's key in uniques, or -1 for a NaN key.
+
+        @param fb_bytes: bytes of the Flatbuffer Dataframe.
+        @param cols: (column, start, stop) for the key column of every row group.
+    """
+    if all(column.datatype == DataType.DataType().DICT_STRING for column, _, _ in cols):
+        # Rows are grouped by their dictionary codes. Dictionaries are sorted by their utf-8 bytes,
+        # which is string order, so code order is key order within a row group, and the keys of
+        # several row groups are merged by the bytes of the dictionary entries they use. Only the
+        # distinct keys are decoded.
+        parts = list()
+        for column, start, stop in cols:
+            dict_data = _data_table(fb_bytes, column, DictStringData.DictStringData)
+            used, codes = _dense_codes(_column_array(fb_bytes, column)[start:stop], dict_data.DictionaryLength())
+            parts.append((np.array([dict_data.Dictionary(j) for j in used.tolist()], dtype=object), codes))
+        if len(parts) == 1:
+            uniques, codes = parts[0]
+        else:
+            uniques = np.unique(np.concatenate([used for used, _ in parts]))
+            codes = _concat_values([np.searchsorted(uniques, used)[codes] for used, codes in parts])
+        return codes, np.array([key.decode("utf-8") for key in uniques.tolist()], dtype=object)
+
+    return _factorize_values(_concat_values([_column_values(fb_bytes, column, start, stop) for column, start, stop in cols]))
+
+
+def _factorize_values(values: np.ndarray) -> tuple:
+    """
+        _group_key_codes for an array of key values.
+    """
+    if values.dtype.kind in "iu" and len(values) > 0:
+        low, high = values.min(), values.max()
+        size = int(high) - int(low) + 1
+        # Offsets from low only fit an intp, and only pay off, for key ranges a table can cover.
+        if _fits_bincount(size, len(values)):
+            wide_dtype = np.uint64 if values.dtype.kind == "u" else np.int64
+            offsets = (values.astype(wide_dtype) - wide_dtype(low)).astype(np.intp)
+            observed, codes = _dense_codes(offsets, size)
+            return codes, (observed + wide_dtype(low)).astype(values.dtype)
+    if values.dtype.kind in "iuf":
+        uniques, codes = np.unique(values, return_inverse=True)
+        if len(uniques) > 0 and np.isnan(uniques[-1]):
+            # np.unique sorts all NaNs into one trailing entry.
+            uniques = uniques[:-1]
+            codes[codes == len(uniques)] = -1
+        return codes, uniques
+
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, uniques
+
+
+def _dense_codes(codes: np.ndarray, size: int) -> tuple:
+    """
+        Renumbers codes from [0, size) to consecutive ids in the same order. Returns (observed, ids)
+        where observed holds the distinct codes in increasing order. Uses a bincount table when size
+        is not much larger than the number of codes and sorting otherwise.
+    """
+    if _fits_bincount(size, len(codes)):
+        present = np.bincount(codes, minlength=size) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[codes]
+    return np.unique(codes, return_inverse=True)
+
+
+def _fits_bincount(size: int, count: int) -> bool:
+    """
+        Returns whether count codes in [0, size) are renumbered with a bincount table.
+    """
+    return size <= max(2 * count, 1 << 16)
+
+
+def _combine_group_codes(levels: list) -> tuple:
+    """
+        Combines the (codes, uniques) of one or more keys into group ids. Returns (group_ids,
+        group_codes): the group id of every row, numbered in lexicographic key order, and for every
+        key the code of each group's value of that key.
+    """
+    group_ids = np.zeros(len(levels[0][0]), dtype=np.intp)
+    num_groups = 1
+    group_codes = list()
+    for codes, uniques in levels:
+        num_uniques = max(len(uniques), 1)
+        observed, group_ids = _dense_codes(group_ids * num_uniques + codes, num_groups * num_uniques)
+        group_codes = [group_code[observed // num_uniques] for group_code in group_codes] + [observed % num_uniques]
+        num_groups = len(observed)
+    return group_ids, group_codes
+
+
+def _sort_groups(group_ids: np.ndarray, num_groups: int) -> tuple:
+    """
+        Returns (order, starts, sizes): the permutation that sorts rows by group id and the start
+        and size of every group's run of rows in that order. Every group must have a row.
+    """
+    sizes = np.bincount(group_ids, minlength=num_groups)
+    # Narrow ids let NumPy use a radix sort.
+    order = np.argsort(group_ids.astype(np.min_scalar_type(max(num_groups - 1, 0))), kind="stable")
+    return order, np.cumsum(sizes) - sizes, sizes
+
+
+def _reduceat(ufunc: np.ufunc, values: np.ndarray, starts: np.ndarray, dtype=None) -> np.ndarray:
+    """
+        ufunc.reduceat over the runs beginning at starts, which also works when there are none.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=dtype or values.dtype)
+    return ufunc.reduceat(values, starts, dtype=dtype)
+
+
+def _moments(values: np.ndarray, starts: np.ndarray, sizes: np.ndarray, needed: set) -> dict:
+    """
+        Computes the needed moments of every group of values, which are sorted by group so group i
+        is values[starts[i]:starts[i] + sizes[i]]. NaNs are skipped. Sums are exact int64 (or
+        uint64) for integers, float64 for floats and concatenations for strings; min and max keep
+        the values' dtype.
+
+        @param values: the value column, sorted by group.
+        @param starts: the start of every group.
+        @param sizes: the size of every group.
+        @param needed: names of the moments to compute.
+    """
+    kind = values.dtype.kind
+    if kind not in "iuf" and not needed <= {"count", "sum"}:
+        raise TypeError("only count and sum can be computed for non-numeric values")
+    nan = np.isnan(values) if kind == "f" else None
+
+    moments = dict()
+    if "count" in needed:
+        moments["count"] = sizes.astype(np.int64) if nan is None else _reduceat(np.add, ~nan, starts, np.int64)
+    if "sum" in needed:
+        if kind not in "iuf":
+            # Like pandas, the sum of strings is their concatenation in row order.
+            moments["sum"] = np.array(["".join(values[start:start + size]) for start, size in zip(starts.tolist(), sizes.tolist())], dtype=object)
+        elif nan is None:
+            moments["sum"] = _reduceat(np.add, values, starts, np.uint64 if kind == "u" else np.int64)
+        else:
+            moments["sum"] = _reduceat(np.add, np.where(nan, 0, values), starts, np.float64)
+    if "min" in needed:
+        moments["min"] = _reduceat(np.fmin, values, starts)
+    if "max" in needed:
+        moments["max"] = _reduceat(np.fmax, values, starts)
+    if "m2" in needed:
+        # Sum of squared deviations from the group mean.
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = moments["sum"] / moments["count"]
+        deviations = values.astype(np.float64) - np.repeat(mean, sizes)
+        if nan is not None:
+            deviations[nan] = 0
+        moments["m2"] = _reduceat(np.add, deviations * deviations, starts, np.float64)
+    return moments
+
+
+def _merge_moments(moments: dict, starts: np.ndarray, sizes: np.ndarray) -> dict:
+    """
+        Merges partial moments, sorted by group so group i is [starts[i], starts[i] + sizes[i]), into
+        the moments of every group. Sums of squared deviations are combined with Chan et al.'s
+        pairwise update.
+    """
+    merged = dict()
+    for moment, ufunc in (("count", np.add), ("sum", np.add), ("min", np.fmin), ("max", np.fmax)):
+        if moment in moments:
+            merged[moment] = _reduceat(ufunc, moments[moment], starts)
+    if "m2" in moments:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            partial_mean = moments["sum"] / moments["count"]
+            mean = merged["sum"] / merged["count"]
+        delta = partial_mean - np.repeat(mean, sizes)
+        correction = np.where(moments["count"] > 0, moments["count"] * delta * delta, 0)
+        merged["m2"] = _reduceat(np.add, moments["m2"] + correction, starts)
+    return merged
+
+
+def _finalize_aggregation(dtype: np.dtype, moments: dict, how: str) -> np.ndarray:
+    """
+        Computes an aggregation from the groups' moments, with the result dtype pandas gives.
+
+        @param dtype: dtype of the value column.
+        @param moments: the groups' moments.
+        @param how: one of GROUP_BY_AGGREGATIONS.
+    """
+    if how in ("count", "min", "max"):
+        return moments[how]
+    elif how == "sum":
+        sums = moments["sum"]
+        # Integer sums are int64 or uint64; like pandas, they keep a narrower column dtype only if
+        # every sum fits in it.
+        if dtype.kind in "iu" and not np.array_equal(sums.astype(dtype), sums):
+            return sums
+        return sums.astype(dtype)
+
+    float_dtype = dtype if dtype.kind == "f" else np.dtype(np.float64)
+    count = moments["count"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if how == "mean":
+            return (moments["sum"] / count).astype(float_dtype)
+        var = moments["m2"] / (count - 1)
+    var[count < 2] = np.nan
+    return var.astype(float_dtype)
+
+
+def _dictionary_strings(dict_data: DictStringData.DictStringData) -> np.ndarray:
+    """
+        Decodes the dictionary of a dictionary-encoded string column.
+    """
+    return np.array([dict_data.Dictionary(j).decode("utf-8") for j in range(dict_data.DictionaryLength())], dtype=object)
+
+
+def _dictionary_values(dict_data: DictStringData.DictStringData, codes: np.ndarray) -> np.ndarray:
+    """
+        Decodes the codes of some rows of a dictionary-encoded string column.
+    """
+    if len(codes) >= dict_data.DictionaryLength():
+        return _dictionary_strings(dict_data)[codes]
+    # Fewer rows than distinct values: decode only the values used.
+    used, codes = np.unique(codes, return_inverse=True)
+    return np.array([dict_data.Dictionary(j).decode("utf-8") for j in used.tolist()], dtype=object)[codes]
+
+
+def _column_values(fb_bytes: bytes, column: FbColumn, start: int = 0, stop: int = None) -> np.ndarray:
+    """
+        Returns the values of rows [start, stop) of a column as an array of its original dtype.
+        Numeric columns that are not downcast come back as read-only views of the flatbuffer;
+        strings are decoded.
+    """
+    if column.datatype in _NUMERIC_TABLES:
+        return _column_array(fb_bytes, column)[start:stop].astype(column.dtype, copy=False)
+    elif column.datatype == DataType.DataType().DICT_STRING:
+        dict_data = _data_table(fb_bytes, column, DictStringData.DictStringData)
+        return _dictionary_values(dict_data, _column_array(fb_bytes, column)[start:stop])
+
+    string_data = _data_table(fb_bytes, column, StringData.StringData)
+    stop = column.length if stop is None else min(stop, column.length)
+    return np.array([string_data.Data(j).decode("utf-8") for j in range(start, stop)], dtype=object)
+
+
+# Number of values map_func is applied to at a time by fb_dataframe_map_numeric_column.
+MAP_BATCH_SIZE = 1 << 16
+
+def fb_dataframe_map_numeric_column(fb_buf: memoryview, col_name: str, map_func: types.FunctionType, vectorized: bool = False) -> None:
     """
         Apply map_func to elements in a numeric column in the Flatbuffer Dataframe in place.
         This function shouldn't do anything if col_name doesn't exist or the specified
         column is a string column.
 
+        The column is modified through a writable NumPy view of its vector, in batches of
+        MAP_BATCH_SIZE values. By default map_func is called once per value with a Python int or
+        float. If vectorized is set, map_func is called once per batch with a NumPy array and must
+        return an array of the same length, e.g. lambda x: x * 2 + 1. Expressions from
+        fb_expression (e.g. col * 2 + 1) are always vectorized. NumPy ufuncs such as
+        np.negative are always applied to whole arrays, directly into the column if their result
+        has the column's type. Results are stored in the column's type and must fit it exactly,
+        otherwise OverflowError is raised; batches before the failing one stay mapped.
+
         @param fb_buf: buffer containing bytes of the Flatbuffer Dataframe.
         @param col_name: name of the numeric column to apply map_func to.
         @param map_func: function to apply to elements in the numeric column.
+        @param vectorized: whether map_func takes and returns NumPy arrays.
+    """
+    _map_numeric_column_rows(fb_buf, col_name, map_func, vectorized)
+
+
+def _map_numeric_column_rows(fb_buf: memoryview, col_name: str, map_func: types.FunctionType, vectorized: bool, start: int = 0, stop: int = None, directory: FbFrameDirectory = None, source: memoryview = None) -> None:
+    """
+        fb_dataframe_map_numeric_column for rows [start, stop) of a plain or chunked flatbuffer.
+        Rows outside the range are not touched, so disjoint ranges can be mapped concurrently.
+
+        @param start: first row.
+        @param stop: end of the rows, None for all rows.
+        @param directory: the flatbuffer's directory, if parsed already.
+        @param source: optional flatbuffer with the same bytes as fb_buf (see
+            _copy_except_column) to read the values from, instead of fb_buf.
     """
-    # YOUR CODE HERE...
-    fb_df = DataFrame.DataFrame.GetRootAs(fb_buf,  0)
-    cols_len = fb_df.ColumnsLength()
-    for i in range(cols_len):
-        col = fb_df.Columns(i)
-        # print(col)
-        # print(col.Data().Pos)
-        colmetadata = col.Colmetadata()
-        column_name = colmetadata.Name().decode("utf-8")
-        # print(col_name)
-        col_datatype = colmetadata.Type()
-        # print(col_datatype)
-        if column_name == col_name:
-            if col_datatype == DataType.DataType().INT64:
-                # print(col_name)
-                # print("cd: Bytes: ", col.Data().Bytes)
-                # print("cd: Pos: ", col.Data().Pos)
-                int_data = IntData.IntData()
-                int_data.Init(col.Data().Bytes, col.Data().Pos)
-
-                offset = col.Data().Pos + 12
-                for i in range(int_data.DataLength()):
-                    # print(i, int.from_bytes(fb_buf[offset:offset + 8], 'little'))
-                    num = int.from_bytes(fb_buf[offset:offset + 8], 'little')
-                    new_num = map_func(num)
-                    fb_buf[offset:offset + 8] = new_num.to_bytes(8, 'little')
-                    offset += 8
-
-            elif col_datatype == DataType.DataType().FLOAT64:
-                # print(col_name)
-                # print("cd: Bytes: ", col.Data().Bytes)
-                # print("cd: Pos: ", col.Data().Pos)
-                float_data = FloatData.FloatData()
-                float_data.Init(col.Data().Bytes, col.Data().Pos)
-
-                offset = col.Data().Pos + 12
-                for i in range(float_data.DataLength()):
-                    import struct
-                    # print(i, struct.unpack('<d', fb_buf[offset:offset+8])[0])
-                    num = struct.unpack('<d', fb_buf[offset:offset+8])[0]
-                    new_num = map_func(num)
-                    fb_buf[offset:offset+8] = struct.pack('<d', new_num)
-                    offset += 8
-                break
-    pass
-    
\ No newline at end of file
+    directory = directory or FbFrameDirectory(fb_buf)
+    position = 0
+    for row_group_number, row_group in enumerate(directory.row_groups):
+        low = max(start - position, 0)
+        high = row_group.num_rows if stop is None else min(stop - position, row_group.num_rows)
+        column = directory.column(fb_buf, row_group_number, col_name)
+        if column is None or column.datatype not in _NUMERIC_TABLES:
+            return
+        if low < high:
+            _map_column_rows(fb_buf, column, map_func, vectorized, low, high, source)
+        position += row_group.num_rows
+
+
+def _copy_except_column(fb_buf: memoryview, target: memoryview, col_name: str, directory: FbFrameDirectory = None) -> None:
+    """
+        Copies the flatbuffer into target, which is as long, except for the values of the numeric
+        column col_name, which _map_numeric_column_rows(target, ..., source=fb_buf) then writes.
+    """
+    directory = directory or FbFrameDirectory(fb_buf)
+    skipped = list()
+    for row_group_number in range(len(directory.row_groups)):
+        column = directory.column(fb_buf, row_group_number, col_name)
+        if column is not None and column.datatype in _NUMERIC_TABLES:
+            skipped.append((column.offset, column.offset + column.length * _NUMERIC_TABLES[column.datatype][2].itemsize))
+    position = 0
+    for start, stop in sorted(skipped):
+        target[position:start] = fb_buf[position:start]
+        position = stop
+    target[position:] = fb_buf[position:]
+
+
+def _map_column_rows(fb_buf: memoryview, column: FbColumn, map_func: types.FunctionType, vectorized: bool, start: int, stop: int, source: memoryview = None) -> None:
+    """
+        fb_dataframe_map_numeric_column for rows [start, stop) of a numeric column of one row group,
+        reading the values from source if given.
+    """
+    col_name = column.name
+    # The view aliases fb_buf, so assigning to it writes the column in place.
+    out = _column_array(fb_buf, column, writable=True)[start:stop]
+    values = out if source is None else _column_array(source, column)[start:stop]
+    dtype = column.dtype
+    if isinstance(map_func, Expr):
+        vectorized = True
+    elif isinstance(map_func, np.ufunc):
+        vectorized = True
+        if map_func.nin == 1 and map_func.nout == 1 and dtype == values.dtype:
+            try:
+                map_func(values, out=out)
+                return
+            except TypeError:
+                # The result type differs from the column's, e.g. np.sqrt of an int column.
+                pass
+
+    for start in range(0, len(values), MAP_BATCH_SIZE):
+        batch = values[start:start + MAP_BATCH_SIZE]
+        if vectorized:
+            mapped = np.asarray(map_func(batch.astype(dtype)))
+        else:
+            mapped = np.array([map_func(v) for v in batch.astype(dtype).tolist()])
+        if mapped.shape != batch.shape:
+            raise ValueError(f"map_func returned {mapped.shape[0] if mapped.ndim else 'a scalar'} values for a batch of {len(batch)}")
+        if mapped.dtype != batch.dtype:
+            stored = mapped.astype(batch.dtype)
+            if not np.array_equal(stored, mapped, equal_nan=stored.dtype.kind == "f"):
+                raise OverflowError(f"map_func results for column '{col_name}' do not fit its {batch.dtype} storage")
+            mapped = stored
+        out[start:start + len(batch)] = mapped
@@ -0,0 +1,228 @@
+"""
+    Expressions over dataframe columns, e.g. col * 2 + 1, where(col > 5, col, 0) or log1p(col).
+
+    An expression is a tree of Expr nodes built with Python operators and the functions below. It
+    evaluates at NumPy speed in blocks of EXPRESSION_BLOCK_SIZE rows, so intermediate results stay
+    in cache, and converts to and from plain nested lists (to_data / from_data), so it can be sent
+    to other processes without pickling code. Only the operations in _FUNCTIONS can be expressed.
+
+    Literals are numbers, except that a column can be compared with a string (column("s") == "x",
+    column("s").startswith("x")), for the where clauses of fb_query.
+"""
+
+import numpy as np
+
+# Number of rows evaluated at a time; every intermediate result is one block long.
+EXPRESSION_BLOCK_SIZE = 1 << 14
+
+# Operations an expression can apply, by name.
+_FUNCTIONS = {name: getattr(np, name) for name in (
+    "add", "subtract", "multiply", "true_divide", "floor_divide", "remainder", "power",
+    "less", "less_equal", "greater", "greater_equal", "equal", "not_equal",
+    "logical_and", "logical_or", "logical_not", "negative", "absolute", "minimum", "maximum",
+    "log", "log1p", "exp", "expm1", "sqrt", "floor", "ceil", "where",
+)}
+_FUNCTIONS["startswith"] = np.char.startswith
+
+
+class Expr:
+    """
+        A node of an expression tree: a column reference ("col", name), a literal ("lit", value) or
+        an operation from _FUNCTIONS applied to argument expressions.
+    """
+    __slots__ = ["op", "args"]
+
+    def __init__(self, op: str, *args):
+        if op not in ("col", "lit") and op not in _FUNCTIONS:
+            raise ValueError(f"unsupported expression operation '{op}'")
+        self.op = op
+        self.args = args
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        """
+            Evaluates the expression with values as the unnamed column, so an expression can be
+            used as a vectorized map_func.
+        """
+        return self.evaluate({None: values})
+
+    def evaluate(self, columns: dict) -> np.ndarray:
+        """
+            Evaluates the expression over the given columns block by block.
+
+            @param columns: maps the column names used in the expression (None for the unnamed
+                column) to equally long arrays.
+        """
+        program = self._compile()
+        length = len(next(iter(columns.values()))) if columns else 1
+        out = None
+        for start in range(0, length, EXPRESSION_BLOCK_SIZE):
+            stop = min(start + EXPRESSION_BLOCK_SIZE, length)
+            result = np.asarray(program({name: values[start:stop] for name, values in columns.items()}))
+            if out is None:
+                out = np.empty(length, dtype=result.dtype)
+            out[start:stop] = result
+        if out is None:
+            out = np.asarray(program(columns)).reshape(0)
+        return out
+
+    def _compile(self):
+        """
+            Returns a function computing the expression from a dict of column blocks.
+        """
+        if self.op == "col":
+            name = self.args[0]
+            return lambda block: block[name]
+        elif self.op == "lit":
+            value = self.args[0]
+            return lambda block: value
+
+        function = _FUNCTIONS[self.op]
+        programs = [arg._compile() for arg in self.args]
+        if len(programs) == 1:
+            program = programs[0]
+            return lambda block: function(program(block))
+        elif len(programs) == 2:
+            left, right = programs
+            return lambda block: function(left(block), right(block))
+        return lambda block: function(*[program(block) for program in programs])
+
+    def columns(self) -> set:
+        """
+            Returns the names of the columns the expression reads (None for the unnamed column).
+        """
+        if self.op == "col":
+            return {self.args[0]}
+        elif self.op == "lit":
+            return set()
+        return set().union(*[arg.columns() for arg in self.args])
+
+    def to_data(self) -> list:
+        """
+            Returns the expression as plain nested lists, e.g. ["add", ["col", None], ["lit", 1]].
+        """
+        if self.op in ("col", "lit"):
+            return [self.op, *self.args]
+        return [self.op, *[arg.to_data() for arg in self.args]]
+
+    def __reduce__(self):
+        return (from_data, (self.to_data(),))
+
+    def __repr__(self):
+        return f"Expr({self.to_data()!r})"
+
+    __hash__ = object.__hash__
+
+    def __bool__(self):
+        # and, or, not and if would otherwise treat every expression as true, like NumPy arrays.
+        raise TypeError("use & / | / ~ to combine expressions, not and/or/not")
+
+    # Arithmetic.
+    def __add__(self, other): return Expr("add", self, _expr(other))
+    def __radd__(self, other): return Expr("add", _expr(other), self)
+    def __sub__(self, other): return Expr("subtract", self, _expr(other))
+    def __rsub__(self, other): return Expr("subtract", _expr(other), self)
+    def __mul__(self, other): return Expr("multiply", self, _expr(other))
+    def __rmul__(self, other): return Expr("multiply", _expr(other), self)
+    def __truediv__(self, other): return Expr("true_divide", self, _expr(other))
+    def __rtruediv__(self, other): return Expr("true_divide", _expr(other), self)
+    def __floordiv__(self, other): return Expr("floor_divide", self, _expr(other))
+    def __rfloordiv__(self, other): return Expr("floor_divide", _expr(other), self)
+    def __mod__(self, other): return Expr("remainder", self, _expr(other))
+    def __rmod__(self, other): return Expr("remainder", _expr(other), self)
+    def __pow__(self, other): return Expr("power", self, _expr(other))
+    def __rpow__(self, other): return Expr("power", _expr(other), self)
+    def __neg__(self): return Expr("negative", self)
+    def __abs__(self): return Expr("absolute", self)
+
+    # Comparisons and boolean logic.
+    def __lt__(self, other): return Expr("less", self, _expr(other))
+    def __le__(self, other): return Expr("less_equal", self, _expr(other))
+    def __gt__(self, other): return Expr("greater", self, _expr(other))
+    def __ge__(self, other): return Expr("greater_equal", self, _expr(other))
+    def __eq__(self, other): return Expr("equal", self, _expr(other, strings=True))
+    def __ne__(self, other): return Expr("not_equal", self, _expr(other, strings=True))
+    def __and__(self, other): return Expr("logical_and", self, _expr(other))
+    def __rand__(self, other): return Expr("logical_and", _expr(other), self)
+    def __or__(self, other): return Expr("logical_or", self, _expr(other))
+    def __ror__(self, other): return Expr("logical_or", _expr(other), self)
+    def __invert__(self): return Expr("logical_not", self)
+
+    def startswith(self, prefix: str) -> "Expr":
+        """
+            Tests whether the values, strings, start with prefix.
+        """
+        if not isinstance(prefix, str):
+            raise TypeError(f"startswith takes a string, got {type(prefix).__name__}")
+        return Expr("startswith", self, Expr("lit", prefix))
+
+
+def _expr(value, strings: bool = False) -> Expr:
+    """
+        Wraps a Python or NumPy scalar as a literal; expressions are returned as they are.
+
+        @param strings: whether strings are allowed too.
+    """
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, np.generic):
+        value = value.item()
+    if strings and isinstance(value, str):
+        return Expr("lit", value)
+    if not isinstance(value, (bool, int, float)):
+        raise TypeError(f"expression literals must be numbers, got {type(value).__name__}")
+    return Expr("lit", value)
+
+
+def from_data(data: list) -> Expr:
+    """
+        Rebuilds an expression from the output of Expr.to_data.
+    """
+    op, *args = data
+    if op == "col":
+        return column(*args)
+    elif op == "lit":
+        return _expr(*args, strings=True)
+    return Expr(op, *[from_data(arg) for arg in args])
+
+
+def column(name: str = None) -> Expr:
+    """
+        Returns a reference to the column called name, or, without a name, to the column an
+        expression is applied to (e.g. by fb_dataframe_map_numeric_column).
+    """
+    return Expr("col", name)
+
+
+# The column an expression is applied to.
+col = column()
+
+
+def where(condition, x, y) -> Expr:
+    return Expr("where", _expr(condition), _expr(x), _expr(y))
+
+def minimum(x, y) -> Expr:
+    return Expr("minimum", _expr(x), _expr(y))
+
+def maximum(x, y) -> Expr:
+    return Expr("maximum", _expr(x), _expr(y))
+
+def log(x) -> Expr:
+    return Expr("log", _expr(x))
+
+def log1p(x) -> Expr:
+    return Expr("log1p", _expr(x))
+
+def exp(x) -> Expr:
+    return Expr("exp", _expr(x))
+
+def expm1(x) -> Expr:
+    return Expr("expm1", _expr(x))
+
+def sqrt(x) -> Expr:
+    return Expr("sqrt", _expr(x))
+
+def floor(x) -> Expr:
+    return Expr("floor", _expr(x))
+
+def ceil(x) -> Expr:
+    return Expr("ceil", _expr(x))
@@ -0,0 +1,195 @@
+"""
+    A lazy, pandas-like view of a flatbuffer dataframe.
+
+    A FlatbufferFrame reads a flatbuffer (in a buffer or in FbSharedMemory) only when values are
+    asked for, and then only the columns and rows asked for: frame[["a", "b"]].iloc[1000:2000]
+    reads nothing, and its to_pandas() decodes 1000 rows of two columns. Numeric values are read
+    straight from the flatbuffer's vectors; decoded string columns can be kept in a small LRU
+    cache, as decoding strings is what costs.
+"""
+
+import collections
+import contextlib
+import numpy as np
+import pandas as pd
+import typing
+
+from fb_dataframe import FbFrameDirectory, _NUMERIC_TABLES, _STRING_DTYPE, _pandas_values, _rows_values
+
+
+class FlatbufferFrame:
+    """
+        A lazy frame over a plain or chunked flatbuffer, or over a dataframe in FbSharedMemory,
+        with a subset of the pandas DataFrame API: columns, dtypes, len, frame["col"],
+        frame[["col", ...]], iloc, head and to_pandas.
+
+        A frame over FbSharedMemory reads the current version of the dataframe on every call,
+        pinning it for the duration of the call (see FbSharedMemory.snapshot), so every result is
+        consistent but two calls may see different versions.
+    """
+    def __init__(self, source, name: str = None, cache_size: int = 0):
+        """
+            @param source: buffer containing bytes of the Flatbuffer Dataframe, or an FbSharedMemory.
+            @param name: name of the dataframe if source is an FbSharedMemory.
+            @param cache_size: number of decoded string columns (or row ranges of them) to keep.
+        """
+        self._source = source
+        self._name = name
+        self._directory = None if name is not None else FbFrameDirectory(source)
+        self._cache = collections.OrderedDict() if cache_size else None
+        self._cache_size = cache_size
+        # The selected columns (None: all) and rows (None: all).
+        self._selected_columns = None
+        self._rows = None
+
+    def _select(self, columns: list = None, rows: range = None) -> "FlatbufferFrame":
+        """
+            Returns a frame of the same source and cache with other columns or rows selected.
+        """
+        frame = object.__new__(FlatbufferFrame)
+        frame.__dict__.update(self.__dict__)
+        if columns is not None:
+            frame._selected_columns = columns
+        if rows is not None:
+            frame._rows = rows
+        return frame
+
+    @contextlib.contextmanager
+    def _read(self) -> typing.Iterator[tuple]:
+        """
+            Yields (fb_buf, directory, version) of the flatbuffer, where version is the catalog
+            generation of a dataframe in FbSharedMemory and None otherwise.
+        """
+        if self._name is None:
+            yield self._source, self._directory, None
+            return
+        fb_shm = self._source
+        with fb_shm._pinned(self._name) as entry, fb_shm._entry_buf(entry) as fb_buf:
+            yield fb_buf, fb_shm._directory(entry, fb_buf), entry.generation
+
+    def _names(self, fb_buf: memoryview, directory: FbFrameDirectory) -> list:
+        if self._selected_columns is not None:
+            return self._selected_columns
+        return directory.column_names(fb_buf)
+
+    def _row_range(self, directory: FbFrameDirectory) -> range:
+        return range(directory.num_rows) if self._rows is None else self._rows
+
+    @property
+    def columns(self) -> pd.Index:
+        """
+            The column names.
+        """
+        with self._read() as (fb_buf, directory, _):
+            return pd.Index(self._names(fb_buf, directory))
+
+    @property
+    def dtypes(self) -> pd.Series:
+        """
+            The dtype of every column, as to_pandas returns it.
+        """
+        with self._read() as (fb_buf, directory, _):
+            names = self._names(fb_buf, directory)
+            dtypes = list()
+            for name in names:
+                column = directory.columns(fb_buf, name)[0] if directory.row_groups else None
+                dtypes.append(column.dtype if column is not None and column.datatype in _NUMERIC_TABLES else _STRING_DTYPE)
+            return pd.Series(dtypes, index=names, dtype=object)
+
+    def __len__(self) -> int:
+        with self._read() as (_, directory, _):
+            return len(self._row_range(directory))
+
+    def __repr__(self) -> str:
+        with self._read() as (fb_buf, directory, _):
+            return f"FlatbufferFrame({len(self._row_range(directory))} rows x {len(self._names(fb_buf, directory))} columns)"
+
+    def __getitem__(self, key):
+        """
+            frame["col"] returns the column as a pd.Series; frame[["col", ...]] returns a lazy
+            frame of those columns.
+        """
+        if isinstance(key, str):
+            with self._read() as (fb_buf, directory, version):
+                rows = self._row_range(directory)
+                return pd.Series(_pandas_values(self._values(fb_buf, directory, version, key, rows)), index=_index(rows), name=key)
+        columns = list(key)
+        with self._read() as (fb_buf, directory, _):
+            for name in columns:
+                directory.columns(fb_buf, name)
+        return self._select(columns=columns)
+
+    @property
+    def iloc(self) -> "_ILocIndexer":
+        """
+            Selects rows by position: frame.iloc[start:stop:step] returns a lazy frame of those
+            rows and frame.iloc[i] returns row i as a pd.Series.
+        """
+        return _ILocIndexer(self)
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """
+            Returns the first n rows as a pd.Dataframe, like DataFrame.head.
+        """
+        return self.iloc[:n].to_pandas()
+
+    def to_pandas(self, columns: list = None) -> pd.DataFrame:
+        """
+            Decodes the selected rows of the given columns (default: all selected columns) into a
+            pd.DataFrame.
+
+            @param columns: optional list of column names.
+        """
+        with self._read() as (fb_buf, directory, version):
+            names = self._names(fb_buf, directory) if columns is None else list(columns)
+            rows = self._row_range(directory)
+            data = {name: _pandas_values(self._values(fb_buf, directory, version, name, rows)) for name in names}
+        return pd.DataFrame(data, index=_index(rows), columns=names)
+
+    def _values(self, fb_buf: memoryview, directory: FbFrameDirectory, version: int, name: str, rows: range) -> np.ndarray:
+        """
+            Returns the values of a column in the given rows, as an array of its original dtype
+            that does not alias fb_buf.
+        """
+        columns = directory.columns(fb_buf, name)
+        low, high = (min(rows[0], rows[-1]), max(rows[0], rows[-1]) + 1) if rows else (0, 0)
+        cached = self._cache is not None and bool(columns) and columns[0].datatype not in _NUMERIC_TABLES
+        # In-place maps only change numeric columns, so decoded strings stay valid for a version.
+        key = (version, name, low, high)
+        if cached and key in self._cache:
+            self._cache.move_to_end(key)
+            values = self._cache[key]
+        else:
+            values = _rows_values(fb_buf, directory, name, low, high)
+            if cached:
+                self._cache[key] = values
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        if rows.step != 1 and len(rows) > 1:
+            return values[np.arange(len(rows)) * rows.step + (rows[0] - low)]
+        # Numeric values may be views of fb_buf, which is released after the call.
+        return values.copy() if values.base is not None else values
+
+
+class _ILocIndexer:
+    """
+        FlatbufferFrame.iloc.
+    """
+    def __init__(self, frame: FlatbufferFrame):
+        self._frame = frame
+
+    def __getitem__(self, key):
+        frame = self._frame
+        with frame._read() as (_, directory, _):
+            rows = frame._row_range(directory)
+        if isinstance(key, slice):
+            return frame._select(rows=rows[key])
+        if isinstance(key, (int, np.integer)):
+            row = rows[key]
+            return frame._select(rows=range(row, row + 1)).to_pandas().iloc[0]
+        raise TypeError(f"FlatbufferFrame.iloc takes an int or a slice, not {type(key).__name__}")
+
+
+def _index(rows: range) -> pd.Index:
+    return pd.RangeIndex(rows.start, rows.stop, rows.step)
@@ -0,0 +1,173 @@
+"""
+    Cross-process reader/writer locks of a shared memory store.
+
+    The locks are fcntl byte-range locks (lockf) on a lock file next to the store, in the
+    temporary directory or the directory of a store kept in files: byte 0 guards the catalog and
+    allocator, and every dataframe has a byte of its own, chosen by the hash of its name. Shared
+    locks never wait for each other, so readers only wait for writers of the same dataframe;
+    exclusive locks wait for everyone on their byte. Locking the whole file pauses all readers
+    and writers.
+
+    Two more ranges serve the versions of dataframes: every dataframe has a writer byte, which
+    its writers hold exclusively while they derive its next version, and every version (catalog
+    generation) has a pin byte, which its readers hold shared for as long as they use it.
+
+    fcntl locks belong to the process: the locks of one process never conflict with each other,
+    and closing any descriptor of the file releases all of them. Every process therefore opens a
+    lock file once and keeps it open while it has a store open, and a byte must not be locked again
+while it is held.
+"""
+
+import contextlib
+import errno
+import fcntl
+import os
+import tempfile
+
+from fb_catalog import _hash_name
+
+# Lock file descriptors of this process, by path.
+_lock_files = dict()
+# The number of open FbStoreLocks of this process, by lock file path.
+_lock_users = dict()
+# The number of pins this process holds on a version, by (lock file descriptor, generation).
+_pins = dict()
+
+# Dataframe lock bytes are spread over this many positions after the catalog byte, followed by
+# as many writer bytes and then the pin bytes of the generations.
+_FRAME_LOCK_RANGE = 1 << 60
+_WRITER_LOCKS = 1 + _FRAME_LOCK_RANGE
+_PIN_LOCKS = _WRITER_LOCKS + _FRAME_LOCK_RANGE
+
+
+class FbStoreLocks:
+    """
+        The reader/writer locks of the store called store_name, see the module docstring.
+    """
+    def __init__(self, store_name: str, directory: str = None):
+        self.path = os.path.join(directory or tempfile.gettempdir(), f"{store_name}.lock")
+        if self.path not in _lock_files:
+            _lock_files[self.path] = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            _lock_users[self.path] = 0
+        _lock_users[self.path] += 1
+        self.fd = _lock_files[self.path]
+        self.closed = False
+
+    def catalog(self, exclusive: bool = False) -> contextlib.AbstractContextManager:
+        """
+            Locks the catalog and allocator; exclusive to change them, shared to read them.
+        """
+        return self._lock(0, 1, exclusive)
+
+    def frame(self, name: str, exclusive: bool = False) -> contextlib.AbstractContextManager:
+        """
+            Locks the dataframe called name; exclusive to write, move or free its bytes, shared to
+            read them.
+        """
+        return self._lock(1 + _hash_name(name.encode("utf-8")) % _FRAME_LOCK_RANGE, 1, exclusive)
+
+    def writer(self, name: str) -> contextlib.AbstractContextManager:
+        """
+            Serializes the writers of the dataframe called name: held from reading its current
+            version until its next version is published. Readers never take it.
+        """
+        return self._lock(_WRITER_LOCKS + _hash_name(name.encode("utf-8")) % _FRAME_LOCK_RANGE, 1, True)
+
+    def pin(self, generation: int) -> None:
+        """
+            Pins the dataframe version generation: until it is unpinned, it is not written in
+            place, moved or freed. Pins of one process are counted, and the first one locks.
+        """
+        key = (self.fd, generation)
+        if key not in _pins:
+            _lockf(self.fd, fcntl.LOCK_SH, 1, _PIN_LOCKS + generation)
+            _pins[key] = 0
+        _pins[key] += 1
+
+    def unpin(self, generation: int) -> bool:
+        """
+            Releases a pin of the dataframe version generation. Returns whether it was the last
+            one of this process.
+        """
+        key = (self.fd, generation)
+        _pins[key] -= 1
+        if _pins[key]:
+            return False
+        del _pins[key]
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, _PIN_LOCKS + generation)
+        return True
+
+    def pinned(self, generation: int = None) -> bool:
+        """
+            Returns whether this process pins the dataframe version generation, or by default any
+            version in the store.
+        """
+        if generation is None:
+            return any(fd == self.fd for fd, _ in _pins)
+        return (self.fd, generation) in _pins
+
+    def unpinned(self, generation: int) -> bool:
+        """
+            Returns whether no process pins the dataframe version generation, without waiting.
+        """
+        if self.pinned(generation):
+            return False
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, _PIN_LOCKS + generation)
+        except OSError:
+            return False
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, _PIN_LOCKS + generation)
+        return True
+
+    def version(self, generation: int) -> contextlib.AbstractContextManager:
+        """
+            Waits until no process pins the dataframe version generation and keeps new pins out,
+            to write it in place. Raises RuntimeError if this process pins it.
+        """
+        if self.pinned(generation):
+            raise RuntimeError(f"version {generation} is pinned by this process")
+        return self._lock(_PIN_LOCKS + generation, 1, True)
+
+    def store(self) -> contextlib.AbstractContextManager:
+        """
+            Locks the catalog and all dataframes exclusively, waiting for all readers and writers.
+        """
+        return self._lock(0, 0, True)
+
+    def close(self) -> None:
+        """
+            Lets go of the lock file. The last FbStoreLocks of the process on it closes it, unless
+            the process still pins a version there: closing would release the pins.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        _lock_users[self.path] -= 1
+        if not _lock_users[self.path] and not self.pinned():
+            del _lock_files[self.path], _lock_users[self.path]
+            os.close(self.fd)
+
+    @contextlib.contextmanager
+    def _lock(self, start: int, length: int, exclusive: bool):
+        """
+            Holds a lock on length bytes (0: up to the end of any file) from start.
+        """
+        _lockf(self.fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH, length, start)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start)
+
+
+def _lockf(fd: int, cmd: int, length: int, start: int) -> None:
+    """
+        fcntl.lockf, raising RuntimeError instead of OSError(EDEADLK) when the kernel finds that
+        waiting would deadlock with another process, like the checks of this process's own pins.
+    """
+    try:
+        fcntl.lockf(fd, cmd, length, start)
+    except OSError as e:
+        if e.errno != errno.EDEADLK:
+            raise
+        raise RuntimeError("waiting for this lock would deadlock with another process; a process that pins a "
+                           "dataframe version must not write that dataframe while another process maps it in place") from e
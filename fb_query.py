@@ -0,0 +1,195 @@
+"""
+    Queries with projection and predicate pushdown over flatbuffer dataframes.
+
+    fb_dataframe_query(fb_bytes, select=["a", "b"], where=(column("x") > 5) & (column("s") == "NY"))
+    evaluates the where clause over the columns in the flatbuffer into a boolean selection of the
+    rows, and then decodes only the selected rows of the selected columns.
+
+    Numeric parts of the where clause are fb_expression expressions evaluated over views of the
+    column vectors. Comparisons of a string column with a string never decode the column:
+    dictionary-encoded columns are matched by binary searching their sorted dictionary and
+    comparing codes, and plain string columns by comparing the bytes of every value in place.
+"""
+
+import numpy as np
+import pandas as pd
+
+from Dataframe import DataType, DictStringData, StringData
+from fb_dataframe import FbFrameDirectory, FbColumn, _NUMERIC_TABLES, _column_array, _concat_values, _data_table, _dictionary_values, _pandas_values
+from fb_expression import Expr
+
+# The operations that compare a string column with a string.
+_STRING_COMPARISONS = ("equal", "not_equal", "startswith")
+
+
+def fb_dataframe_query(fb_bytes: bytes, select: list = None, where: Expr = None) -> pd.DataFrame:
+    """
+        Returns the rows of the Flatbuffer Dataframe for which where holds, with the columns in
+        select, as a Pandas Dataframe like df.loc[mask, select]: the index holds the positions of
+        the rows.
+
+        where refers to columns by name with fb_expression.column and may combine, with &, | and
+        ~, comparisons and arithmetic of numeric columns and comparisons of string columns with a
+        string: ==, != and startswith, e.g.
+
+            (column("price") * column("qty") > 100) & column("city").startswith("New ")
+
+        @param fb_bytes: bytes of the Flatbuffer Dataframe.
+        @param select: optional list of column names, default all columns.
+        @param where: optional boolean expression, default all rows.
+    """
+    return _fb_dataframe_query(fb_bytes, FbFrameDirectory(fb_bytes), select, where)
+
+
+def _fb_dataframe_query(fb_bytes: bytes, directory: FbFrameDirectory, select: list, where: Expr) -> pd.DataFrame:
+    """
+        fb_dataframe_query with the flatbuffer's directory.
+    """
+    names = directory.column_names(fb_bytes) if select is None else list(select)
+    if not directory.row_groups:
+        return pd.DataFrame({name: [] for name in names})
+
+    indices = list()
+    data = {name: list() for name in names}
+    position = 0
+    for row_group_number, row_group in enumerate(directory.row_groups):
+        if where is None:
+            rows = np.arange(row_group.num_rows)
+        else:
+            rows = np.flatnonzero(_where_mask(fb_bytes, directory, row_group_number, where))
+        for name in names:
+            data[name].append(_selected_values(fb_bytes, _find(fb_bytes, directory, row_group_number, name), rows))
+        indices.append(rows + position)
+        position += row_group.num_rows
+
+    columns = {name: _pandas_values(_concat_values(parts)) for name, parts in data.items()}
+    return pd.DataFrame(columns, index=pd.Index(_concat_values(indices)), columns=names)
+
+
+def _find(fb_bytes: bytes, directory: FbFrameDirectory, row_group: int, name: str) -> FbColumn:
+    column = directory.column(fb_bytes, row_group, name)
+    if column is None:
+        raise KeyError(name)
+    return column
+
+
+def _where_mask(fb_bytes: bytes, directory: FbFrameDirectory, row_group: int, where: Expr) -> np.ndarray:
+    """
+        Evaluates a where clause over the rows of a row group into a boolean array.
+    """
+    if where.op in ("logical_and", "logical_or"):
+        left = _where_mask(fb_bytes, directory, row_group, where.args[0])
+        if where.op == "logical_and" and not left.any():
+            return left
+        right = _where_mask(fb_bytes, directory, row_group, where.args[1])
+        return left & right if where.op == "logical_and" else left | right
+    elif where.op == "logical_not":
+        return ~_where_mask(fb_bytes, directory, row_group, where.args[0])
+    elif where.op in _STRING_COMPARISONS:
+        mask = _string_comparison_mask(fb_bytes, directory, row_group, where)
+        if mask is not None:
+            return mask
+
+    columns = dict()
+    for name in where.columns():
+        if name is None:
+            raise ValueError("where clauses refer to columns by name, e.g. column(\"x\") > 5")
+        column = _find(fb_bytes, directory, row_group, name)
+        if column.datatype not in _NUMERIC_TABLES:
+            raise TypeError(f"column '{name}' holds strings, which can only be compared with a string by ==, != or startswith")
+        columns[name] = _column_array(fb_bytes, column).astype(column.dtype, copy=False)
+    num_rows = directory.row_groups[row_group].num_rows
+    return np.broadcast_to(where.evaluate(columns), num_rows).astype(bool)
+
+
+def _string_comparison_mask(fb_bytes: bytes, directory: FbFrameDirectory, row_group: int, where: Expr) -> np.ndarray:
+    """
+        Evaluates a comparison of a string column with a string, or returns None if where is
+        not one.
+    """
+    column_expr, value_expr = where.args
+    if where.op != "startswith" and column_expr.op == "lit":
+        column_expr, value_expr = value_expr, column_expr
+    if column_expr.op != "col" or value_expr.op != "lit" or not isinstance(value_expr.args[0], str):
+        return None
+
+    name, value = column_expr.args[0], value_expr.args[0].encode("utf-8")
+    column = _find(fb_bytes, directory, row_group, name)
+    if column.datatype in _NUMERIC_TABLES:
+        raise TypeError(f"column '{name}' is numeric and cannot be compared with a string")
+    prefix = where.op == "startswith"
+    if column.datatype == DataType.DataType().DICT_STRING:
+        mask = _dictionary_matches(fb_bytes, column, value, prefix)
+    else:
+        mask = _string_matches(fb_bytes, column, value, prefix)
+    return ~mask if where.op == "not_equal" else mask
+
+
+def _dictionary_matches(fb_bytes: bytes, column: FbColumn, value: bytes, prefix: bool) -> np.ndarray:
+    """
+        Matches the rows of a dictionary-encoded string column equal to, or starting with, value.
+        The dictionary is sorted by its utf-8 bytes, so the matching values are one range of
+        codes, found by binary search.
+    """
+    dict_data = _data_table(fb_bytes, column, DictStringData.DictStringData)
+    size = dict_data.DictionaryLength()
+    low = _bisect(size, lambda j: dict_data.Dictionary(j) < value)
+    if prefix:
+        high = _bisect(size, lambda j: dict_data.Dictionary(j)[:len(value)] <= value, low)
+    else:
+        high = low + 1 if low < size and dict_data.Dictionary(low) == value else low
+    codes = _column_array(fb_bytes, column)
+    return (codes >= low) & (codes < high)
+
+
+def _bisect(size: int, before, low: int = 0) -> int:
+    """
+        Returns the first j in [low, size) for which before(j) is false, or size; before must be
+        true up to some j and false from there on.
+    """
+    high = size
+    while low < high:
+        mid = (low + high) // 2
+        if before(mid):
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def _string_matches(fb_bytes: bytes, column: FbColumn, value: bytes, prefix: bool) -> np.ndarray:
+    """
+        Matches the rows of a plain string column equal to, or starting with, value by comparing
+        the bytes of the strings in place, one byte position at a time for the rows still matching.
+    """
+    data = np.frombuffer(fb_bytes, dtype=np.uint8)
+    # Every element of the string vector holds the distance from itself to its string, which is
+    # a uint32 length followed by the bytes.
+    elements = column.offset + 4 * np.arange(column.length, dtype=np.int64)
+    starts = elements + np.frombuffer(fb_bytes, dtype="<u4", count=column.length, offset=column.offset)
+    lengths = sum(data[starts + i].astype(np.int64) << (8 * i) for i in range(4))
+
+    rows = np.flatnonzero(lengths >= len(value) if prefix else lengths == len(value))
+    starts = starts[rows] + 4
+    for i, byte in enumerate(value):
+        matching = data[starts + i] == byte
+        rows, starts = rows[matching], starts[matching]
+
+    mask = np.zeros(column.length, dtype=bool)
+    mask[rows] = True
+    return mask
+
+
+def _selected_values(fb_bytes: bytes, column: FbColumn, rows: np.ndarray) -> np.ndarray:
+    """
+        Returns the values of the given rows of a column as an array of its original dtype that
+        does not alias fb_bytes.
+    """
+    if column.datatype in _NUMERIC_TABLES:
+        return _column_array(fb_bytes, column)[rows].astype(column.dtype, copy=False)
+    elif column.datatype == DataType.DataType().DICT_STRING:
+        dict_data = _data_table(fb_bytes, column, DictStringData.DictStringData)
+        return _dictionary_values(dict_data, _column_array(fb_bytes, column)[rows])
+
+    string_data = _data_table(fb_bytes, column, StringData.StringData)
+    return np.array([string_data.Data(j).decode("utf-8") for j in rows.tolist()], dtype=object)
@@ -1,61 +1,514 @@
+import contextlib
 import dill
-import hashlib
+import mmap
+import multiprocessing
+import numpy as np
+import os
 import pandas as pd
 import types
+import typing
 
 from multiprocessing import shared_memory
 
-from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by_sum, fb_dataframe_map_numeric_column
+from fb_catalog import FbCatalog, FbCatalogEntry
+from fb_dataframe import FbChunkedWriter, to_flatbuffer, fb_frame_directory, FbFrameDirectory
+from fb_frame import FlatbufferFrame
+from fb_locks import FbStoreLocks
+from fb_expression import Expr
+from fb_query import _fb_dataframe_query
+from fb_dataframe import _copy_except_column, _fb_dataframe_head, _fb_dataframe_slice, _frame_summary, _group_by_keys, _group_by_partial, _group_by_result, _map_numeric_column_rows, _merge_group_by_partials
+
+
+# The size of new dataframe segments; larger dataframes get a segment of their own size.
+SEGMENT_SIZE = 200000000
+# The space first allocated for a chunked dataframe; it doubles whenever it is full.
+CHUNKS_INITIAL_SIZE = 1 << 20
+
+def _retired_name(generation: int) -> str:
+    """
+        Returns the catalog name under which a replaced or deleted dataframe version is kept until
+        its last reader releases it.
+    """
+    return f"\0{generation}"
+
+def _segment_name(store_name: str, segment: int) -> str:
+    """
+        Returns the shared memory name of a dataframe segment of a store: CS598, CS598_1, CS598_2,
+        ... for the store CS598.
+    """
+    return store_name if segment == 0 else f"{store_name}_{segment}"
+
+
+class _MappedFile:
+    """
+        A segment kept in a file and memory-mapped, with the name, buf, size and close of
+        shared_memory.SharedMemory.
+    """
+    def __init__(self, path: str, size: int = 0):
+        """
+            @param path: path of the file; it is created with size bytes if size is given, and
+                must exist otherwise.
+        """
+        fd = os.open(path, os.O_RDWR | (os.O_CREAT | os.O_EXCL if size else 0), 0o666)
+        try:
+            if size:
+                # The file is sparse: disk space is only used for the pages written.
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self._mmap = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        self.name = path
+        self.buf = memoryview(self._mmap)
+
+    def flush(self) -> None:
+        """
+            Writes the changed pages to the file.
+        """
+        self._mmap.flush()
+
+    def close(self) -> None:
+        self.buf.release()
+        self._mmap.close()
+
+def _open_segment(name: str, path: str = None, size: int = 0):
+    """
+        Attaches to the segment called name, or creates it with size bytes if size is given: a
+        shared memory segment, or the memory-mapped file name in the directory path.
+    """
+    if path is None:
+        return shared_memory.SharedMemory(name = name, create=size > 0, size=size)
+    return _MappedFile(os.path.join(path, name), size)
+
+
+# The dataframe segment as attached by a worker process of a parallel group-by or map.
+_worker_shared_memory = None
+# The map_func of a parallel map, loaded once per worker process.
+_worker_map_func = None
+
+def _attach_worker(segment_name: str, path: str = None) -> None:
+    """
+        Pool initializer: attaches the worker process to the dataframe segment once.
+    """
+    global _worker_shared_memory
+    _worker_shared_memory = _open_segment(segment_name, path)
+
+def _group_by_worker(offset: int, len_fb_df: int, keys: list, aggs: dict, start: int, stop: int) -> tuple:
+    """
+        Computes the partial group-by of rows [start, stop) of the flatbuffer at offset in the
+        attached segment.
+    """
+    fb_buf = _worker_shared_memory.buf[offset:offset + len_fb_df]
+    return _group_by_partial(fb_buf, keys, aggs, start, stop)
+
+def _attach_map_worker(segment_name: str, path: str, map_func_bytes: bytes, source_segment_name: str = None) -> None:
+    """
+        Pool initializer of a parallel map: attaches to the dataframe segment, and the segment of
+        the version mapped from if it is another one, and loads map_func.
+    """
+    global _worker_map_func, _worker_source_memory
+    _attach_worker(segment_name, path)
+    _worker_source_memory = _worker_shared_memory if source_segment_name in (None, segment_name) else _open_segment(source_segment_name, path)
+    _worker_map_func = dill.loads(map_func_bytes)
+
+def _map_worker(offset: int, len_fb_df: int, col_name: str, vectorized: bool, start: int, stop: int, source_offset: int = None) -> None:
+    """
+        Maps rows [start, stop) of a column of the flatbuffer at offset in the attached segment in
+        place, or from the flatbuffer at source_offset in the source segment if given.
+    """
+    fb_buf = _worker_shared_memory.buf[offset:offset + len_fb_df]
+    source = None if source_offset is None else _worker_source_memory.buf[source_offset:source_offset + len_fb_df]
+    _map_numeric_column_rows(fb_buf, col_name, _worker_map_func, vectorized, start, stop, source=source)
+    fb_buf.release()
+    if source is not None:
+        source.release()
 
 
 class FbSharedMemory:
     """
         Class for managing the shared memory for holding flatbuffer dataframes.
+
+        The dataframes live in a chain of segments, CS598, CS598_1, ..., that grows on demand. The
+        catalog (in CS598_hash) records the segment of every dataframe, and segments created by
+        other processes are attached the first time one of their dataframes is used.
+
+        Processes synchronize through the locks of fb_locks. Readers pin the current version of
+        a dataframe (see snapshot), and writers of the same dataframe take turns. In-place maps
+        wait for the readers of the version they write; copy-on-write maps, replacing and
+        deleting publish a new catalog entry instead, and the old version is kept as a retired
+        entry until its last reader releases it. Compaction locks the whole store. Dataframes are
+        written into space no other process can see before their catalog entry is published.
+
+        Given a path, the store keeps the same segments and catalog in memory-mapped files in that
+        directory instead, which outlive the processes and restarts of the machine: reopening
+        the store maps the files, and the pages of a dataframe are read from disk when it is first
+        used. Changes reach the files when the operating system writes them back or at flush.
     """
-    def __init__(self):
+    def __init__(self, name: str = "CS598", segment_size: int = None, path: str = None):
+        """
+            @param name: name of the store, which prefixes the names of its shared memory segments.
+            @param segment_size: size of new dataframe segments, default SEGMENT_SIZE.
+            @param path: optional directory holding the store in files instead of shared memory.
+        """
+        self.name = name
+        self.segment_size = segment_size or SEGMENT_SIZE
+        self.path = path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
         try:
-            self.df_shared_memory = shared_memory.SharedMemory(name = "CS598")
-            self.hashmap_shared_memory = shared_memory.SharedMemory(name = "CS598_hash")
+            self.df_shared_memory = _open_segment(name, path)
+            self.hashmap_shared_memory = _open_segment(f"{name}_hash", path)
+            self.catalog = FbCatalog(self.hashmap_shared_memory.buf)
         except FileNotFoundError:
-            # Shared memory is not created yet, create it with size 200M.
-            self.df_shared_memory = shared_memory.SharedMemory(name = "CS598", create=True, size=200000000)
-            self.hashmap_shared_memory = shared_memory.SharedMemory(name="CS598_hash", create=True, size=20000000)
+            # Shared memory is not created yet, create the first segment.
+            self.df_shared_memory = _open_segment(name, path, size=self.segment_size)
+            self.hashmap_shared_memory = _open_segment(f"{name}_hash", path, size=20000000)
+
+            # The name -> (segment, offset, length) catalog, see fb_catalog.
+            self.catalog = FbCatalog.create(self.hashmap_shared_memory.buf)
+
+        # The attached dataframe segments, by number.
+        self.segments = [self.df_shared_memory]
+        self.locks = FbStoreLocks(name, path)
 
-            # Add more initialization steps if needed here...
+    def _segment(self, segment: int) -> shared_memory.SharedMemory:
+        """
+            Returns a dataframe segment, attaching it (and the ones before it) first if needed.
+        """
+        while len(self.segments) <= segment:
+            self.segments.append(_open_segment(_segment_name(self.name, len(self.segments)), self.path))
+        return self.segments[segment]
 
-        # Add other class members you need here...
-        self.offset = 0
-        self.name_fbdf_hashmap = dict()
+    def _allocate(self, size: int) -> tuple:
+        """
+            Allocates size bytes and returns their (segment, offset). Starts a new segment, of at
+            least size bytes, when the free space is too small.
+        """
+        with self.locks.catalog(exclusive=True):
+            last = self.catalog.segments - 1
+            try:
+                return self.catalog.allocate(size, self._segment(last).size)
+            except MemoryError:
+                pass
+            segment = _open_segment(_segment_name(self.name, last + 1), self.path, size=max(self.segment_size, (size + 7) & ~7))
+            self.segments.append(segment)
+            self.catalog.add_segment(self._segment(last).size)
+            return self.catalog.allocate(size, segment.size)
 
-    def add_dataframe(self, name: str, df: pd.DataFrame) -> None:
+    def _free(self, segment: int, offset: int, size: int) -> None:
+        """
+            Frees size allocated bytes at offset in segment.
+        """
+        with self.locks.catalog(exclusive=True):
+            self.catalog.free(segment, offset, size)
+
+    def add_dataframe(self, name: str, df: pd.DataFrame, downcast: bool = False) -> None:
         """
             Adds a dataframe into the shared memory. Does nothing if a dataframe with 'name' already exists.
 
             @param name: name of the dataframe.
             @param df: the dataframe to add to shared memory.
+            @param downcast: store numeric columns in the narrowest lossless type (see to_flatbuffer).
         """
         # YOUR CODE HERE...
-        fb_df = to_flatbuffer(df)
-        self.df_shared_memory.buf[self.offset:self.offset+len(fb_df)] = bytes(fb_df)
-        self.name_fbdf_hashmap[name] = [self.offset, len(fb_df)]
-        self.offset += len(fb_df)
-        hashmap_bytestring = dill.dumps(self.name_fbdf_hashmap)
-        self.hashmap_shared_memory.buf[:len(hashmap_bytestring)] = hashmap_bytestring
+        if self._exists(name):
+            return
+        self._add_dataframe(name, df, downcast, replace=False)
+
+    def _add_dataframe(self, name: str, df: pd.DataFrame, downcast: bool, replace: bool) -> None:
+        """
+            Writes df into newly allocated space and publishes it as name (see _publish).
+        """
+        # Allocate the planned size and build the flatbuffer in place; it ends at the end of the
+        # allocation.
+        regions = list()
+        def reserve(planned_size: int) -> memoryview:
+            size = (planned_size + 7) & ~7
+            segment, offset = self._allocate(size)
+            regions.append((segment, offset, self._segment(segment).buf[offset:offset + size]))
+            return regions[0][2]
+        try:
+            fb_df = to_flatbuffer(df, reserve, downcast=downcast)
+        except:
+            for segment, offset, region in regions:
+                self._release_region(segment, offset, region)
+            raise
+        segment, offset, region = regions[0]
+        size = len(region)
+        len_fb_df = len(fb_df)
+        fb_df.release()
+        region.release()
+
+        # The planned size is an upper bound; give back the unused space before the flatbuffer.
+        unused = (size - len_fb_df) & ~7
+        if unused:
+            self._free(segment, offset, unused)
+        self._publish(name, segment, offset + size - len_fb_df, len_fb_df, replace)
+
+    def add_dataframe_chunks(self, name: str, chunks: typing.Iterable[pd.DataFrame], downcast: bool = False) -> None:
+        """
+            Streams dataframe chunks (e.g., pd.read_csv(path, chunksize=...)) into the shared memory as
+            a chunked flatbuffer. Each chunk is encoded directly into the shared memory as it arrives,
+            so the full dataframe never has to be held in memory.
+
+            @param name: name of the dataframe.
+            @param chunks: the dataframe chunks, all with the same columns and dtypes.
+            @param downcast: store numeric columns in the narrowest lossless type (see to_flatbuffer).
+        """
+        if self._exists(name):
+            return
+
+        # The final size is unknown until the last chunk, so the chunks are written into an
+        # allocation that is moved to one twice as large whenever it fills up.
+        regions = list()
+        def grow(size: int) -> memoryview:
+            new_size = max(2 * len(regions[0][2]) if regions else CHUNKS_INITIAL_SIZE, (size + 7) & ~7)
+            segment, offset = self._allocate(new_size)
+            region = self._segment(segment).buf[offset:offset + new_size]
+            if regions:
+                region[:writer.position] = regions[0][2][:writer.position]
+                self._release_region(*regions.pop())
+            regions.append((segment, offset, region))
+            return region
+        writer = FbChunkedWriter(grow(0), downcast=downcast, grow=grow)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+            len_fb_df = writer.close()
+        except:
+            self._release_region(*regions.pop())
+            raise
+        segment, offset, region = regions.pop()
+
+        # Give back the unused end of the allocation.
+        used = (len_fb_df + 7) & ~7
+        self._release_region(segment, offset + used, region[used:])
+        region.release()
+        self._publish(name, segment, offset, len_fb_df, replace=False)
+
+    def _release_region(self, segment: int, offset: int, region: memoryview) -> None:
+        """
+            Releases a view of allocated space at offset in segment, and frees that space.
+        """
+        size = len(region)
+        region.release()
+        if size:
+            self._free(segment, offset, size)
+
+    def delete_dataframe(self, name: str) -> None:
+        """
+            Removes a dataframe from the shared memory and frees its space. Raises KeyError if there
+            is no dataframe with 'name'.
+
+            @param name: name of the dataframe.
+        """
+        with self.locks.writer(name), self.locks.frame(name, exclusive=True), self.locks.catalog(exclusive=True):
+            self._retire(self.catalog.delete(name))
+
+    def replace_dataframe(self, name: str, df: pd.DataFrame, downcast: bool = False) -> None:
+        """
+            Adds a dataframe into the shared memory, replacing the dataframe with 'name' if there
+            is one. The new dataframe is written before the catalog entry is switched to it, and
+            the old one is freed once its readers have released it.
+
+            @param name: name of the dataframe.
+            @param df: the dataframe to add to shared memory.
+            @param downcast: store numeric columns in the narrowest lossless type (see to_flatbuffer).
+        """
+        self._add_dataframe(name, df, downcast, replace=True)
+
+    def compact(self) -> None:
+        """
+            Defragments the shared memory: moves all dataframes, in (segment, offset) order, as far
+            towards the start of the first segment as they fit, so that the free space is at the
+            end of the segments. Waits for all readers and writers and keeps them waiting until it
+            is done; buffers returned by _get_fb_buf before are invalid after, and this process
+            must not hold a snapshot. Retired versions are freed.
+        """
+        with self.locks.store():
+            self._compact()
+
+    def _compact(self) -> None:
+        segment, end = 0, 0
+        free_extents = list()
+        entries = list()
+        # No process pins a version now, so retired versions are dropped rather than moved.
+        live_entries = (entry for entry in self.catalog.entries() if not entry.name.startswith("\0"))
+        for entry in sorted(live_entries, key=lambda entry: (entry.segment, entry.offset)):
+            # Allocations are 8-byte aligned; keep each frame at the same position within them.
+            start = entry.offset & ~7
+            size = ((entry.offset + entry.length + 7) & ~7) - start
+            while end + size > self._segment(segment).size:
+                free_extents.append((segment, end, self._segment(segment).size - end))
+                segment, end = segment + 1, 0
+            if (segment, end) != (entry.segment, start):
+                # A frame only ever moves towards the start, so overlapping copies are safe.
+                source = np.frombuffer(self._segment(entry.segment).buf, dtype=np.uint8, count=size, offset=start)
+                np.frombuffer(self._segment(segment).buf, dtype=np.uint8, count=size, offset=end)[:] = source
+                del source
+            entries.append(entry._replace(segment=segment, offset=end + entry.offset - start))
+            end += size
+
+        # Segments emptied by the compaction stay attached and are reused.
+        last = self.catalog.segments - 1
+        for empty_segment in range(segment, last):
+            free_extents.append((empty_segment, end, self._segment(empty_segment).size - end))
+            end = 0
+        self.catalog.rebuild(entries, end)
+        for free_segment, offset, size in free_extents:
+            if size & ~7:
+                self.catalog.free(free_segment, offset, size & ~7)
+
+    def _exists(self, name: str) -> bool:
+        try:
+            self._lookup(name)
+            return True
+        except KeyError:
+            return False
+
+    def _lookup(self, name: str) -> FbCatalogEntry:
+        """
+            Returns the catalog entry of the dataframe called name. Raises KeyError if there is none.
+        """
+        with self.locks.catalog():
+            return self.catalog.lookup(name)
+
+    def _publish(self, name: str, segment: int, offset: int, len_fb_df: int, replace: bool) -> None:
+        """
+            Publishes the dataframe at offset in segment to the other processes by writing its
+            catalog entry. If a dataframe called name exists already, it is retired when replace
+            is set, and otherwise the new dataframe is freed.
+        """
+        with self.locks.writer(name):
+            self._swap(name, segment, offset, len_fb_df, replace)
+
+    def _swap(self, name: str, segment: int, offset: int, len_fb_df: int, replace: bool) -> None:
+        """
+            _publish for a caller that holds the dataframe's writer lock.
+        """
+        fb_buf = self._segment(segment).buf[offset:offset + len_fb_df]
+        summary = _frame_summary(fb_buf)
+        fb_buf.release()
+
+        with self.locks.frame(name, exclusive=True), self.locks.catalog(exclusive=True):
+            try:
+                old_entry = self.catalog.lookup(name)
+            except KeyError:
+                old_entry = None
+            if old_entry is not None and not replace:
+                self.catalog.free(segment, offset, len_fb_df)
+                return
+            self.catalog.put(name, offset, len_fb_df, *summary, segment=segment)
+            if old_entry is not None:
+                self._retire(old_entry)
 
+    def _retire(self, entry: FbCatalogEntry) -> None:
+        """
+            Frees a dataframe version that is no longer in the catalog under its name, or keeps it
+            as a retired entry while readers pin it. The caller holds the catalog lock exclusively.
+        """
+        if self.locks.unpinned(entry.generation):
+            self.catalog.free(entry.segment, entry.offset, entry.length)
+        else:
+            self.catalog.put(_retired_name(entry.generation), entry.offset, entry.length, entry.num_rows,
+                             entry.num_columns, entry.dtypes, entry.segment)
+
+    def _reclaim(self, generation: int) -> None:
+        """
+            Frees the dataframe version generation if it is retired and no longer pinned.
+        """
+        # Most versions are current when their readers finish, so look first under the shared
+        # lock and leave readers running side by side.
+        if not self._exists(_retired_name(generation)):
+            return
+        with self.locks.catalog(exclusive=True):
+            try:
+                entry = self.catalog.lookup(_retired_name(generation))
+            except KeyError:
+                return
+            if self.locks.unpinned(generation):
+                self.catalog.delete(entry.name)
+                self.catalog.free(entry.segment, entry.offset, entry.length)
+
+    @contextlib.contextmanager
+    def snapshot(self, df_name: str) -> typing.Iterator[memoryview]:
+        """
+            Pins the current version of a dataframe and yields its flatbuffer, which stays
+            unchanged until the with block ends. Copy-on-write maps, replacing and deleting the
+            dataframe meanwhile do not wait; the pinned version is freed after the last reader
+            releases it. In-place maps wait for the block to end.
+
+            While another process's in-place map of the dataframe waits for the block to end,
+            the block must not replace, delete or map the dataframe: each would wait for the
+            other. If the kernel detects this, the write raises RuntimeError; otherwise both
+            processes hang.
+
+            with fb_shm.snapshot("df") as fb_buf:
+                fb_dataframe_group_by(fb_buf, "key", {"value": "sum"})
+
+            @param df_name: name of the Dataframe.
+        """
+        with self._pinned(df_name) as entry, self._entry_buf(entry) as fb_buf:
+            yield fb_buf
+
+    @contextlib.contextmanager
+    def _pinned(self, df_name: str) -> typing.Iterator[FbCatalogEntry]:
+        """
+            Pins the current version of a dataframe and yields its catalog entry, see snapshot.
+        """
+        entry = self._lookup(df_name) if self.locks.pinned() else None
+        if entry is not None and self.locks.pinned(entry.generation):
+            # This process pins the current version already, so it is not written in place or
+            # freed meanwhile. Waiting for the dataframe lock instead could deadlock with an
+            # in-place map, which holds it while it waits for the pins to be released.
+            self.locks.pin(entry.generation)
+        else:
+            # Pin under the dataframe lock, so no writer switches versions in between.
+            with self.locks.frame(df_name):
+                entry = self._lookup(df_name)
+                self.locks.pin(entry.generation)
+        try:
+            yield entry
+        finally:
+            if self.locks.unpin(entry.generation):
+                self._reclaim(entry.generation)
+
+    def _entry_buf(self, entry: FbCatalogEntry) -> memoryview:
+        """
+            Returns the section of the dataframe segments holding the flatbuffer of a catalog entry.
+        """
+        return self._segment(entry.segment).buf[entry.offset:entry.offset + entry.length]
+
+    def _directory(self, entry: FbCatalogEntry, fb_buf: memoryview) -> FbFrameDirectory:
+        """
+            Returns the column directory of the flatbuffer of a catalog entry, parsed once per
+            version of the dataframe (see fb_frame_directory). Generations repeat across stores,
+            and a closed store's mapping can be reused by another one, so the version includes the
+            store id.
+        """
+        return fb_frame_directory(fb_buf, (self.catalog.store_id, entry.generation))
 
     def _get_fb_buf(self, df_name: str) -> memoryview:
         """
             Returns the section of the buffer corresponding to the dataframe with df_name.
             Hint: get buffer section (fb_buf) holding the flatbuffer from shared memory.
+            The caller holds the dataframe's lock while it uses the buffer.
 
             @param df_name: name of the Dataframe.
         """
-        hashmap_bytes = self.hashmap_shared_memory.buf[:20000000]
-        self.name_fbdf_hashmap = dill.loads(hashmap_bytes)
-        offset, len_fb_df = self.name_fbdf_hashmap[df_name]
+        return self._entry_buf(self._lookup(df_name))
 
-        return self.df_shared_memory.buf[offset:offset+len_fb_df]  # REPLACE THIS WITH YOUR CODE...
 
+    def frame(self, df_name: str, cache_size: int = 0) -> FlatbufferFrame:
+        """
+            Returns a lazy, pandas-like FlatbufferFrame of a dataframe, which reads only the
+            columns and rows it is asked for.
+
+            @param df_name: name of the Dataframe.
+            @param cache_size: number of decoded string columns the frame keeps.
+        """
+        self._lookup(df_name)
+        return FlatbufferFrame(self, df_name, cache_size)
 
     def dataframe_head(self, df_name: str, rows: int = 5) -> pd.DataFrame:
         """
@@ -65,10 +518,37 @@ class FbSharedMemory:
             @param df_name: name of the Dataframe.
             @param rows: number of rows to return.
         """
-        fb_bytes = bytes(self._get_fb_buf(df_name))
-        return fb_dataframe_head(fb_bytes, rows)
+        # Reads the rows straight from shared memory, so the cost does not depend on the frame size.
+        with self._pinned(df_name) as entry, self._entry_buf(entry) as fb_buf:
+            return _fb_dataframe_head(fb_buf, self._directory(entry, fb_buf), rows)
 
-    def dataframe_group_by_sum(self, df_name: str, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
+    def dataframe_slice(self, df_name: str, start: int = 0, stop: int = None, columns: list = None) -> pd.DataFrame:
+        """
+            Returns rows [start, stop) of the Flatbuffer Dataframe as a Pandas Dataframe, like
+            fb_dataframe_slice; the cost depends only on the number of rows and columns returned.
+
+            @param df_name: name of the Dataframe.
+            @param start: first row; negative counts from the end.
+            @param stop: end of the rows, None for all rows after start.
+            @param columns: optional list of column names, default all columns.
+        """
+        with self._pinned(df_name) as entry, self._entry_buf(entry) as fb_buf:
+            return _fb_dataframe_slice(fb_buf, self._directory(entry, fb_buf), start, stop, columns)
+
+    def query(self, df_name: str, select: list = None, where: Expr = None) -> pd.DataFrame:
+        """
+            Returns the rows of the Flatbuffer Dataframe for which where holds, with the columns
+            in select, as a Pandas Dataframe, see fb_dataframe_query. Only the selected rows of the
+            selected columns are decoded.
+
+            @param df_name: name of the Dataframe.
+            @param select: optional list of column names, default all columns.
+            @param where: optional boolean fb_expression expression, default all rows.
+        """
+        with self._pinned(df_name) as entry, self._entry_buf(entry) as fb_buf:
+            return _fb_dataframe_query(fb_buf, self._directory(entry, fb_buf), select, where)
+
+    def dataframe_group_by_sum(self, df_name: str, grouping_col_name: str, sum_col_name: str, parallel: int = None) -> pd.DataFrame:
         """
             Applies GROUP BY SUM operation on the flatbuffer dataframe grouping by grouping_col_name
             and summing sum_col_name. Returns the aggregate result as a Pandas dataframe.
@@ -76,26 +556,138 @@ class FbSharedMemory:
             @param df_name: name of the Dataframe.
             @param grouping_col_name: column to group by.
             @param sum_col_name: column to sum.
+            @param parallel: optional number of worker processes, see dataframe_group_by.
+        """
+        return self.dataframe_group_by(df_name, grouping_col_name, {sum_col_name: "sum"}, parallel)
+
+    def dataframe_group_by(self, df_name: str, by, aggs: dict, parallel: int = None) -> pd.DataFrame:
         """
-        fb_bytes = bytes(self._get_fb_buf(df_name))
-        return fb_dataframe_group_by_sum(fb_bytes, grouping_col_name, sum_col_name)
+            Groups the Flatbuffer Dataframe like fb_dataframe_group_by.
 
-    def dataframe_map_numeric_column(self, df_name: str, col_name: str, map_func: types.FunctionType) -> None:
+            With parallel=N the rows are split into N ranges that N worker processes group at the
+            same time. The workers attach to the shared memory segment themselves, so only the
+            dataframe's offset and their row range are sent to them; each returns per-group partial
+            aggregates, which are merged here. They read the version pinned by this process.
+
+            @param df_name: name of the Dataframe.
+            @param by: name of the column to group by, or a list of names.
+            @param aggs: maps value column names to an aggregation or a list of aggregations.
+            @param parallel: optional number of worker processes.
+        """
+        keys = _group_by_keys(by, aggs)
+        with self._pinned(df_name) as entry, self._entry_buf(entry) as fb_buf:
+            if parallel is None:
+                return _group_by_result(keys, aggs, *_group_by_partial(fb_buf, keys, aggs, directory=self._directory(entry, fb_buf)))
+
+            bounds = np.linspace(0, entry.num_rows, parallel + 1).astype(np.int64)
+            tasks = [(entry.offset, entry.length, keys, aggs, int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+            if not tasks:
+                return _group_by_result(keys, aggs, *_group_by_partial(fb_buf, keys, aggs, directory=self._directory(entry, fb_buf)))
+
+            with multiprocessing.Pool(parallel, initializer=_attach_worker, initargs=(_segment_name(self.name, entry.segment), self.path)) as pool:
+                partials = pool.starmap(_group_by_worker, tasks)
+            return _group_by_result(keys, aggs, *_merge_group_by_partials(partials))
+
+    def dataframe_map_numeric_column(self, df_name: str, col_name: str, map_func: types.FunctionType, vectorized: bool = False, workers: int = None, copy_on_write: bool = False) -> None:
         """
             Apply map_func to elements in a numeric column in the Flatbuffer Dataframe in place.
 
+            In place, the map waits until no reader uses the dataframe. With copy_on_write=True it
+            maps a copy of the dataframe instead and then switches the catalog entry to the copy,
+            so readers are never blocked: those that pinned the old version keep reading it
+            unchanged (see snapshot), and it is freed after they release it. A copy-on-write map
+            needs free space for the copy, and if map_func fails the dataframe is left unchanged.
+
+            With workers=N the rows are split into N ranges that N worker processes map at the same
+            time, for map_funcs too expensive to run on one core. The workers attach to the shared
+            memory segment and write their own rows in place. map_func is serialized with dill and
+            sent once to each worker (expressions from fb_expression as plain data), so it may be a
+            lambda but must not depend on state that only exists in this process. If map_func
+            fails in a worker of an in-place map, rows already mapped by the other workers stay
+            mapped.
+
             @param df_name: name of the Dataframe.
             @param col_name: name of the numeric column to apply map_func to.
             @param map_func: function to apply to elements in the numeric column.
+            @param vectorized: whether map_func takes and returns NumPy arrays (see fb_dataframe_map_numeric_column).
+            @param workers: optional number of worker processes.
+            @param copy_on_write: map a new version of the dataframe instead of writing in place.
         """
-        fb_dataframe_map_numeric_column(self._get_fb_buf(df_name), col_name, map_func)
+        with self.locks.writer(df_name):
+            if not copy_on_write:
+                with self.locks.frame(df_name, exclusive=True):
+                    entry = self._lookup(df_name)
+                    with self.locks.version(entry.generation):
+                        self._map_entry(entry, col_name, map_func, vectorized, workers)
+                return
 
+            # No other writer changes the current version while the writer lock is held.
+            entry = self._lookup(df_name)
+            start = entry.offset & ~7
+            size = ((entry.offset + entry.length + 7) & ~7) - start
+            segment, offset = self._allocate(size)
+            new_entry = entry._replace(segment=segment, offset=offset + entry.offset - start)
+            try:
+                # Only the mapped column is new: everything else is copied as it is, and the map
+                # writes the column's values from the current version into the copy.
+                with self._entry_buf(entry) as fb_buf, self._entry_buf(new_entry) as new_fb_buf:
+                    _copy_except_column(fb_buf, new_fb_buf, col_name, self._directory(entry, fb_buf))
+                self._map_entry(new_entry, col_name, map_func, vectorized, workers, source=entry)
+            except:
+                self._free(segment, offset, size)
+                raise
+            self._swap(df_name, new_entry.segment, new_entry.offset, new_entry.length, replace=True)
+
+    def _map_entry(self, entry: FbCatalogEntry, col_name: str, map_func: types.FunctionType, vectorized: bool, workers: int, source: FbCatalogEntry = None) -> None:
+        """
+            Maps a column of the flatbuffer of a catalog entry in place, see
+            dataframe_map_numeric_column, or from the flatbuffer of source, which entry is a copy
+            of without the column's values (see _copy_except_column).
+        """
+        if workers is None:
+            with self._entry_buf(entry) as fb_buf, contextlib.ExitStack() as stack:
+                source_buf = None if source is None else stack.enter_context(self._entry_buf(source))
+                # The copy has the same layout, so the current version's directory holds for it.
+                directory = self._directory(entry if source is None else source, fb_buf if source is None else source_buf)
+                _map_numeric_column_rows(fb_buf, col_name, map_func, vectorized, directory=directory, source=source_buf)
+            return
+
+        bounds = np.linspace(0, entry.num_rows, workers + 1).astype(np.int64)
+        source_offset = None if source is None else source.offset
+        tasks = [(entry.offset, entry.length, col_name, vectorized, int(start), int(stop), source_offset) for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+        if not tasks:
+            return
+
+        # The workers write under this process's locks.
+        initargs = (_segment_name(self.name, entry.segment), self.path, dill.dumps(map_func),
+                    None if source is None else _segment_name(self.name, source.segment))
+        with multiprocessing.Pool(len(tasks), initializer=_attach_map_worker, initargs=initargs) as pool:
+            pool.starmap(_map_worker, tasks)
+
+
+    def flush(self) -> None:
+        """
+            Writes a store kept in files (see path) to disk, so that it is reopened as it is now
+            even after a crash. Waits for the readers and writers and keeps them waiting until it
+            is done, so the files hold no half-written dataframe; this process must not hold a
+            snapshot. Does nothing for a store in shared memory.
+        """
+        if self.path is None:
+            return
+        with self.locks.store():
+            for segment in range(self.catalog.segments):
+                self._segment(segment).flush()
+            self.hashmap_shared_memory.flush()
 
     def close(self) -> None:
         """
-            Closes the managed shared memory.
+            Closes the managed shared memory: the dataframe segments, the catalog and the lock file.
         """
-        try:
-            self.df_shared_memory.close()
-        except:
-            pass
\ No newline at end of file
+        for segment in self.segments + [self.hashmap_shared_memory]:
+            try:
+                segment.close()
+            except BufferError:
+                # Views of the segment are still in use (see fb_column_view); it stays mapped
+                # until they are released.
+                pass
+        self.locks.close()
\ No newline at end of file
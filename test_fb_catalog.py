@@ -0,0 +1,221 @@
+import dill
+import pytest
+
+from Dataframe import DataType
+from fb_catalog import FbCatalog, MAX_NAME_LENGTH
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_catalog():
+    # Room for 8 entries, so probe sequences wrap and collide.
+    catalog = FbCatalog.create(memoryview(bytearray(64 + 9 * 184)))
+    assert catalog.capacity == 8
+
+    names = ["df_0", "df_1", "df_2", "grüße", "x" * MAX_NAME_LENGTH, ""]
+    for i, name in enumerate(names):
+        entry = catalog.put(name, i * 100, i + 1, num_rows=i, num_columns=2, dtypes=0b11)
+        assert entry.generation == i + 1
+    for i, name in enumerate(names):
+        assert catalog.lookup(name) == (name, i * 100, i + 1, i + 1, i, 2, 0b11, 0)
+    assert len(catalog) == len(names)
+    assert sorted(entry.name for entry in catalog.entries()) == sorted(names)
+
+    # Replacing an entry writes a new generation in the same slot.
+    assert catalog.put("df_1", 1000, 10).generation == len(names) + 1
+    assert catalog.lookup("df_1").offset == 1000
+    assert len(catalog) == len(names)
+    assert catalog.generation == len(names) + 1
+
+    catalog.data_end = 12345
+    assert FbCatalog(catalog.buf).data_end == 12345
+
+    with pytest.raises(KeyError):
+        catalog.lookup("df_9")
+    with pytest.raises(MemoryError):
+        catalog.put("df_9", 0, 0)
+    with pytest.raises(ValueError):
+        catalog.lookup("x" * (MAX_NAME_LENGTH + 1))
+    with pytest.raises(ValueError):
+        FbCatalog(memoryview(bytearray(1000)))
+
+
+def test_allocator():
+    catalog = FbCatalog.create(memoryview(bytearray(100000)))
+
+    offsets = [catalog.allocate(size, 1000) for size in (100, 50, 8, 200)]
+    assert offsets == [(0, 0), (0, 104), (0, 160), (0, 168)]
+    assert catalog.data_end == 368
+    with pytest.raises(MemoryError):
+        catalog.allocate(1000, 1000)
+
+    # Freed extents are reused first-fit and merged with their neighbours.
+    catalog.free(0, 0, 100)
+    catalog.free(0, 160, 8)
+    assert catalog.free_space() == (112, 104)
+    assert catalog.allocate(8, 1000) == (0, 0)
+    assert catalog.allocate(50, 1000) == (0, 8)
+    catalog.free(0, 104, 50)
+    assert catalog.free_space() == (104, 104)
+    assert catalog.allocate(104, 1000) == (0, 64)
+
+    # Space freed at the end shrinks the used part of the segment.
+    catalog.free(0, 168, 200)
+    assert catalog.data_end == 168
+    catalog.free(0, 0, 8)
+    catalog.free(0, 64, 104)
+    catalog.free(0, 8, 50)
+    assert catalog.data_end == 0
+    assert catalog.free_space() == (0, 0)
+
+
+def test_allocator_segments():
+    catalog = FbCatalog.create(memoryview(bytearray(100000)))
+    assert catalog.allocate(600, 1000) == (0, 0)
+
+    # A new segment starts empty; the end of the previous one becomes free space.
+    with pytest.raises(MemoryError):
+        catalog.allocate(600, 1000)
+    assert catalog.add_segment(1000) == 1
+    assert catalog.segments == 2
+    assert catalog.allocate(600, 2000) == (1, 0)
+    assert catalog.allocate(400, 2000) == (0, 600)
+    assert catalog.allocate(400, 2000) == (1, 600)
+
+    # Extents of different segments are never merged.
+    catalog.free(0, 600, 400)
+    catalog.free(1, 0, 600)
+    assert catalog.free_space() == (1000, 600)
+    catalog.free(1, 600, 400)
+    assert catalog.data_end == 0
+    assert catalog.free_space() == (400, 400)
+
+
+def test_delete():
+    catalog = FbCatalog.create(memoryview(bytearray(64 + 9 * 200)))
+    for i in range(6):
+        catalog.put(f"df_{i}", i, 1)
+
+    assert catalog.delete("df_2").offset == 2
+    assert len(catalog) == 5
+    with pytest.raises(KeyError):
+        catalog.lookup("df_2")
+    with pytest.raises(KeyError):
+        catalog.delete("df_2")
+    # Entries after the tombstone are still found, and new entries reuse it.
+    for i in (0, 1, 3, 4, 5):
+        assert catalog.lookup(f"df_{i}").offset == i
+    catalog.put("df_6", 6, 1)
+    assert len(catalog) == 6
+
+    catalog.rebuild([entry._replace(offset=entry.offset + 10) for entry in catalog.entries()], 100)
+    assert sorted(entry.offset for entry in catalog.entries()) == [10, 11, 13, 14, 15, 16]
+    assert catalog.data_end == 100
+
+
+def test_tombstones_are_rehashed():
+    catalog = FbCatalog.create(memoryview(bytearray(64 + 9 * 200)))
+    for i in range(4):
+        catalog.put(f"df_{i}", i, 1)
+    kept = {entry.name: entry for entry in catalog.entries()}
+
+    # Every new name deleted again leaves a tombstone; the table is rehashed before they fill the
+    # empty slots, which lookups of missing names stop at.
+    for i in range(100):
+        catalog.put(f"temp_{i}", 100 + i, 1)
+        catalog.delete(f"temp_{i}")
+        assert sum(catalog.buf[64 + slot * 184] == 0 for slot in range(catalog.capacity)) >= 1
+        with pytest.raises(KeyError):
+            catalog.lookup(f"temp_{i}")
+    # Rehashing moves entries as they are, generations included.
+    assert {entry.name: entry for entry in catalog.entries()} == kept
+    assert len(catalog) == 4
+
+
+def test_shared_memory_catalog(monkeypatch):
+    df = generate_random_df(100, 2)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("catalog_df", df)
+    fb_shm.add_dataframe_chunks("catalog_chunked_df", (df.iloc[i:i + 30] for i in range(0, len(df), 30)))
+
+    # Lookups read the catalog entry directly; nothing is unpickled.
+    monkeypatch.setattr(dill, "loads", None)
+    fb_shm2 = FbSharedMemory()
+    for df_name in ("catalog_df", "catalog_chunked_df"):
+        entry = fb_shm2.catalog.lookup(df_name)
+        assert (entry.num_rows, entry.num_columns) == (100, 5)
+        assert entry.dtypes == (1 << DataType.DataType.INT64) | (1 << DataType.DataType.FLOAT64) | (1 << DataType.DataType.STRING)
+        assert fb_shm2.dataframe_head(df_name, 100).equals(df)
+
+    fb_shm.close()
+
+
+def test_shared_memory_allocator():
+    dfs = [generate_random_df(100 * (i + 1), 2) for i in range(4)]
+
+    fb_shm = FbSharedMemory()
+    for i, df in enumerate(dfs):
+        fb_shm.add_dataframe(f"alloc_df_{i}", df)
+    # Another instance allocates after the frames of the first.
+    fb_shm2 = FbSharedMemory()
+    fb_shm2.add_dataframe("alloc_df_4", dfs[0])
+    fb_shm2.add_dataframe("alloc_df_0", dfs[3])
+    assert fb_shm.dataframe_head("alloc_df_0", 1000).equals(dfs[0])
+
+    # Deleted space is reused.
+    fb_shm.delete_dataframe("alloc_df_1")
+    with pytest.raises(KeyError):
+        fb_shm.dataframe_head("alloc_df_1")
+    fb_shm.add_dataframe("alloc_df_5", dfs[0])
+    assert fb_shm.catalog.lookup("alloc_df_5").offset < fb_shm.catalog.lookup("alloc_df_2").offset
+
+    fb_shm.replace_dataframe("alloc_df_2", dfs[1])
+    fb_shm.replace_dataframe("alloc_df_6", dfs[2])
+
+    data_end = fb_shm.catalog.data_end
+    fb_shm.compact()
+    assert fb_shm.catalog.free_space() == (0, 0)
+    assert fb_shm.catalog.data_end <= data_end
+    expected = {"alloc_df_0": dfs[0], "alloc_df_2": dfs[1], "alloc_df_3": dfs[3], "alloc_df_4": dfs[0],
+                "alloc_df_5": dfs[0], "alloc_df_6": dfs[2]}
+    for df_name, df in expected.items():
+        assert fb_shm2.dataframe_head(df_name, len(df)).equals(df)
+        assert fb_shm2.dataframe_group_by_sum(df_name, "int_col", "additional_col_0").equals(df.groupby("int_col").agg({"additional_col_0": "sum"}))
+
+    fb_shm.close()
+
+
+def test_shared_memory_segments():
+    dfs = [generate_random_df(1000, 10) for i in range(4)]
+    big_df = generate_random_df(10000, 10)
+
+    # 256 KB segments: each frame takes about 100 KB, the big one a segment of its own.
+    fb_shm = FbSharedMemory("CS598_segments_test", segment_size=1 << 18)
+    for i, df in enumerate(dfs):
+        fb_shm.add_dataframe(f"segments_df_{i}", df)
+    fb_shm.add_dataframe("segments_big_df", big_df)
+    fb_shm.add_dataframe_chunks("segments_chunked_df", (big_df.iloc[i:i + 1000] for i in range(0, len(big_df), 1000)))
+    assert fb_shm.catalog.segments > 2
+    assert fb_shm.catalog.lookup("segments_df_3").segment == 1
+    assert fb_shm.catalog.lookup("segments_big_df").length > 1 << 18
+
+    # Another instance attaches the segments as it needs them.
+    fb_shm2 = FbSharedMemory("CS598_segments_test")
+    assert fb_shm2.dataframe_head("segments_df_0", 1000).equals(dfs[0])
+    assert len(fb_shm2.segments) == 1
+    fb_shm2.dataframe_map_numeric_column("segments_big_df", "int_col", lambda x: x + 1, workers=2)
+    assert fb_shm2.dataframe_head("segments_big_df", 10000)["int_col"].equals(big_df["int_col"] + 1)
+    assert fb_shm2.dataframe_head("segments_chunked_df", 10000).equals(big_df)
+
+    fb_shm.delete_dataframe("segments_df_0")
+    fb_shm.delete_dataframe("segments_df_1")
+    fb_shm.compact()
+    assert fb_shm.catalog.lookup("segments_df_2").segment == 0
+    for i in (2, 3):
+        assert fb_shm2.dataframe_head(f"segments_df_{i}", 1000).equals(dfs[i])
+    assert fb_shm2.dataframe_group_by_sum("segments_chunked_df", "int_col", "additional_col_0").equals(
+        big_df.groupby("int_col").agg({"additional_col_0": "sum"}))
+
+    fb_shm2.close()
+    fb_shm.close()
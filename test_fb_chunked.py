@@ -0,0 +1,71 @@
+import io
+import pandas as pd
+
+from fb_dataframe import FbChunkedWriter, fb_dataframe_head, fb_dataframe_group_by_sum, fb_dataframe_map_numeric_column
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def write_chunked(df: pd.DataFrame, chunk_size: int) -> bytearray:
+    sink = io.BytesIO()
+    with FbChunkedWriter(sink) as writer:
+        for i in range(0, len(df), chunk_size):
+            writer.write(df.iloc[i:i + chunk_size])
+    return bytearray(sink.getvalue())
+
+
+def test_chunked_head():
+    df = generate_random_df(100, 5)
+
+    fb_df = write_chunked(df, 30)
+
+    assert fb_dataframe_head(fb_df).equals(df.head())
+    # The requested rows span all 4 row groups.
+    assert fb_dataframe_head(fb_df, 95).equals(df.head(95))
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+
+
+def test_chunked_group_by_sum():
+    df = generate_random_df(100, 5)
+
+    fb_df = write_chunked(df, 30)
+
+    assert fb_dataframe_group_by_sum(fb_df, "int_col", "additional_col_0").equals(
+        df.groupby("int_col").agg({"additional_col_0": "sum"}))
+
+
+def test_chunked_map_numeric_column():
+    df = generate_random_df(100, 5)
+
+    fb_df = write_chunked(df, 30)
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x * 2)
+    fb_dataframe_map_numeric_column(fb_df, "float_col", lambda x: x / 2)
+
+    df["int_col"] = df["int_col"].apply(lambda x: x * 2)
+    df["float_col"] = df["float_col"].apply(lambda x: x / 2)
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+
+
+def test_chunked_writer_into_buffer():
+    df = generate_random_df(100, 5)
+    buf = bytearray(100000)
+
+    writer = FbChunkedWriter(buf)
+    for i in range(0, len(df), 30):
+        writer.write(df.iloc[i:i + 30])
+    length = writer.close()
+
+    assert fb_dataframe_head(memoryview(buf)[:length], len(df)).equals(df)
+
+
+def test_fb_shared_memory_add_dataframe_chunks():
+    df = generate_random_df(100, 5)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe_chunks("chunked_df", (df.iloc[i:i + 30] for i in range(0, len(df), 30)))
+
+    fb_shm2 = FbSharedMemory()
+    df_new = fb_shm2.dataframe_head("chunked_df", len(df))
+    fb_shm2.close()
+
+    assert df_new.equals(df)
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from Dataframe import ColMetaData, DataFrame
+from fb_dataframe import to_flatbuffer, fb_dataframe_group_by_sum, _find_column
+
+
+def generate_wide_df(num_cols: int = 3000) -> pd.DataFrame:
+    df = pd.DataFrame({f"col_{i}": [i, i + 1, i] for i in range(num_cols)})
+    df["grüße"] = ["a", "b", "a"]
+    return df
+
+
+def test_find_column():
+    df = generate_wide_df()
+    fb_df = DataFrame.DataFrame.GetRootAs(to_flatbuffer(df), 0)
+
+    for c_name in df.columns:
+        assert _find_column(fb_df, c_name).Colmetadata().Name().decode("utf-8") == c_name
+    assert _find_column(fb_df, "missing") is None
+    assert _find_column(fb_df, "") is None
+    assert _find_column(fb_df, "zzz") is None
+
+
+def test_find_column_reads_few_names(monkeypatch):
+    df = generate_wide_df()
+    fb_df = to_flatbuffer(df)
+
+    names_read = list()
+    name = ColMetaData.ColMetaData.Name
+    monkeypatch.setattr(ColMetaData.ColMetaData, "Name", lambda self: names_read.append(1) or name(self))
+
+    df_groupby_fb = fb_dataframe_group_by_sum(fb_df, "grüße", "col_2999")
+    assert df_groupby_fb.equals(df.groupby("grüße").agg({"col_2999": "sum"}))
+    # Two binary searches over 3001 columns.
+    assert len(names_read) <= 2 * 14
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+import tracemalloc
+
+from fb_dataframe import to_flatbuffer, fb_column_view, fb_dataframe_head, fb_dataframe_map_numeric_column
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_fb_column_view():
+    df = generate_random_df(100, 1)
+    fb_df = to_flatbuffer(df)
+
+    int_view = fb_column_view(fb_df, "int_col")
+    float_view = fb_column_view(fb_df, "float_col")
+    assert np.array_equal(int_view, df["int_col"])
+    assert np.array_equal(float_view, df["float_col"])
+
+    # The views alias the flatbuffer and are read-only.
+    assert np.shares_memory(int_view, np.frombuffer(fb_df, dtype=np.uint8))
+    with pytest.raises(ValueError):
+        int_view[0] = 1
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x - 20)
+    assert np.array_equal(int_view, df["int_col"] - 20)
+
+    with pytest.raises(KeyError):
+        fb_column_view(fb_df, "missing")
+    with pytest.raises(TypeError):
+        fb_column_view(fb_df, "string_col")
+
+
+def test_map_negative_values():
+    df = generate_random_df(100, 1)
+    fb_df = to_flatbuffer(df)
+
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: -x)
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x - 1)
+    assert fb_dataframe_head(fb_df, len(df))["int_col"].equals(-df["int_col"] - 1)
+
+
+def test_fb_column_view_shared_memory():
+    df = generate_random_df(100, 1)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("view_df", df)
+    fb_buf = fb_shm._get_fb_buf("view_df")
+
+    int_view = fb_column_view(fb_buf, "int_col")
+    fb_shm.dataframe_map_numeric_column("view_df", "int_col", lambda x: x * 3)
+    assert np.array_equal(int_view, df["int_col"] * 3)
+
+    del int_view
+    fb_buf.release()
+    fb_shm.close()
+
+
+def test_shared_memory_reads_do_not_copy():
+    df = pd.DataFrame({f"col_{i}": np.arange(1 << 17) % 10 for i in range(8)})
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("no_copy_df", df)
+
+    # The frame takes 8 MB; reading it must not copy it out of shared memory.
+    tracemalloc.start()
+    df_head = fb_shm.dataframe_head("no_copy_df", 5)
+    head_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    df_groupby_fb = fb_shm.dataframe_group_by_sum("no_copy_df", "col_0", "col_1")
+    group_by_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert df_head.equals(df.head(5))
+    assert df_groupby_fb.equals(df.groupby("col_0").agg({"col_1": "sum"}))
+    assert head_peak < 1 << 20
+    # The group-by's own working arrays are a few bytes per row.
+    assert group_by_peak < 8 << 20
+    fb_shm.close()
@@ -0,0 +1,166 @@
+import flatbuffers
+import multiprocessing
+import pandas as pd
+import pytest
+
+import fb_dataframe
+from Dataframe import DataFrame, Column, ColMetaData, DataType, IntData, FloatData, StringData
+from fb_dataframe import _prepend_column_index, to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by_sum, plan_flatbuffer_size
+from test_fb_dataframe import generate_random_df
+
+
+def to_flatbuffer_per_element(df: pd.DataFrame) -> bytes:
+    """
+        Reference encoder that serializes numeric columns one value at a time with
+        'PrependInt64' and 'PrependFloat64'. Used as the baseline for the bulk encoder.
+
+        @param df: the dataframe.
+    """
+    builder = flatbuffers.Builder(1024)
+    col_list = list()
+
+    for c_name in reversed(df.columns):
+        if df[c_name].dtype == "int64":
+            datatype = DataType.DataType().INT64
+            IntData.IntDataStartDataVector(builder, len(df[c_name]))
+            for v in reversed(df[c_name]):
+                builder.PrependInt64(v)
+            datas = builder.EndVector()
+            IntData.Start(builder)
+            IntData.AddData(builder, datas)
+            c_data = IntData.End(builder)
+        elif df[c_name].dtype == "float64":
+            datatype = DataType.DataType().FLOAT64
+            FloatData.FloatDataStartDataVector(builder, len(df[c_name]))
+            for v in reversed(df[c_name]):
+                builder.PrependFloat64(v)
+            datas = builder.EndVector()
+            FloatData.Start(builder)
+            FloatData.AddData(builder, datas)
+            c_data = FloatData.End(builder)
+        else:
+            datatype = DataType.DataType().STRING
+            str_offsets = list()
+            for v in reversed(df[c_name]):
+                str_offsets.append(builder.CreateString(v))
+            StringData.StringDataStartDataVector(builder, len(str_offsets))
+            for offset in str_offsets:
+                builder.PrependUOffsetTRelative(offset)
+            datas = builder.EndVector()
+            StringData.Start(builder)
+            StringData.AddData(builder, datas)
+            c_data = StringData.End(builder)
+
+        c_name = builder.CreateString(c_name)
+
+        ColMetaData.Start(builder)
+        ColMetaData.AddName(builder, c_name)
+        ColMetaData.AddType(builder, datatype)
+        c_metadata = ColMetaData.End(builder)
+
+        Column.Start(builder)
+        Column.AddColmetadata(builder, c_metadata)
+        Column.AddData(builder, c_data)
+        col_list.append(Column.End(builder))
+
+    DataFrame.DataFrameStartColumnsVector(builder, len(col_list))
+    for col in col_list:
+        builder.PrependUOffsetTRelative(col)
+    columns = builder.EndVector()
+    column_index = _prepend_column_index(builder, list(df.columns))
+
+    DataFrame.DataFrameStart(builder)
+    DataFrame.AddColumns(builder, columns)
+    DataFrame.AddColumnIndex(builder, column_index)
+    dataframe = DataFrame.DataFrameEnd(builder)
+
+    builder.Finish(dataframe)
+
+    return builder.Output()
+
+
+def test_to_flatbuffer_bulk_matches_per_element():
+    df = generate_random_df(1000, 10)
+
+    assert to_flatbuffer(df) == to_flatbuffer_per_element(df)
+
+
+def test_to_flatbuffer_bulk_non_contiguous_columns():
+    df = generate_random_df(100, 3)
+
+    # Every other row of a reversed frame; the column buffers are strided views.
+    df = df.iloc[::-2].reset_index(drop=True)
+
+    fb_df = to_flatbuffer(df)
+
+    assert fb_df == to_flatbuffer_per_element(df)
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+
+
+def test_to_flatbuffer_bulk_empty_frame():
+    df = pd.DataFrame({"int_col": pd.Series([], dtype="int64"), "float_col": pd.Series([], dtype="float64")})
+
+    assert to_flatbuffer(df) == to_flatbuffer_per_element(df)
+
+
+def test_to_flatbuffer_never_regrows(monkeypatch):
+    df = generate_random_df(1000, 10)
+    expected = to_flatbuffer_per_element(df)
+
+    def fail_grow(builder):
+        raise AssertionError("the builder should be allocated with its final size")
+
+    monkeypatch.setattr(flatbuffers.Builder, "GrowByteBuffer", fail_grow)
+
+    fb_df = to_flatbuffer(df)
+
+    assert len(fb_df) <= plan_flatbuffer_size(df)
+    assert fb_df == expected
+
+
+def test_to_flatbuffer_into_buffer():
+    df = generate_random_df(1000, 10)
+    buf = bytearray(plan_flatbuffer_size(df) + 100)
+
+    fb_view = to_flatbuffer(df, buf)
+
+    # The flatbuffer is built at the end of the caller's buffer.
+    assert fb_view == to_flatbuffer(df)
+    assert buf.endswith(fb_view)
+    assert fb_dataframe_head(fb_view, len(df)).equals(df)
+
+
+def test_to_flatbuffer_into_small_buffer():
+    df = generate_random_df(1000, 10)
+
+    with pytest.raises(ValueError):
+        to_flatbuffer(df, bytearray(1000))
+
+
+def test_to_flatbuffer_parallel(monkeypatch):
+    pools = list()
+    pool = multiprocessing.Pool
+    monkeypatch.setattr(multiprocessing, "Pool", lambda workers: pools.append(workers) or pool(workers))
+    df = generate_random_df(100, 300)
+
+    # Too few strings to pay for the pool.
+    fb_df = to_flatbuffer(df, workers=2)
+    assert pools == []
+
+    assert len(fb_df) <= plan_flatbuffer_size(df)
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+    assert fb_dataframe_group_by_sum(fb_df, "int_col", "additional_col_299").equals(
+        df.groupby("int_col").agg({"additional_col_299": "sum"}))
+
+    # String and dictionary columns between numeric ones go to the workers; numeric-only frames
+    # never start them.
+    monkeypatch.setattr(fb_dataframe, "PARALLEL_ENCODE_MIN_STRINGS", 100)
+    monkeypatch.setattr(fb_dataframe, "_available_cpus", lambda: 4)
+    df = df.iloc[:, :10].assign(**{f"string_col_{i}": df["string_col"].str[i:] for i in range(5)},
+                                 dict_col=(df["int_col"] % 2).map({0: "a", 1: "b"}), last_col=df["float_col"])
+    df = df[sorted(df.columns, key=lambda name: name[-1])]
+    assert fb_dataframe_head(to_flatbuffer(df, workers=3), len(df)).equals(df)
+    assert pools == [3]
+    numeric_df = df.select_dtypes("number")
+    assert fb_dataframe_head(to_flatbuffer(numeric_df, workers=3), len(df)).equals(numeric_df)
+    assert pools == [3]
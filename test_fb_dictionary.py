@@ -0,0 +1,48 @@
+import io
+import random
+import pandas as pd
+
+from fb_dataframe import FbChunkedWriter, to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by_sum
+from test_fb_dataframe import generate_random_df
+
+
+def generate_low_cardinality_df(num_rows: int = 1000) -> pd.DataFrame:
+    df = generate_random_df(num_rows, 3)
+    df["country"] = [random.choice(["US", "CA", "MX", "FR"]) for _ in range(num_rows)]
+    return df
+
+
+def test_dictionary_encoding_is_smaller():
+    df = generate_low_cardinality_df()
+
+    dict_fb_df = to_flatbuffer(df)
+    plain_fb_df = to_flatbuffer(df, dictionary_threshold=0)
+
+    # Each distinct string is stored once instead of once per row.
+    assert len(plain_fb_df) - len(dict_fb_df) > 4 * len(df)
+    assert fb_dataframe_head(dict_fb_df, len(df)).equals(df)
+
+
+def test_dictionary_group_by_sum():
+    df = generate_low_cardinality_df()
+
+    fb_df = to_flatbuffer(df)
+
+    df_groupby_fb = fb_dataframe_group_by_sum(fb_df, "country", "additional_col_0")
+    assert df_groupby_fb.equals(df.groupby("country").agg({"additional_col_0": "sum"}))
+
+    df_groupby_fb = fb_dataframe_group_by_sum(fb_df, "country", "float_col")
+    pd.testing.assert_frame_equal(df_groupby_fb, df.groupby("country").agg({"float_col": "sum"}))
+
+
+def test_dictionary_group_by_sum_chunked():
+    df = generate_low_cardinality_df()
+
+    sink = io.BytesIO()
+    with FbChunkedWriter(sink) as writer:
+        for i in range(0, len(df), 300):
+            writer.write(df.iloc[i:i + 300])
+    fb_df = sink.getvalue()
+
+    df_groupby_fb = fb_dataframe_group_by_sum(fb_df, "country", "float_col")
+    pd.testing.assert_frame_equal(df_groupby_fb, df.groupby("country").agg({"float_col": "sum"}))
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from Dataframe import ColMetaData
+from fb_dataframe import to_flatbuffer, fb_frame_directory, FbFrameDirectory
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_frame_directory():
+    df = generate_random_df(100, 2)
+    fb_df = to_flatbuffer(df)
+
+    directory = FbFrameDirectory(fb_df)
+    assert directory.num_rows == 100
+    assert [column.name for column in directory.column_list(fb_df, 0)] == list(df.columns)
+    int_col = directory.column(fb_df, 0, "int_col")
+    assert (int_col.dtype, int_col.length) == (np.dtype(np.int64), 100)
+    assert directory.column(fb_df, 0, "missing") is None
+
+    # Directories with a generation are kept per buffer and generation.
+    assert fb_frame_directory(fb_df, 1) is fb_frame_directory(fb_df, 1)
+    assert fb_frame_directory(fb_df, 2) is not fb_frame_directory(fb_df, 1)
+    assert fb_frame_directory(fb_df) is not fb_frame_directory(fb_df)
+    assert fb_frame_directory(bytes(fb_df), 1) is not fb_frame_directory(fb_df, 1)
+
+
+def test_shared_memory_queries_reuse_directory(monkeypatch):
+    df = generate_random_df(1000, 10)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("directory_df", df)
+    fb_shm.add_dataframe_chunks("directory_chunked_df", (df.iloc[i:i + 300] for i in range(0, len(df), 300)))
+
+    names_read = list()
+    name = ColMetaData.ColMetaData.Name
+    monkeypatch.setattr(ColMetaData.ColMetaData, "Name", lambda self: names_read.append(1) or name(self))
+
+    expected = df.groupby("int_col").agg({"additional_col_0": "sum"})
+    for df_name in ("directory_df", "directory_chunked_df"):
+        assert fb_shm.dataframe_head(df_name, 1000).equals(df)
+        assert fb_shm.dataframe_group_by_sum(df_name, "int_col", "additional_col_0").equals(expected)
+        assert len(names_read) > 0
+
+        # Repeated queries and in-place maps go straight to the column data.
+        names_read.clear()
+        fb_shm.dataframe_map_numeric_column(df_name, "additional_col_1", np.negative)
+        assert fb_shm.dataframe_head(df_name, 1000)["additional_col_1"].equals(-df["additional_col_1"])
+        assert fb_shm.dataframe_group_by_sum(df_name, "int_col", "additional_col_0").equals(expected)
+        fb_shm.dataframe_map_numeric_column(df_name, "additional_col_1", np.negative)
+        assert names_read == []
+
+    # A new version of the dataframe is parsed again.
+    fb_shm.replace_dataframe("directory_df", df.assign(int_col=df["int_col"] + 1))
+    assert fb_shm.dataframe_head("directory_df", 1000)["int_col"].equals(df["int_col"] + 1)
+    assert len(names_read) > 0
+
+    fb_shm.close()
+
+
+def test_directories_are_kept_per_store(tmp_path):
+    # Frames of the same length at the same generation in two stores, one opened after the other
+    # was closed, possibly at the same address.
+    store_ids = list()
+    for i, df in enumerate((pd.DataFrame({"ab": np.arange(3), "c": np.arange(3.0)}), pd.DataFrame({"a": np.arange(3.0), "bc": np.arange(3)}))):
+        fb_shm = FbSharedMemory(f"CS598_directory_test_{i}", path=str(tmp_path / str(i)))
+        fb_shm.add_dataframe("directory_df", df)
+        assert fb_shm.dataframe_head("directory_df").equals(df)
+        store_ids.append(fb_shm.catalog.store_id)
+        fb_shm.close()
+    assert store_ids[0] != store_ids[1]
@@ -0,0 +1,62 @@
+import pickle
+import numpy as np
+import pytest
+
+import fb_expression
+from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_map_numeric_column
+from fb_expression import col, column, from_data, where, log1p, minimum
+from test_fb_dataframe import generate_random_df
+
+
+def test_map_expression():
+    df = generate_random_df(1000, 1)
+    fb_df = to_flatbuffer(df)
+
+    fb_dataframe_map_numeric_column(fb_df, "int_col", col * 2 + 1)
+    fb_dataframe_map_numeric_column(fb_df, "additional_col_0", where(col > 5, col, 0))
+    fb_dataframe_map_numeric_column(fb_df, "float_col", log1p(col))
+
+    df_new = fb_dataframe_head(fb_df, len(df))
+    assert df_new["int_col"].equals(df["int_col"] * 2 + 1)
+    assert df_new["additional_col_0"].equals(df["additional_col_0"].where(df["additional_col_0"] > 5, 0))
+    assert df_new["float_col"].equals(np.log1p(df["float_col"]))
+
+
+def test_evaluate_blocks(monkeypatch):
+    monkeypatch.setattr(fb_expression, "EXPRESSION_BLOCK_SIZE", 7)
+    a = np.arange(100, dtype=np.int64)
+    b = np.linspace(0, 1, 100)
+
+    expr = where((column("a") % 3 == 0) | (column("b") > 0.5), minimum(column("a"), 50) - column("b"), -1.0)
+    expected = np.where((a % 3 == 0) | (b > 0.5), np.minimum(a, 50) - b, -1.0)
+    assert expr.columns() == {"a", "b"}
+    assert np.array_equal(expr.evaluate({"a": a, "b": b}), expected)
+    assert np.array_equal((10 - col)(a), 10 - a)
+    assert len((col + 1)(a[:0])) == 0
+
+
+def test_serialization():
+    expr = where(~(col < 0), col ** 2, -col) / 4
+    data = expr.to_data()
+
+    # Plain nested lists, so the data can be sent as JSON or pickled without code.
+    assert data[0] == "true_divide" and data[1][0] == "where"
+    values = np.arange(-5, 5)
+    assert np.array_equal(from_data(data)(values), expr(values))
+    assert np.array_equal(pickle.loads(pickle.dumps(expr))(values), expr(values))
+
+
+def test_expression_errors():
+    with pytest.raises(ValueError):
+        from_data(["system", ["col", None]])
+    with pytest.raises(TypeError):
+        col + "1"
+    # Expressions have no truth value, so and, or, not and if cannot drop part of one silently.
+    with pytest.raises(TypeError):
+        (column("a") > 1) and (column("b") < 2)
+    with pytest.raises(TypeError):
+        (column("a") > 1) or (column("b") < 2)
+    with pytest.raises(TypeError):
+        not (col == 3)
+    with pytest.raises(TypeError):
+        bool(col == 3)
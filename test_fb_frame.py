@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from fb_dataframe import to_flatbuffer
+from fb_frame import FlatbufferFrame
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_flatbuffer_frame():
+    df = generate_random_df(1000, 2)
+    df["dict_col"] = np.array(["a", "b"])[np.arange(1000) % 2]
+    df["narrow_col"] = np.arange(1000) % 100
+    frame = FlatbufferFrame(to_flatbuffer(df, downcast=True))
+
+    assert len(frame) == 1000
+    assert list(frame.columns) == list(df.columns)
+    assert frame.dtypes.equals(df.dtypes.astype(object))
+    assert frame.to_pandas().equals(df)
+    assert frame.head(10).equals(df.head(10))
+    assert frame["string_col"].equals(df["string_col"])
+    assert frame["narrow_col"].equals(df["narrow_col"])
+
+    # Selections stay lazy and compose like their pandas counterparts.
+    selected = frame[["dict_col", "int_col"]].iloc[100:200]
+    assert len(selected) == 100
+    assert list(selected.columns) == ["dict_col", "int_col"]
+    assert selected.to_pandas().equals(df[["dict_col", "int_col"]].iloc[100:200])
+    assert selected.iloc[::7].head(3).equals(df[["dict_col", "int_col"]].iloc[100:200].iloc[::7].head(3))
+    assert frame.iloc[990:].iloc[::-3].to_pandas().equals(df.iloc[990:].iloc[::-3])
+    assert frame.iloc[2000:].to_pandas(columns=["float_col"]).equals(df.iloc[2000:][["float_col"]])
+    assert frame.iloc[-1].equals(df.iloc[-1])
+
+    with pytest.raises(KeyError):
+        frame["missing"]
+    with pytest.raises(KeyError):
+        frame[["int_col", "missing"]]
+    with pytest.raises(TypeError):
+        frame.iloc["int_col"]
+
+
+def test_shared_memory_frame(monkeypatch):
+    df = generate_random_df(1000, 2)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe_chunks("frame_df", (df.iloc[i:i + 300] for i in range(0, len(df), 300)))
+    frame = fb_shm.frame("frame_df", cache_size=2)
+
+    assert frame.iloc[250:350].to_pandas().equals(df.iloc[250:350])
+    assert frame.to_pandas().equals(df)
+
+    # Decoded strings come from the cache; numeric columns are read again, so in-place maps show.
+    monkeypatch.setattr("fb_frame._rows_values", None)
+    assert frame.iloc[250:350]["string_col"].equals(df["string_col"].iloc[250:350])
+    monkeypatch.undo()
+    fb_shm.dataframe_map_numeric_column("frame_df", "int_col", lambda x: x + 1, vectorized=True)
+    assert frame["int_col"].equals(df["int_col"] + 1)
+
+    # A new version is read from the start, and the cache keeps two string columns.
+    fb_shm.replace_dataframe("frame_df", df.iloc[:10])
+    assert len(frame) == 10
+    assert frame.to_pandas().equals(df.iloc[:10])
+    assert len(frame._cache) == 2
+
+    with pytest.raises(KeyError):
+        fb_shm.frame("missing_df")
+    fb_shm.close()
@@ -0,0 +1,116 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+import fb_dataframe
+from fb_dataframe import FbChunkedWriter, to_flatbuffer, fb_dataframe_group_by, fb_dataframe_group_by_sum, GROUP_BY_AGGREGATIONS
+
+
+def generate_group_by_df(num_rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    float_values = rng.uniform(0, 100, num_rows)
+    float_values[rng.random(num_rows) < 0.1] = np.nan
+    float_key = rng.integers(0, 5, num_rows) / 2
+    float_key[rng.random(num_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "int_key": rng.integers(-3, 4, num_rows),
+        "wide_key": rng.integers(0, 1 << 40, num_rows) % 7 * (1 << 38),
+        "float_key": float_key,
+        "country": rng.choice(["US", "CA", "MX", "FR"], num_rows),
+        "name": rng.choice([f"name_{i}" for i in range(300)], num_rows),
+        "int_value": rng.integers(-1000, 1000, num_rows),
+        "float_value": float_values,
+        "float32_value": rng.uniform(0, 1, num_rows).astype(np.float32),
+        "int8_value": rng.integers(-128, 128, num_rows).astype(np.int8),
+        "uint8_value": rng.integers(0, 256, num_rows).astype(np.uint8),
+    })
+
+
+ALL_AGGS = {"int_value": list(GROUP_BY_AGGREGATIONS), "float_value": list(GROUP_BY_AGGREGATIONS),
+            "float32_value": ["sum", "mean", "max"], "int8_value": list(GROUP_BY_AGGREGATIONS),
+            "uint8_value": ["sum", "min", "mean"]}
+
+
+@pytest.mark.parametrize("by", ["int_key", "wide_key", "float_key", "country", "name",
+                                ["country", "int_key"], ["float_key", "name", "int_key"]])
+def test_group_by_matches_pandas(by):
+    df = generate_group_by_df()
+
+    for fb_df in (to_flatbuffer(df), to_flatbuffer(df, dictionary_threshold=0), to_flatbuffer(df, downcast=True)):
+        expected = df.groupby(by).agg(ALL_AGGS)
+        pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, by, ALL_AGGS), expected)
+
+    expected = df.groupby(by).agg({"int_value": "sum"})
+    assert fb_dataframe_group_by(to_flatbuffer(df), by, {"int_value": "sum"}).equals(expected)
+
+
+def test_group_by_chunked():
+    df = generate_group_by_df()
+
+    sink = io.BytesIO()
+    with FbChunkedWriter(sink, downcast=True) as writer:
+        for i in range(0, len(df), 300):
+            writer.write(df.iloc[i:i + 300])
+
+    by = ["country", "int_key"]
+    pd.testing.assert_frame_equal(fb_dataframe_group_by(sink.getvalue(), by, ALL_AGGS), df.groupby(by).agg(ALL_AGGS))
+
+
+def test_group_by_narrow_integer_sums():
+    for dtype in (np.int8, np.uint8):
+        # Sums that overflow the column's dtype come back as int64 or uint64, and others keep it.
+        df = pd.DataFrame({"key": [0, 0, 1], "value": np.array([100, 100, 1], dtype=dtype)})
+        expected = df.groupby("key").agg({"value": "sum"})
+        assert fb_dataframe_group_by(to_flatbuffer(df), "key", {"value": "sum"}).equals(expected)
+        assert expected["value"].tolist() == [200, 1]
+        df = df.iloc[1:]
+        assert fb_dataframe_group_by(to_flatbuffer(df), "key", {"value": "sum"}).equals(df.groupby("key").agg({"value": "sum"}))
+
+
+def test_group_by_keys_wider_than_int64():
+    # Key ranges wider than 2**63 overflow offsets from the smallest key.
+    for keys in (np.array([5 * 10 ** 18, -5 * 10 ** 18, 0, 0]), np.array([2 ** 64 - 1, 0, 2 ** 63 + 5, 0], dtype=np.uint64)):
+        df = pd.DataFrame({"key": keys, "value": np.arange(4)})
+        expected = df.groupby("key").agg({"value": "sum"})
+        assert fb_dataframe_group_by(to_flatbuffer(df), "key", {"value": "sum"}).equals(expected)
+
+
+def test_group_by_string_sums():
+    # Like pandas, summing strings concatenates them in row order, also across row groups.
+    df = generate_group_by_df(100)
+    aggs = {"country": ["sum", "count"], "name": "sum"}
+    expected = df.groupby("int_key").agg(aggs)
+    for fb_df in (to_flatbuffer(df), to_flatbuffer(df, dictionary_threshold=0)):
+        pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, "int_key", aggs), expected)
+    assert fb_dataframe_group_by_sum(to_flatbuffer(df), "int_key", "name").equals(df.groupby("int_key").agg({"name": "sum"}))
+
+    sink = io.BytesIO()
+    with FbChunkedWriter(sink) as writer:
+        for i in range(0, len(df), 30):
+            writer.write(df.iloc[i:i + 30])
+    pd.testing.assert_frame_equal(fb_dataframe_group_by(sink.getvalue(), "int_key", aggs), expected)
+
+
+def test_group_by_dictionary_keys_decode_used_entries(monkeypatch):
+    # Rows group on their dictionary codes, so only the dictionary entries of the rows read are decoded.
+    df = generate_group_by_df()
+    fb_df = to_flatbuffer(df)
+    decoded = list()
+    dictionary = fb_dataframe.DictStringData.DictStringData.Dictionary
+    monkeypatch.setattr(fb_dataframe.DictStringData.DictStringData, "Dictionary", lambda self, j: decoded.append(j) or dictionary(self, j))
+
+    key_values, _ = fb_dataframe._group_by_partial(fb_df, ["name"], {"int_value": ["sum"]}, 0, 10)
+    assert key_values[0].tolist() == sorted(set(df["name"][:10]))
+    assert len(decoded) == len(key_values[0])
+
+
+def test_group_by_errors():
+    fb_df = to_flatbuffer(generate_group_by_df(10))
+
+    with pytest.raises(KeyError):
+        fb_dataframe_group_by(fb_df, "missing", {"int_value": "sum"})
+    with pytest.raises(ValueError):
+        fb_dataframe_group_by(fb_df, "int_key", {"int_value": "median"})
+    with pytest.raises(TypeError):
+        fb_dataframe_group_by(fb_df, "int_key", {"name": "mean"})
@@ -0,0 +1,88 @@
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from fb_expression import column
+from fb_locks import FbStoreLocks
+from fb_shared_memory import FbSharedMemory
+
+
+STORE_NAME = "CS598_locks_test"
+
+
+def generate_version_df(version: int) -> pd.DataFrame:
+    """
+        A dataframe whose "value" column is all version and whose "length" column is all its
+        number of rows, so a torn read shows up as mixed values.
+    """
+    num_rows = 1000 + 37 * (version % 50)
+    return pd.DataFrame({"value": np.full(num_rows, version), "length": np.full(num_rows, num_rows)})
+
+
+def _guest(iterations: int, errors: multiprocessing.Queue) -> None:
+    fb_shm = FbSharedMemory(STORE_NAME)
+    try:
+        for _ in range(iterations):
+            df = fb_shm.dataframe_head("locks_df", 1 << 20)
+            assert df["value"].nunique() == 1 and (df["length"] == len(df)).all(), df.describe()
+
+            grouped = fb_shm.dataframe_group_by("locks_df", "length", {"value": ["min", "max", "count"]})
+            assert len(grouped) == 1
+            assert grouped.iloc[0]["value"]["min"] == grouped.iloc[0]["value"]["max"]
+            assert grouped.iloc[0]["value"]["count"] == grouped.index[0]
+    except Exception as e:
+        errors.put(repr(e))
+    fb_shm.close()
+
+
+def test_concurrent_readers_and_writers():
+    fb_shm = FbSharedMemory(STORE_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe("locks_df", generate_version_df(0))
+
+    errors = multiprocessing.Queue()
+    guests = [multiprocessing.Process(target=_guest, args=(100, errors)) for _ in range(8)]
+    for guest in guests:
+        guest.start()
+
+    # The host replaces, maps, deletes and compacts while the guests read.
+    version = 0
+    while any(guest.is_alive() for guest in guests):
+        version += 1
+        fb_shm.replace_dataframe("locks_df", generate_version_df(version))
+        fb_shm.dataframe_map_numeric_column("locks_df", "value", lambda x: x * 2, vectorized=True)
+        fb_shm.add_dataframe(f"locks_df_{version}", generate_version_df(version))
+        if version > 1:
+            fb_shm.delete_dataframe(f"locks_df_{version - 1}")
+        if version % 10 == 0:
+            fb_shm.compact()
+    for guest in guests:
+        guest.join()
+
+    assert errors.empty(), errors.get()
+    assert all(guest.exitcode == 0 for guest in guests)
+    assert version > 1
+    assert fb_shm.dataframe_head("locks_df", 1 << 20).equals(generate_version_df(version) * [2, 1])
+    fb_shm.close()
+
+
+def test_reads_share_the_catalog_lock(monkeypatch):
+    fb_shm = FbSharedMemory(STORE_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe("locks_df", generate_version_df(0))
+
+    exclusive_locks = list()
+    catalog = FbStoreLocks.catalog
+    monkeypatch.setattr(FbStoreLocks, "catalog", lambda self, exclusive=False: exclusive_locks.append(exclusive) or catalog(self, exclusive))
+
+    fb_shm.dataframe_head("locks_df", 10)
+    fb_shm.dataframe_slice("locks_df", 5, 10)
+    fb_shm.query("locks_df", ["value"], column("length") > 0)
+    with fb_shm.snapshot("locks_df"):
+        fb_shm.dataframe_group_by_sum("locks_df", "length", "value")
+    assert exclusive_locks and not any(exclusive_locks)
+
+    # The last reader of a retired version frees it.
+    with fb_shm.snapshot("locks_df"):
+        fb_shm.replace_dataframe("locks_df", generate_version_df(1))
+    assert not any(entry.name.startswith("\0") for entry in fb_shm.catalog.entries())
+    fb_shm.delete_dataframe("locks_df")
+    fb_shm.close()
@@ -0,0 +1,47 @@
+import math
+import numpy as np
+import pytest
+
+import fb_dataframe
+from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_map_numeric_column
+from test_fb_dataframe import generate_random_df
+
+
+def test_map_vectorized():
+    df = generate_random_df(1000, 1)
+    fb_df = to_flatbuffer(df)
+
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x * 2 + 1, vectorized=True)
+    fb_dataframe_map_numeric_column(fb_df, "float_col", np.sqrt)
+    fb_dataframe_map_numeric_column(fb_df, "additional_col_0", np.negative)
+
+    df_new = fb_dataframe_head(fb_df, len(df))
+    assert df_new["int_col"].equals(df["int_col"] * 2 + 1)
+    assert df_new["float_col"].equals(np.sqrt(df["float_col"]))
+    assert df_new["additional_col_0"].equals(-df["additional_col_0"])
+
+
+def test_map_batches(monkeypatch):
+    monkeypatch.setattr(fb_dataframe, "MAP_BATCH_SIZE", 7)
+    df = generate_random_df(100, 1)
+    fb_df = to_flatbuffer(df, downcast=True)
+
+    # Not vectorizable: math.floor and a branch on the value.
+    map_func = lambda x: math.floor(x / 2) if x > 5 else -x
+    fb_dataframe_map_numeric_column(fb_df, "int_col", map_func)
+    fb_dataframe_map_numeric_column(fb_df, "additional_col_0", lambda x: x + 1, vectorized=True)
+
+    df_new = fb_dataframe_head(fb_df, len(df))
+    assert df_new["int_col"].equals(df["int_col"].map(map_func))
+    assert df_new["additional_col_0"].equals(df["additional_col_0"] + 1)
+
+
+def test_map_errors():
+    df = generate_random_df(100, 1)
+    fb_df = to_flatbuffer(df)
+
+    with pytest.raises(OverflowError):
+        fb_dataframe_map_numeric_column(fb_df, "int_col", np.sqrt)
+    with pytest.raises(ValueError):
+        fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x.sum(), vectorized=True)
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Dataframe import DataFrame, DataType
+from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by_sum, fb_dataframe_map_numeric_column
+from test_fb_dataframe import generate_random_df
+
+
+def column_types(fb_df) -> dict:
+    fb_root = DataFrame.DataFrame.GetRootAs(fb_df, 0)
+    return {fb_root.Columns(i).Colmetadata().Name().decode("utf-8"): fb_root.Columns(i).Colmetadata().Type()
+            for i in range(fb_root.ColumnsLength())}
+
+
+def test_downcast_picks_narrowest_type():
+    df = pd.DataFrame({
+        "small": np.array([0, 10, 3], dtype=np.int64),
+        "negative": np.array([-1000, 0, 1000], dtype=np.int64),
+        "large": np.array([0, 1 << 40, 5], dtype=np.int64),
+        "float32_values": np.array([0.5, 1.25, np.nan], dtype=np.float64),
+        "float64_values": np.array([0.1, 0.2, 0.3], dtype=np.float64),
+        "uint": np.array([0, 70000, 1], dtype=np.uint64),
+    })
+
+    types = column_types(to_flatbuffer(df, downcast=True))
+    assert types == {
+        "small": DataType.DataType().INT8,
+        "negative": DataType.DataType().INT16,
+        "large": DataType.DataType().INT64,
+        "float32_values": DataType.DataType().FLOAT32,
+        "float64_values": DataType.DataType().FLOAT64,
+        "uint": DataType.DataType().INT32,
+    }
+
+
+def test_downcast_is_smaller_and_round_trips():
+    df = generate_random_df(1000, 3)
+
+    narrow_fb_df = to_flatbuffer(df, downcast=True)
+    assert len(narrow_fb_df) < len(to_flatbuffer(df)) - 6 * len(df)
+
+    # Readers return the original dtypes.
+    assert fb_dataframe_head(narrow_fb_df, len(df)).equals(df)
+    df_groupby_fb = fb_dataframe_group_by_sum(narrow_fb_df, "int_col", "additional_col_0")
+    assert df_groupby_fb.equals(df.groupby("int_col").agg({"additional_col_0": "sum"}))
+
+
+def test_narrow_dtypes_round_trip_without_downcast():
+    df = pd.DataFrame({
+        "int8_col": np.array([1, -2, 3], dtype=np.int8),
+        "uint32_col": np.array([1, 2, 3], dtype=np.uint32),
+        "float32_col": np.array([0.5, 1.5, 2.5], dtype=np.float32),
+    })
+
+    assert fb_dataframe_head(to_flatbuffer(df), 3).equals(df)
+
+
+def test_map_narrow_column():
+    df = generate_random_df(100, 1)
+    fb_df = to_flatbuffer(df, downcast=True)
+
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x + 100)
+    assert (fb_dataframe_head(fb_df, len(df))["int_col"] == df["int_col"] + 100).all()
+
+    # int_col is stored as int8 and cannot hold these results.
+    with pytest.raises(OverflowError):
+        fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x * 1000)
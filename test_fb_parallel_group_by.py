@@ -0,0 +1,25 @@
+import pandas as pd
+
+from fb_shared_memory import FbSharedMemory
+from test_fb_group_by import generate_group_by_df, ALL_AGGS
+
+
+def test_parallel_group_by():
+    df = generate_group_by_df(1000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("parallel_df", df)
+    fb_shm.add_dataframe_chunks("parallel_chunked_df", (df.iloc[i:i + 300] for i in range(0, len(df), 300)), downcast=True)
+
+    for by in ("int_key", "country", "name", ["float_key", "country"]):
+        expected = df.groupby(by).agg(ALL_AGGS)
+        for parallel in (1, 3):
+            pd.testing.assert_frame_equal(fb_shm.dataframe_group_by("parallel_df", by, ALL_AGGS, parallel=parallel), expected)
+            pd.testing.assert_frame_equal(fb_shm.dataframe_group_by("parallel_chunked_df", by, ALL_AGGS, parallel=parallel), expected)
+
+    df_groupby_fb = fb_shm.dataframe_group_by_sum("parallel_df", "int_key", "int_value", parallel=2)
+    assert df_groupby_fb.equals(df.groupby("int_key").agg({"int_value": "sum"}))
+    # Strings concatenate in row order across the workers' rows.
+    assert fb_shm.dataframe_group_by_sum("parallel_df", "int_key", "name", parallel=3).equals(df.groupby("int_key").agg({"name": "sum"}))
+
+    fb_shm.close()
@@ -0,0 +1,35 @@
+import math
+import numpy as np
+import pytest
+
+from fb_expression import col, where
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_parallel_map():
+    df = generate_random_df(1000, 2)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("parallel_map_df", df)
+    fb_shm.add_dataframe_chunks("parallel_map_chunked_df", (df.iloc[i:i + 300] for i in range(0, len(df), 300)), downcast=True)
+
+    # Not vectorizable: math.floor and a branch on the value.
+    map_func = lambda x: math.floor(x / 2) if x > 5 else -x
+    for df_name in ("parallel_map_df", "parallel_map_chunked_df"):
+        fb_shm.dataframe_map_numeric_column(df_name, "int_col", map_func, workers=3)
+        fb_shm.dataframe_map_numeric_column(df_name, "float_col", lambda x: x * 2, vectorized=True, workers=2)
+        fb_shm.dataframe_map_numeric_column(df_name, "additional_col_0", where(col > 5, col, 0), workers=4)
+        fb_shm.dataframe_map_numeric_column(df_name, "additional_col_1", np.negative, workers=1)
+
+        df_new = fb_shm.dataframe_head(df_name, len(df))
+        assert df_new["int_col"].equals(df["int_col"].map(map_func))
+        assert df_new["float_col"].equals(df["float_col"] * 2)
+        assert df_new["additional_col_0"].equals(df["additional_col_0"].where(df["additional_col_0"] > 5, 0))
+        assert df_new["additional_col_1"].equals(-df["additional_col_1"])
+        assert df_new["string_col"].equals(df["string_col"])
+
+    with pytest.raises(OverflowError):
+        fb_shm.dataframe_map_numeric_column("parallel_map_df", "int_col", np.sqrt, workers=2)
+
+    fb_shm.close()
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+
+import fb_locks
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def _reopen(path: str, df_names: list, results: multiprocessing.Queue) -> None:
+    fb_shm = FbSharedMemory("CS598_persistent_test", path=path)
+    results.put([fb_shm.dataframe_head(df_name, 100000) for df_name in df_names])
+    fb_shm.close()
+
+
+def test_persistent_store(tmp_path):
+    path = str(tmp_path / "store")
+    dfs = [generate_random_df(1000, 10) for _ in range(3)]
+    big_df = generate_random_df(10000, 10)
+
+    # Small segments, so the store spans several files.
+    fb_shm = FbSharedMemory("CS598_persistent_test", segment_size=1 << 18, path=path)
+    for i, df in enumerate(dfs):
+        fb_shm.add_dataframe(f"persistent_df_{i}", df)
+    fb_shm.add_dataframe_chunks("persistent_chunked_df", (big_df.iloc[i:i + 1000] for i in range(0, len(big_df), 1000)))
+    fb_shm.dataframe_map_numeric_column("persistent_chunked_df", "int_col", lambda x: x + 1, workers=2)
+    assert fb_shm.dataframe_group_by_sum("persistent_df_0", "int_col", "additional_col_0", parallel=2).equals(
+        dfs[0].groupby("int_col").agg({"additional_col_0": "sum"}))
+    fb_shm.delete_dataframe("persistent_df_1")
+    fb_shm.flush()
+    assert fb_shm.catalog.segments > 1
+    assert sorted(os.listdir(path)) == sorted(["CS598_persistent_test", "CS598_persistent_test_hash", "CS598_persistent_test.lock"] +
+                                              [f"CS598_persistent_test_{i}" for i in range(1, fb_shm.catalog.segments)])
+    fb_shm.close()
+
+    # Another process opens the files as they were left.
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_reopen, args=(path, ["persistent_df_0", "persistent_df_2", "persistent_chunked_df"], results))
+    process.start()
+    df_0, df_2, chunked_df = results.get()
+    process.join()
+    assert df_0.equals(dfs[0])
+    assert df_2.equals(dfs[2])
+    big_df["int_col"] += 1
+    assert chunked_df.equals(big_df)
+
+    fb_shm = FbSharedMemory("CS598_persistent_test", path=path)
+    assert fb_shm.catalog.lookup("persistent_chunked_df").num_rows == len(big_df)
+    assert "persistent_df_1" not in [entry.name for entry in fb_shm.catalog.entries()]
+    fb_shm.compact()
+    assert fb_shm.dataframe_head("persistent_chunked_df", 10000).equals(big_df)
+    fb_shm.close()
+
+
+def test_close_releases_files(tmp_path):
+    # Closing a store closes its segments, its catalog and its lock file.
+    path = str(tmp_path / "store")
+    fb_shm = FbSharedMemory("CS598_close_test", segment_size=1 << 18, path=path)
+    fb_shm.add_dataframe("close_df", generate_random_df(1000, 10))
+    fb_shm.close()
+
+    num_fds = len(os.listdir("/proc/self/fd"))
+    for _ in range(5):
+        fb_shm = FbSharedMemory("CS598_close_test", path=path)
+        assert len(fb_shm.dataframe_head("close_df", 10)) == 10
+        fb_shm.close()
+    assert len(os.listdir("/proc/self/fd")) == num_fds
+    with open("/proc/self/maps") as maps:
+        assert path not in maps.read()
+    assert not any(lock_path.startswith(path) for lock_path in fb_locks._lock_files)
@@ -0,0 +1,102 @@
+import io
+import numpy as np
+import pytest
+
+from Dataframe import DictStringData, StringData
+from fb_dataframe import FbChunkedWriter, to_flatbuffer
+from fb_expression import column
+from fb_query import fb_dataframe_query
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def generate_query_df(num_rows: int):
+    df = generate_random_df(num_rows, 2)
+    df["dict_col"] = np.array([f"key_{i}" for i in range(100)])[np.arange(num_rows) % 100]
+    return df
+
+
+def test_fb_dataframe_query():
+    df = generate_query_df(2000)
+    x, y, f = column("int_col"), column("additional_col_0"), column("float_col")
+
+    for fb_df in (to_flatbuffer(df, downcast=True), to_flatbuffer(df)):
+        assert fb_dataframe_query(fb_df).equals(df)
+        assert fb_dataframe_query(fb_df, select=["float_col", "int_col"]).equals(df[["float_col", "int_col"]])
+        for where, mask in (((x > 5) & (y <= 500), (df["int_col"] > 5) & (df["additional_col_0"] <= 500)),
+                            ((x * 100 + y > f / 10) | ~(x != 3), (df["int_col"] * 100 + df["additional_col_0"] > df["float_col"] / 10) | (df["int_col"] == 3)),
+                            (column("dict_col") == "key_7", df["dict_col"] == "key_7"),
+                            (column("dict_col").startswith("key_1"), df["dict_col"].str.startswith("key_1")),
+                            ((column("dict_col") != "key_10") & (x == 0), (df["dict_col"] != "key_10") & (df["int_col"] == 0)),
+                            (column("string_col").startswith("AB") | (df["string_col"][5] == column("string_col")),
+                             df["string_col"].str.startswith("AB") | (df["string_col"] == df["string_col"][5])),
+                            (column("string_col") != df["string_col"][0], df["string_col"] != df["string_col"][0]),
+                            (column("dict_col") == "missing", df["dict_col"] == "missing"),
+                            (column("dict_col").startswith(""), df["dict_col"].str.startswith(""))):
+            assert fb_dataframe_query(fb_df, ["string_col", "dict_col", "float_col"], where).equals(df.loc[mask, ["string_col", "dict_col", "float_col"]])
+
+    fb_df = to_flatbuffer(df)
+    with pytest.raises(KeyError):
+        fb_dataframe_query(fb_df, ["missing"])
+    with pytest.raises(KeyError):
+        fb_dataframe_query(fb_df, where=column("missing") > 1)
+    with pytest.raises(TypeError):
+        fb_dataframe_query(fb_df, where=column("string_col") > 1)
+    with pytest.raises(TypeError):
+        fb_dataframe_query(fb_df, where=column("int_col") == "1")
+    with pytest.raises(ValueError):
+        fb_dataframe_query(fb_df, where=column() > 1)
+
+
+def test_fb_dataframe_query_chunked_and_shared():
+    df = generate_query_df(5000)
+    chunks = [df.iloc[i:i + 1000] for i in range(0, len(df), 1000)]
+    where = (column("int_col") < 3) & column("dict_col").startswith("key_2")
+    mask = (df["int_col"] < 3) & df["dict_col"].str.startswith("key_2")
+
+    sink = io.BytesIO()
+    with FbChunkedWriter(sink, downcast=True) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    assert fb_dataframe_query(sink.getvalue(), ["dict_col", "additional_col_1"], where).equals(df.loc[mask, ["dict_col", "additional_col_1"]])
+
+    fb_shm = FbSharedMemory("CS598_query_test", segment_size=1 << 20)
+    fb_shm.add_dataframe("query_df", df)
+    fb_shm.add_dataframe_chunks("query_chunked_df", iter(chunks))
+    assert fb_shm.query("query_df", where=where).equals(df.loc[mask])
+    assert fb_shm.query("query_chunked_df", ["string_col"], where).equals(df.loc[mask, ["string_col"]])
+    fb_shm.close()
+
+
+def test_fb_dataframe_query_rejects_and_or():
+    df = generate_query_df(1000)
+    fb_df = to_flatbuffer(df)
+    fb_shm = FbSharedMemory("CS598_query_test", segment_size=1 << 20)
+    fb_shm.replace_dataframe("query_df", df)
+
+    # and / or would keep only one side of the predicate; & and | combine both.
+    with pytest.raises(TypeError):
+        fb_dataframe_query(fb_df, where=(column("int_col") > 5) and (column("dict_col") == "key_7"))
+    with pytest.raises(TypeError):
+        fb_shm.query("query_df", where=(column("int_col") > 5) or column("dict_col").startswith("key_1"))
+    mask = (df["int_col"] > 5) & (df["dict_col"] == "key_7")
+    assert fb_dataframe_query(fb_df, where=(column("int_col") > 5) & (column("dict_col") == "key_7")).equals(df.loc[mask])
+    assert fb_shm.query("query_df", where=(column("int_col") > 5) & (column("dict_col") == "key_7")).equals(df.loc[mask])
+    fb_shm.delete_dataframe("query_df")
+    fb_shm.close()
+
+
+def test_fb_dataframe_query_reads_only_the_selected_rows(monkeypatch):
+    df = generate_query_df(10000)
+    fb_df = to_flatbuffer(df)
+
+    strings_read = list()
+    string_data, dictionary = StringData.StringData.Data, DictStringData.DictStringData.Dictionary
+    monkeypatch.setattr(StringData.StringData, "Data", lambda self, j: strings_read.append(j) or string_data(self, j))
+    monkeypatch.setattr(DictStringData.DictStringData, "Dictionary", lambda self, j: strings_read.append(j) or dictionary(self, j))
+
+    where = (column("dict_col") == "key_42") & (column("int_col") == 3) & (column("string_col") != "")
+    mask = (df["dict_col"] == "key_42") & (df["int_col"] == 3)
+    assert fb_dataframe_query(fb_df, ["string_col", "dict_col"], where).equals(df.loc[mask, ["string_col", "dict_col"]])
+    # The where clause binary searches the dictionary; the selected rows decode one string each and one dictionary value.
+    assert len(strings_read) <= 2 * np.log2(100) + 2 + mask.sum() + 1
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from Dataframe import DictStringData, StringData
+from fb_dataframe import to_flatbuffer, fb_dataframe_slice
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def generate_slice_df(num_rows: int):
+    df = generate_random_df(num_rows, 2)
+    df["dict_col"] = np.array([f"key_{i}" for i in range(100)])[np.arange(num_rows) % 100]
+    return df
+
+
+def test_fb_dataframe_slice():
+    df = generate_slice_df(1000)
+    fb_df = to_flatbuffer(df, downcast=True)
+
+    for start, stop in ((0, 5), (500, 510), (990, None), (-5, None), (-20, -10), (995, 2000), (2000, 3000), (10, 5)):
+        assert fb_dataframe_slice(fb_df, start, stop).equals(df.iloc[start:stop])
+    assert fb_dataframe_slice(fb_df).equals(df)
+    assert fb_dataframe_slice(fb_df, 100, 200, columns=["dict_col", "float_col"]).equals(df.iloc[100:200][["dict_col", "float_col"]])
+    with pytest.raises(KeyError):
+        fb_dataframe_slice(fb_df, 0, 5, columns=["missing"])
+
+
+def test_fb_dataframe_slice_reads_only_the_rows(monkeypatch):
+    df = generate_slice_df(10000)
+    fb_df = to_flatbuffer(df)
+
+    strings_read = list()
+    string_data, dictionary = StringData.StringData.Data, DictStringData.DictStringData.Dictionary
+    monkeypatch.setattr(StringData.StringData, "Data", lambda self, j: strings_read.append(j) or string_data(self, j))
+    monkeypatch.setattr(DictStringData.DictStringData, "Dictionary", lambda self, j: strings_read.append(j) or dictionary(self, j))
+
+    assert fb_dataframe_slice(fb_df, 5000, 5010).equals(df.iloc[5000:5010])
+    # 10 strings and 10 dictionary values.
+    assert len(strings_read) == 20
+
+
+def test_shared_memory_slice():
+    df = generate_slice_df(1000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("slice_df", df)
+    fb_shm.add_dataframe_chunks("slice_chunked_df", (df.iloc[i:i + 300] for i in range(0, len(df), 300)))
+    for df_name in ("slice_df", "slice_chunked_df"):
+        for start, stop in ((0, 5), (250, 350), (299, 301), (-100, None), (1000, None)):
+            assert fb_shm.dataframe_slice(df_name, start, stop).equals(df.iloc[start:stop])
+        assert fb_shm.dataframe_slice(df_name, 600, 900, columns=["string_col"]).equals(df.iloc[600:900][["string_col"]])
+    fb_shm.close()
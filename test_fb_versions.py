@@ -0,0 +1,178 @@
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pytest
+import time
+
+from fb_dataframe import fb_dataframe_head
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+STORE_NAME = "CS598_versions_test"
+
+
+def test_copy_on_write_map():
+    df = generate_random_df(1000, 2)
+
+    fb_shm = FbSharedMemory(STORE_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe("versions_df", df)
+    num_entries = len(fb_shm.catalog)
+
+    # A pinned reader keeps seeing the version it pinned.
+    with fb_shm.snapshot("versions_df") as fb_buf:
+        fb_shm.dataframe_map_numeric_column("versions_df", "int_col", lambda x: x + 1, vectorized=True, copy_on_write=True)
+        fb_shm.dataframe_map_numeric_column("versions_df", "float_col", np.negative, workers=2, copy_on_write=True)
+        assert fb_dataframe_head(fb_buf, len(df)).equals(df)
+        assert fb_shm.dataframe_head("versions_df", len(df))["int_col"].equals(df["int_col"] + 1)
+        # The second map freed the first one's version, which nobody pinned; the pinned one is retired.
+        assert len(fb_shm.catalog) == num_entries + 1
+        with pytest.raises(RuntimeError):
+            with fb_shm.snapshot("versions_df"), fb_shm.snapshot("versions_df"):
+                fb_shm.dataframe_map_numeric_column("versions_df", "int_col", lambda x: x, vectorized=True)
+        assert fb_dataframe_head(fb_buf, len(df)).equals(df)
+
+    # Released, the old version is freed.
+    assert len(fb_shm.catalog) == num_entries
+    df_new = fb_shm.dataframe_head("versions_df", len(df))
+    assert df_new["int_col"].equals(df["int_col"] + 1)
+    assert df_new["float_col"].equals(-df["float_col"])
+
+    # A failed copy-on-write map leaves the dataframe and the free space as they were.
+    free_space = fb_shm.catalog.free_space()
+    with pytest.raises(OverflowError):
+        fb_shm.dataframe_map_numeric_column("versions_df", "int_col", np.sqrt, vectorized=True, copy_on_write=True)
+    assert fb_shm.dataframe_head("versions_df", len(df)).equals(df_new)
+    assert fb_shm.catalog.free_space() == free_space
+
+    # Replacing and deleting retire pinned versions too.
+    with fb_shm.snapshot("versions_df") as fb_buf:
+        fb_shm.replace_dataframe("versions_df", df)
+        fb_shm.delete_dataframe("versions_df")
+        assert fb_dataframe_head(fb_buf, len(df)).equals(df_new)
+    assert len(fb_shm.catalog) == num_entries - 1
+
+    fb_shm.close()
+
+
+def test_copy_on_write_map_across_segments():
+    df = generate_random_df(3000, 2)
+    chunks = [df.iloc[i:i + 1000] for i in range(0, len(df), 1000)]
+
+    # Segments that hold one version each, so every copy goes to another segment.
+    fb_shm = FbSharedMemory(f"{STORE_NAME}_segments", segment_size=1 << 17)
+    fb_shm.add_dataframe_chunks("versions_df", iter(chunks), downcast=True)
+    with fb_shm.snapshot("versions_df") as fb_buf:
+        fb_shm.dataframe_map_numeric_column("versions_df", "additional_col_0", lambda x: x * 2, vectorized=True, copy_on_write=True)
+        fb_shm.dataframe_map_numeric_column("versions_df", "int_col", np.negative, workers=3, copy_on_write=True)
+        assert fb_dataframe_head(fb_buf, len(df)).equals(df)
+    assert fb_shm.catalog.segments >= 2
+
+    df_new = fb_shm.dataframe_head("versions_df", len(df))
+    assert df_new.equals(df.assign(additional_col_0=df["additional_col_0"] * 2, int_col=-df["int_col"]))
+    fb_shm.delete_dataframe("versions_df")
+    fb_shm.close()
+
+
+def _nested_reader(pinned: multiprocessing.Event, mapping: multiprocessing.Event, results: multiprocessing.Queue) -> None:
+    fb_shm = FbSharedMemory(STORE_NAME)
+    try:
+        with fb_shm.snapshot("versions_df") as fb_buf:
+            pinned.set()
+            mapping.wait()
+            # The host's in-place map is waiting for this snapshot by now.
+            time.sleep(0.5)
+            results.put(fb_shm.dataframe_head("versions_df", 1000).equals(fb_dataframe_head(fb_buf, 1000)))
+    except Exception as e:
+        results.put(repr(e))
+    fb_shm.close()
+
+
+def _pinned_writer(pinned: multiprocessing.Event, mapping: multiprocessing.Event, results: multiprocessing.Queue) -> None:
+    fb_shm = FbSharedMemory(STORE_NAME)
+    with fb_shm.snapshot("versions_df"):
+        pinned.set()
+        mapping.wait()
+        time.sleep(0.5)
+        try:
+            fb_shm.dataframe_map_numeric_column("versions_df", "int_col", lambda x: x, vectorized=True, copy_on_write=True)
+            results.put(None)
+        except Exception as e:
+            results.put(type(e).__name__)
+    fb_shm.close()
+
+
+def test_in_place_map_waits_for_nested_reads():
+    df = generate_random_df(1000, 2)
+    fb_shm = FbSharedMemory(STORE_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe("versions_df", df)
+
+    # A reader that queries the store inside its snapshot neither deadlocks with an in-place map
+    # nor sees it.
+    pinned, mapping, results = multiprocessing.Event(), multiprocessing.Event(), multiprocessing.Queue()
+    reader = multiprocessing.Process(target=_nested_reader, args=(pinned, mapping, results))
+    reader.start()
+    pinned.wait()
+    mapping.set()
+    fb_shm.dataframe_map_numeric_column("versions_df", "int_col", lambda x: x + 1, vectorized=True)
+    reader.join()
+    assert results.get() is True
+    assert fb_shm.dataframe_head("versions_df", 1000)["int_col"].equals(df["int_col"] + 1)
+
+
+    # A writer that pins the version an in-place map waits for cannot go on; the kernel finds
+    # the cycle between the two processes and the writer gets a RuntimeError.
+    pinned.clear()
+    mapping.clear()
+    writer = multiprocessing.Process(target=_pinned_writer, args=(pinned, mapping, results))
+    writer.start()
+    pinned.wait()
+    mapping.set()
+    fb_shm.dataframe_map_numeric_column("versions_df", "int_col", lambda x: x - 1, vectorized=True)
+    writer.join()
+    assert results.get() == "RuntimeError"
+    assert fb_shm.dataframe_head("versions_df", 1000).equals(df)
+
+    fb_shm.delete_dataframe("versions_df")
+    fb_shm.close()
+
+
+def _guest(iterations: int, errors: multiprocessing.Queue) -> None:
+    fb_shm = FbSharedMemory(STORE_NAME)
+    try:
+        for _ in range(iterations):
+            with fb_shm.snapshot("versions_df") as fb_buf:
+                first = fb_dataframe_head(fb_buf, 1 << 20)
+                grouped = fb_shm.dataframe_group_by("versions_df", "key", {"value": ["min", "max"]})
+                second = fb_dataframe_head(fb_buf, 1 << 20)
+            assert first.equals(second)
+            assert first["value"].nunique() == 1
+            assert (grouped["value"]["min"] == grouped["value"]["max"]).all()
+    except Exception as e:
+        errors.put(repr(e))
+    fb_shm.close()
+
+
+def test_concurrent_copy_on_write_maps():
+    fb_shm = FbSharedMemory(STORE_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe("versions_df", pd.DataFrame({"key": np.arange(10000) % 7, "value": np.zeros(10000, dtype=np.int64)}))
+
+    errors = multiprocessing.Queue()
+    guests = [multiprocessing.Process(target=_guest, args=(50, errors)) for _ in range(4)]
+    for guest in guests:
+        guest.start()
+
+    maps = 0
+    while any(guest.is_alive() for guest in guests):
+        fb_shm.dataframe_map_numeric_column("versions_df", "value", lambda x: x + 1, vectorized=True, copy_on_write=True)
+        maps += 1
+    for guest in guests:
+        guest.join()
+
+    assert errors.empty(), errors.get()
+    assert all(guest.exitcode == 0 for guest in guests)
+    assert (fb_shm.dataframe_head("versions_df", 10000)["value"] == maps).all()
+    # Every old version was freed once its readers were done.
+    assert not any(entry.name.startswith("\0") for entry in fb_shm.catalog.entries())
+    fb_shm.delete_dataframe("versions_df")
+    fb_shm.close()